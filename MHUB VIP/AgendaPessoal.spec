@@ -6,7 +6,17 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('hey_listen.mp3', '.')],
-    hiddenimports=[],
+    # Carregados sob demanda por dependencias.py (importlib com o nome em texto),
+    # que a análise do PyInstaller não enxerga
+    hiddenimports=[
+        'pygame',
+        'PIL.Image',
+        'PIL.ImageDraw',
+        'pystray',
+        'pystray._win32',
+        'winsound',
+        'estatisticas',
+    ],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,1030 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Núcleo sem interface
+Rotina, agendador de alertas, persistência e lista de compras em Python puro
+(não importa Tk, pygame, pystray nem winsound), consumido pela interface
+em agenda_pessoal.py ou rodando sozinho num serviço sem tela
+"""
+
+from datetime import datetime, timedelta, time as hora_do_dia
+import threading
+import time
+import json
+import os
+import heapq
+import argparse
+import copy
+from collections import Counter
+
+from persistencia import GravadorAdiado, gravar_json_atomico, arquivo_conflito
+from armazenamento import (
+    criar_armazenamento, pasta_aplicativo, carregar_json, chave_compra,
+    ARQUIVO_ROTINA, ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS
+)
+from observador import ObservadorArquivos, mesclar
+from eventos import BarramentoEventos
+from rotina import Rotina, Horario, minutos_do_dia, para_minutos
+from importacao import ler_importacao
+from recorrencia import CalendarioRotina, Variante
+from historico import HistoricoConclusoes, ARQUIVO_HISTORICO, minutos_atraso
+
+# Arquivos próprios do núcleo (os demais dados ficam no armazenamento)
+ARQUIVO_LATENCIAS = "latencias_alertas.json"
+ARQUIVO_VARIANTES = "variantes_rotina.json"
+
+PORTA_API = 8765  # porta padrão da API local (api_local só é importado se ela for ligada)
+
+# Rotina diária padrão (usada na primeira execução)
+ROTINA_PADRAO = {
+    "05:00": {
+        "titulo": "🌅 O START - Limpeza Interna e Externa",
+        "periodo": "MANHÃ",
+        "cor": "#FF6B35",
+        "tarefas": [
+            "💧 Boca: Tome 1 Litro de Água + 1 comprimido de Vitamina C (1g)",
+            "🧊 Rosto: Lave com água fria",
+            "❄️ Técnica do Gelo: Mergulhe o rosto na água gelada ou passe gelo enrolado no pano"
+        ]
+    },
+    "07:00": {
+        "titulo": "☕ CAFÉ DA MANHÃ - Energia",
+        "periodo": "MANHÃ",
+        "cor": "#FF6B35",
+        "tarefas": [
+            "🍞 1 Pão (Francês ou 2 fatias)",
+            "🥜 30g Pasta de Amendoim (1 colher de sopa cheia)",
+            "🥚 4 Claras de Ovo (Cozidas/Mexidas) - Descarte as gemas"
+        ]
+    },
+    "08:00": {
+        "titulo": "💪 PRÉ-TREINO VASCULAR - ⛔ INÍCIO DO JEJUM DE CIGARRO",
+        "periodo": "MANHÃ",
+        "cor": "#E63946",
+        "tarefas": [
+            "🥤 O Coquetel: 200ml de Água",
+            "🍠 1 Colher de Sopa de Beterraba em Pó",
+            "🍋 Suco de Meio Limão",
+            "💊 10g Creatina + 5g BCAA",
+            "🏋️ Exercícios de Kegel: 3 séries de 15 contrações"
+        ]
+    },
+    "09:00": {
+        "titulo": "🛡️ BLINDAGEM E TREINO",
+        "periodo": "PREPARAÇÃO",
+        "cor": "#F77F00",
+        "duracao": 60,
+        "tarefas": [
+            "☀️ Protetor Solar Facial (Toque Seco/Oil Free)",
+            "🔴 ATENÇÃO: Camada generosa na NUCA e pescoço",
+            "🏋️ Treino Pesado - Hipertrofia (09:00 às 10:00)",
+            "🧺 Use toalha própria no banco"
+        ]
+    },
+    "10:15": {
+        "titulo": "🚿 BANHO TÁTICO - Pós-Treino",
+        "periodo": "PÓS-TREINO",
+        "cor": "#4ECDC4",
+        "tarefas": [
+            "🌡️ Temperatura: Morna para Fria",
+            "🧴 Cabelo: Shampoo Jaborandi (ou Clear se caspa)",
+            "🧼 Costas/Peito: Sabonete de Enxofre (Granado)",
+            "🧴 Rosto/Nuca: Sabonete de Glicerina/Neutro",
+            "💧 Pós-Banho: Hidratante Facial em Gel (Hydro Boost)"
+        ]
+    },
+    "10:30": {
+        "titulo": "🍗 REFEIÇÃO PÓS-TREINO - A Maior do Dia",
+        "periodo": "PÓS-TREINO",
+        "cor": "#4ECDC4",
+        "tarefas": [
+            "🍗 200g de Frango ou Peixe",
+            "🍠 300g de Batata-Doce (Cozida/Assada)",
+            "⚠️ Continue SEM FUMAR - corpo absorvendo nutrientes"
+        ]
+    },
+    "11:00": {
+        "titulo": "🚬 FIM DO JEJUM DE CIGARRO",
+        "periodo": "TRANSIÇÃO",
+        "cor": "#6B705C",
+        "tarefas": [
+            "✅ Liberado (mas evite se conseguir)"
+        ]
+    },
+    "13:30": {
+        "titulo": "☀️ ALMOÇO ECONÔMICO",
+        "periodo": "TARDE",
+        "cor": "#FFD166",
+        "tarefas": [
+            "🍖 150g de Proteína (Moela, Fígado, PTS ou Frango)",
+            "🍠 250g de Batata-Doce (ou Arroz e Feijão)",
+            "🥦 Vegetais: Brócolis ou Repolho (regula hormônios)"
+        ]
+    },
+    "16:30": {
+        "titulo": "🥚 LANCHE DA TARDE - Saciedade",
+        "periodo": "TARDE",
+        "cor": "#FFD166",
+        "tarefas": [
+            "🥚 5 Ovos INTEIROS (Cozidos)",
+            "💡 As gemas e proteína te seguram sem fome até a noite"
+        ]
+    },
+    "20:00": {
+        "titulo": "🌙 JANTAR - Seca Barriga",
+        "periodo": "NOITE",
+        "cor": "#7B2CBF",
+        "tarefas": [
+            "🥚 5 Claras de Ovo OU 150g de Frango/Peixe",
+            "🥗 Salada de Folhas à vontade + Fio de Azeite",
+            "⛔ ZERO carboidrato pesado aqui",
+            "💊 Suplemento: 1 Cápsula de NAC (600mg)"
+        ]
+    },
+    "21:00": {
+        "titulo": "🌙 RITUAL FINAL - Recuperação",
+        "periodo": "NOITE",
+        "cor": "#7B2CBF",
+        "tarefas": [
+            "🧴 Lave o rosto (Sabonete Glicerina)",
+            "💈 Aplique Minoxidil na falha da bochecha e entradas",
+            "💧 Passe Hidratante nas áreas sem Minoxidil",
+            "💊 Tome ZMA + Melatonina",
+            "🌙 Apague as luzes - O músculo cresce agora!"
+        ]
+    }
+}
+
+# Lista de compras padrão
+LISTA_COMPRAS_PADRAO = {
+    "🥬 MERCADO / FEIRA": [
+        "Ovos (Mínimo 5 dúzias/mês - Base da dieta)",
+        "Peito de Frango (Pós-treino)",
+        "Proteína Barata (Moela, Fígado ou PTS/Soja - Almoço)",
+        "Arroz Branco (Pós-treino - energia rápida)",
+        "Batata-Doce (Almoço - energia lenta)",
+        "Pão (Francês ou Forma)",
+        "Pasta de Amendoim Integral (1kg)",
+        "Gelatina Incolor e Sem Sabor (Caixinhas)",
+        "Beterraba em Pó (Ou natural)",
+        "Limão (Saco grande)",
+        "Vegetais: Repolho ou Brócolis (Testosterona)",
+        "Azeite de Oliva (Extra virgem)"
+    ],
+    "💊 SUPLEMENTOS (O Kit)": [
+        "NAC 600mg (Limpeza Pulmão/Pele)",
+        "Vitamina C 1.000mg (Pele/Imunidade - Frasco 120 caps)",
+        "ZMA Ultra (Testo/Sono - Frasco concentrado)",
+        "Ômega 3 (Ereção/Coração - Frasco concentrado)",
+        "Creatina (Monohidratada)",
+        "Melatonina (A barata de R$ 20,00 - Opcional se o ZMA não bastar)"
+    ],
+    "🚿 HIGIENE & BANHO": [
+        "Sabonete de Enxofre (Granado Amarelo - SÓ COSTAS/PEITO)",
+        "Sabonete de Glicerina (Granado/Phebo - ROSTO E NUCA)",
+        "Shampoo Jaborandi (Bio Extratus - Dia a dia)",
+        "Shampoo Clear (Uso 1x semana)",
+        "Condicionador Floratrix (Só pontas)",
+        "Yamasterol Amarelo (Pré-Poo)"
+    ],
+    "🧴 ESTÉTICA & BANCADA": [
+        "Tônico de Jaborandi (Bio Extratus)",
+        "Sérum Vitamina C (Rosto manhã)",
+        "Hidratante Facial em Gel (Hydro Boost ou similar)",
+        "Protetor Solar Toque Seco (Rosto e Nuca)",
+        "Minoxidil (Barba/Cabelo)"
+    ]
+}
+
+# Cores disponíveis para períodos
+CORES_DISPONIVEIS = {
+    "🟠 Laranja": "#FF6B35",
+    "🔴 Vermelho": "#E63946",
+    "🟡 Amarelo": "#FFD166",
+    "🟢 Verde": "#4ECDC4",
+    "🟣 Roxo": "#7B2CBF",
+    "⚫ Cinza": "#6B705C",
+    "🔵 Azul": "#00d4ff"
+}
+
+PERIODOS_DISPONIVEIS = ["MANHÃ", "PREPARAÇÃO", "TREINO", "PÓS-TREINO", "TRANSIÇÃO", "TARDE", "NOITE"]
+
+# Agendador de alertas
+ESPERA_MAXIMA_AGENDADOR = 300  # segundos; protege contra suspensão/ajuste do relógio
+TOLERANCIA_ATRASO_ALERTA = timedelta(minutes=5)  # alertas mais velhos que isso são pulados
+
+# Medição de latência dos alertas (ms desde o horário agendado, acumulado por etapa)
+ETAPAS_LATENCIA = {
+    "agendador": "⏱️ Agendador",
+    "tk": "🧵 Fila do Tk",
+    "janela": "🪟 Janela na tela",
+    "som": "🔊 Som iniciado"
+}
+LIMITES_HISTOGRAMA_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, 300000]
+DIAS_HISTORICO_LATENCIA = 30
+
+
+VIRADA_DO_DIA = ""  # "horário" da entrada da fila que carrega os horários do dia seguinte
+
+
+class AgendadorAlertas:
+    """Mantém os horários de hoje numa fila de prioridade e dorme até o prazo mais próximo
+    
+    horarios_do_dia(data) dá os "HH:MM" de um dia (a rotina compilada, em cache);
+    ele é chamado uma vez por dia, na virada, e não a cada alerta.
+    """
+    
+    def __init__(self, ao_disparar, horarios_do_dia):
+        self.ao_disparar = ao_disparar
+        self.horarios_do_dia = horarios_do_dia
+        self._fila = []
+        self._condicao = threading.Condition()
+        self._rodando = False
+        self._thread = None
+    
+    def _prazos_do_dia(self, dia, desde):
+        """(prazo, horario) dos horários do dia ainda não passados (o minuto atual ainda conta)"""
+        meia_noite = datetime.combine(dia, hora_do_dia())
+        for horario in self.horarios_do_dia(dia):
+            prazo = meia_noite + timedelta(minutes=para_minutos(horario))
+            if desde < prazo + timedelta(minutes=1):
+                yield prazo, horario
+    
+    def _agendar_dia(self, dia, desde):
+        for entrada in self._prazos_do_dia(dia, desde):
+            heapq.heappush(self._fila, entrada)
+        heapq.heappush(self._fila, (datetime.combine(dia + timedelta(days=1), hora_do_dia()), VIRADA_DO_DIA))
+    
+    def reagendar(self):
+        """Refaz a fila com os horários de hoje (a rotina mudou) e acorda a thread na hora"""
+        with self._condicao:
+            agora = datetime.now()
+            self._fila = []
+            self._agendar_dia(agora.date(), agora)
+            self._condicao.notify()
+    
+    def proximo(self):
+        """Retorna (prazo, horario) do próximo alerta de hoje ou None"""
+        with self._condicao:
+            return min(((prazo, horario) for prazo, horario in self._fila if horario != VIRADA_DO_DIA), default=None)
+    
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self._rodando = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+    
+    def parar(self):
+        with self._condicao:
+            self._rodando = False
+            self._condicao.notify()
+    
+    def _loop(self):
+        with self._condicao:
+            while self._rodando:
+                if not self._fila:
+                    self._condicao.wait()
+                    continue
+                
+                prazo, horario = self._fila[0]
+                agora = datetime.now()
+                espera = (prazo - agora).total_seconds()
+                if espera > 0:
+                    self._condicao.wait(min(espera, ESPERA_MAXIMA_AGENDADOR))
+                    continue
+                
+                heapq.heappop(self._fila)
+                if horario == VIRADA_DO_DIA:
+                    self._agendar_dia(prazo.date(), prazo)
+                    continue
+                if agora - prazo > TOLERANCIA_ATRASO_ALERTA:
+                    # Máquina suspensa/relógio ajustado: não dispara alertas velhos
+                    continue
+                
+                # Callback fora da trava para não bloquear reagendar()
+                self._condicao.release()
+                try:
+                    self.ao_disparar(horario, prazo)
+                except Exception as e:
+                    print(f"Erro ao disparar alerta {horario}: {e}")
+                finally:
+                    self._condicao.acquire()
+
+
+class MedidorLatencia:
+    """Acumula as latências dos alertas num histograma por dia, persistido em JSON"""
+    
+    def __init__(self, gravador, arquivo=ARQUIVO_LATENCIAS):
+        self.gravador = gravador
+        self.arquivo = arquivo
+        self.trava = threading.Lock()
+        self.dias = self.carregar()
+    
+    def carregar(self):
+        try:
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar latências: {e}")
+        return {}
+    
+    def salvar(self):
+        # Cópia rasa por histograma: bem mais barata que deepcopy a cada alerta
+        dias = {
+            data: {etapa: dict(h, contagens=list(h["contagens"])) for etapa, h in dia.items()}
+            for data, dia in self.dias.items()
+        }
+        self.gravador.marcar(self.arquivo, dias)
+    
+    @staticmethod
+    def nova_marcacao(prazo):
+        """Cria a marcação de um alerta agendado; cada etapa grava seu time.time() nela"""
+        return {"prazo": prazo.timestamp(), "agendador": time.time()}
+    
+    def marcar(self, marcacao, etapa):
+        """Registra a etapa; quando todas chegam, a marcação entra no histograma"""
+        if marcacao is None:
+            return
+        with self.trava:
+            if etapa in marcacao:
+                return
+            marcacao[etapa] = time.time()
+            self._registrar(marcacao)
+    
+    def registrar(self, marcacao):
+        """Marcação medida em outro processo (a interface ligada ao serviço); entra se estiver completa"""
+        with self.trava:
+            self._registrar(marcacao)
+    
+    def _registrar(self, marcacao):
+        if not all(e in marcacao for e in ETAPAS_LATENCIA):
+            return
+        data = datetime.fromtimestamp(marcacao["prazo"]).strftime("%Y-%m-%d")
+        dia = self.dias.setdefault(data, {})
+        for etapa_hist in ETAPAS_LATENCIA:
+            ms = max(0.0, (marcacao[etapa_hist] - marcacao["prazo"]) * 1000)
+            self._adicionar(dia, etapa_hist, ms)
+        
+        for antiga in sorted(self.dias)[:-DIAS_HISTORICO_LATENCIA]:
+            del self.dias[antiga]
+        self.salvar()
+    
+    @staticmethod
+    def _adicionar(dia, etapa, ms):
+        hist = dia.setdefault(etapa, {"contagens": [0] * (len(LIMITES_HISTOGRAMA_MS) + 1), "n": 0, "max": 0})
+        indice = next((i for i, limite in enumerate(LIMITES_HISTOGRAMA_MS) if ms <= limite), len(LIMITES_HISTOGRAMA_MS))
+        hist["contagens"][indice] += 1
+        hist["n"] += 1
+        hist["max"] = max(hist["max"], round(ms, 1))
+    
+    @staticmethod
+    def percentil(hist, fracao):
+        """Estima o percentil interpolando dentro do balde do histograma"""
+        alvo = fracao * hist["n"]
+        acumulado = 0
+        for i, contagem in enumerate(hist["contagens"]):
+            if contagem and acumulado + contagem >= alvo:
+                inicio = LIMITES_HISTOGRAMA_MS[i - 1] if i > 0 else 0
+                fim = LIMITES_HISTOGRAMA_MS[i] if i < len(LIMITES_HISTOGRAMA_MS) else hist["max"]
+                return min(hist["max"], inicio + (fim - inicio) * (alvo - acumulado) / contagem)
+            acumulado += contagem
+        return hist["max"]
+    
+    def resumo(self, data):
+        """Retorna {etapa: (p50, p95, max, n)} do dia"""
+        with self.trava:
+            dia = self.dias.get(data, {})
+            return {
+                etapa: (self.percentil(h, 0.5), self.percentil(h, 0.95), h["max"], h["n"])
+                for etapa, h in dia.items() if h["n"]
+            }
+
+
+class ListaCompras:
+    """Categorias da lista de compras e itens marcados, indexados por categoria
+    
+    Cada alteração vira uma única operação no armazenamento (um item, uma categoria).
+    """
+    
+    def __init__(self, armazenamento):
+        self.armazenamento = armazenamento
+        self.lista = {}
+        self.itens_por_categoria = {}
+        self.marcados_por_categoria = {}
+        self.versao = 0  # muda a cada alteração (ETag da API)
+        self.carregar()
+    
+    def carregar(self):
+        lista, marcados = self.armazenamento.carregar_compras()
+        if lista is None:
+            lista, marcados = copy.deepcopy(LISTA_COMPRAS_PADRAO), set()
+            self.armazenamento.substituir_compras(lista, marcados)
+        self.lista = lista
+        self.indexar(marcados)
+        self.versao += 1
+    
+    def indexar(self, marcados=()):
+        """Reconstrói os índices por categoria a partir da lista e dos pares (categoria, item) marcados"""
+        self.itens_por_categoria = {cat: set(itens) for cat, itens in self.lista.items()}
+        self.marcados_por_categoria = {cat: set() for cat in self.lista}
+        for categoria, item in marcados:
+            if item in self.itens_por_categoria.get(categoria, ()):
+                self.marcados_por_categoria[categoria].add(item)
+    
+    def esta_marcado(self, categoria, item):
+        return item in self.marcados_por_categoria.get(categoria, ())
+    
+    def alternar_item(self, categoria, item):
+        """Marca/desmarca um item; retorna o novo estado"""
+        marcado = not self.esta_marcado(categoria, item)
+        self.definir_marcado(categoria, item, marcado)
+        return marcado
+    
+    def definir_marcado(self, categoria, item, marcado):
+        marcados = self.marcados_por_categoria.setdefault(categoria, set())
+        if marcado:
+            marcados.add(item)
+        else:
+            marcados.discard(item)
+        self.versao += 1
+        self.armazenamento.definir_marcado(categoria, item, marcado)
+    
+    def chaves_marcadas(self):
+        return {chave_compra(categoria, item) for categoria, itens in self.marcados_por_categoria.items() for item in itens}
+    
+    def adicionar_item(self, categoria, item):
+        """Adiciona um item; retorna False se já existir"""
+        if categoria not in self.lista or item in self.itens_por_categoria[categoria]:
+            return False
+        self.lista[categoria].append(item)
+        self.itens_por_categoria[categoria].add(item)
+        self.versao += 1
+        self.armazenamento.adicionar_item(categoria, item)
+        return True
+    
+    def remover_item(self, categoria, item):
+        if categoria not in self.lista or item not in self.itens_por_categoria[categoria]:
+            return False
+        self.lista[categoria].remove(item)
+        self.itens_por_categoria[categoria].discard(item)
+        self.marcados_por_categoria.get(categoria, set()).discard(item)
+        self.versao += 1
+        self.armazenamento.remover_item(categoria, item)
+        return True
+    
+    def adicionar_categoria(self, categoria):
+        """Adiciona uma categoria vazia; retorna False se já existir"""
+        if categoria in self.lista:
+            return False
+        self.lista[categoria] = []
+        self.itens_por_categoria[categoria] = set()
+        self.marcados_por_categoria[categoria] = set()
+        self.versao += 1
+        self.armazenamento.adicionar_categoria(categoria)
+        return True
+    
+    def remover_categoria(self, categoria):
+        if categoria not in self.lista:
+            return False
+        del self.lista[categoria]
+        del self.itens_por_categoria[categoria]
+        self.marcados_por_categoria.pop(categoria, None)
+        self.versao += 1
+        self.armazenamento.remover_categoria(categoria)
+        return True
+    
+    def resetar(self):
+        """Volta para a lista padrão e desmarca tudo"""
+        self.lista = copy.deepcopy(LISTA_COMPRAS_PADRAO)
+        self.indexar()
+        self.versao += 1
+        self.armazenamento.substituir_compras(self.lista, set())
+
+
+class AgendaCore:
+    """Estado da agenda (rotina, conclusões, alertas, compras) e o agendador de alertas"""
+    
+    def __init__(self, armazenamento="sqlite", pasta=None):
+        # Pasta de dados: a do aplicativo, não o diretório de onde ele foi aberto
+        self.pasta = pasta or pasta_aplicativo()
+        # Gravações em arquivo (latências e o armazenamento JSON) passam por ele
+        self.gravador = GravadorAdiado()
+        self.armazenamento = criar_armazenamento(armazenamento, self.pasta, self.gravador)
+        # Muda a cada alteração da rotina (ou variantes) e das conclusões: a ETag da API sai dela
+        self.versao_rotina = 0
+        self.rotina = self.carregar_rotina()  # a rotina padrão; a de cada dia vem de rotina_do_dia()
+        self.calendario = CalendarioRotina(self.rotina, self.carregar_variantes())
+        self.alertas_ativos = True
+        self.alertas_disparados = set()
+        self.data_alertas = datetime.now().strftime("%Y-%m-%d")
+        self.carregar_alertas_disparados()
+        self.tarefas_concluidas = {}
+        self.carregar_conclusoes()
+        self.historico = self.carregar_historico()
+        self.compras = ListaCompras(self.armazenamento)
+        self.medidor_latencia = MedidorLatencia(self.gravador, os.path.join(self.pasta, ARQUIVO_LATENCIAS))
+        
+        # As threads (agendador, observador, bandeja) só publicam aqui; o estado é
+        # alterado apenas por quem drena o barramento (a thread do Tk, ou main())
+        self.eventos = BarramentoEventos()
+        self.eventos.assinar("alerta", self.alerta_agendado)
+        self.eventos.assinar("mudanca_externa", self._mudanca_externa)
+        self.eventos.assinar("api", self._requisicao_api)
+        
+        # Chamado na thread dona com (horario, marcacao) quando um alerta deve abrir
+        self.ao_alerta = None
+        self.agendador = AgendadorAlertas(
+            lambda horario, prazo: self.eventos.publicar("alerta", horario, prazo),
+            lambda dia: self.calendario.rotina_do_dia(dia).keys()
+        )
+        
+        # Edições externas dos arquivos de rotina e compras (iniciar_observador)
+        self.observador = None
+        self._bases = {}  # conteúdo de cada arquivo na última leitura/gravação, base da mescla
+        self._mesclas_pendentes = Counter()  # lidas pelo observador, ainda não aplicadas
+        self._trava_mesclas = threading.Lock()
+        # Chamado na thread dona com o resumo (aplicar_mudanca_externa) de cada edição mesclada
+        self.ao_mudanca_externa = None
+        
+        # API HTTP local opcional (iniciar_api); as alterações feitas por ela também avisam ao_mudanca_externa
+        self.api = None
+    
+    # ----- Rotina -----
+    
+    def carregar_rotina(self):
+        """Carrega a rotina do arquivo ou usa (e grava) a padrão"""
+        rotina = self.armazenamento.carregar_rotina()
+        if rotina is None:
+            # Grava a padrão já na primeira vez: as edições e importações gravam só os horários que mudam
+            rotina = ROTINA_PADRAO
+            self.armazenamento.substituir_rotina(rotina)
+        return Rotina.de_json(rotina)
+    
+    def salvar_rotina(self):
+        """Grava a rotina inteira (para trocas em lote; edições usam salvar_edicao)"""
+        self.armazenamento.substituir_rotina(self.rotina.para_json())
+        self._rotina_alterada()
+    
+    def rotina_do_dia(self, data=None):
+        """Rotina efetiva do dia (padrão + variantes que valem nele), compilada uma vez por dia"""
+        return self.calendario.rotina_do_dia(data or datetime.now().date())
+    
+    def variantes_do_dia(self, data=None):
+        return self.calendario.variantes_do_dia(data or datetime.now().date())
+    
+    def _rotina_alterada(self):
+        """A rotina padrão ou uma variante mudou: recompila os dias e reagenda os alertas"""
+        self.versao_rotina += 1
+        self.calendario.invalidar()
+        self.atualizar_agenda_do_dia()
+        self.agendador.reagendar()
+    
+    def salvar_edicao(self, horario_original, novo_horario, novos_dados):
+        """Edita, move (novo horário) ou exclui (novo_horario None) um horário da rotina de hoje
+        
+        novos_dados é um Horario já com os minutos de novo_horario. Se o horário
+        veio de uma variante, é a variante que muda; senão, a rotina padrão.
+        """
+        nome_variante = self.calendario.origem(datetime.now().date(), horario_original)
+        if nome_variante is not None:
+            self._editar_variante(self.calendario.variante(nome_variante), horario_original, novo_horario, novos_dados)
+            return
+        
+        if novo_horario is None or horario_original != novo_horario:
+            # Excluído, ou mudou de horário: sai do lugar antigo
+            if self.rotina.remover(horario_original) is not None:
+                self.armazenamento.remover_horario(horario_original)
+        if novo_horario is not None:
+            self.rotina.definir(novos_dados)
+            self.armazenamento.salvar_horario(novo_horario, novos_dados.para_dict())
+        self._rotina_alterada()
+    
+    def adicionar_tarefa(self, horario, dados):
+        """Adiciona (ou substitui) o Horario dados na rotina padrão"""
+        self.rotina.definir(dados)
+        self.armazenamento.salvar_horario(horario, dados.para_dict())
+        self._rotina_alterada()
+    
+    # ----- Importação -----
+    
+    def ler_importacao(self, arquivo):
+        """Lê um .ics/.csv (pode rodar fora da thread dona: não toca no estado)"""
+        return ler_importacao(arquivo, PERIODOS_DISPONIVEIS, CORES_DISPONIVEIS)
+    
+    def conflitos_importacao(self, lido):
+        """Horários importados que já existem na rotina padrão com outro conteúdo"""
+        return [
+            horario.horario for _, horario in sorted(lido["horarios"].items())
+            if horario.horario in self.rotina and self.rotina[horario.horario] != horario
+        ]
+    
+    def aplicar_importacao(self, lido, substituir=False):
+        """Junta à rotina padrão o resultado de ler_importacao numa única gravação
+        
+        Horários iguais aos existentes são pulados; os diferentes só substituem
+        os existentes com substituir. Retorna as listas "novos", "substituidos"
+        e "mantidos" (conflitos não substituídos) e a contagem de "iguais".
+        """
+        resumo = {"novos": [], "substituidos": [], "mantidos": [], "iguais": 0}
+        gravar = {}
+        for _, horario in sorted(lido["horarios"].items()):
+            chave = horario.horario
+            atual = self.rotina.get(chave)
+            if atual is None:
+                resumo["novos"].append(chave)
+            elif atual == horario:
+                resumo["iguais"] += 1
+                continue
+            elif substituir:
+                resumo["substituidos"].append(chave)
+            else:
+                resumo["mantidos"].append(chave)
+                continue
+            gravar[chave] = horario
+        
+        if gravar:
+            for horario in gravar.values():
+                self.rotina.definir(horario)
+            self.armazenamento.salvar_horarios({chave: horario.para_dict() for chave, horario in gravar.items()})
+            self._rotina_alterada()
+        return resumo
+    
+    def importar_rotina(self, arquivo, substituir=False):
+        """ler_importacao + aplicar_importacao, para quem já está na thread dona"""
+        lido = self.ler_importacao(arquivo)
+        resumo = self.aplicar_importacao(lido, substituir)
+        resumo.update({chave: lido[chave] for chave in ("eventos", "repetidos", "dia_inteiro", "invalidos", "erros")})
+        return resumo
+    
+    # ----- Variantes -----
+    
+    def carregar_variantes(self):
+        variantes = []
+        for dados in carregar_json(os.path.join(self.pasta, ARQUIVO_VARIANTES), []):
+            try:
+                variantes.append(Variante.de_dict(dados))
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"Variante ignorada em {ARQUIVO_VARIANTES}: {e}")
+        return variantes
+    
+    def salvar_variantes(self):
+        self.gravador.marcar(
+            os.path.join(self.pasta, ARQUIVO_VARIANTES),
+            [variante.para_dict() for variante in self.calendario.variantes],
+            indent=2
+        )
+        self._rotina_alterada()
+    
+    def definir_variante(self, variante):
+        """Inclui a variante, ou substitui a de mesmo nome"""
+        variantes = [v if v.nome != variante.nome else variante for v in self.calendario.variantes]
+        if self.calendario.variante(variante.nome) is None:
+            variantes.append(variante)
+        self.calendario.definir_variantes(variantes)
+        self.salvar_variantes()
+    
+    def remover_variante(self, nome):
+        self.calendario.definir_variantes(v for v in self.calendario.variantes if v.nome != nome)
+        self.salvar_variantes()
+    
+    def _editar_variante(self, variante, horario_original, novo_horario, novos_dados):
+        if novo_horario is None or horario_original != novo_horario:
+            if variante.substituir or horario_original not in self.rotina:
+                variante.horarios.pop(horario_original, None)
+            else:
+                variante.horarios[horario_original] = None  # esconde o horário da rotina padrão
+        if novo_horario is not None:
+            variante.horarios[novo_horario] = novos_dados
+        self.salvar_variantes()
+    
+    # ----- Conclusões -----
+    
+    def carregar_conclusoes(self):
+        """Carrega as conclusões do dia"""
+        self.tarefas_concluidas = self.armazenamento.carregar_conclusoes(datetime.now().strftime("%Y-%m-%d"))
+        self.versao_rotina += 1
+    
+    def definir_conclusao(self, horario, concluida):
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        self.tarefas_concluidas[horario] = concluida
+        self.versao_rotina += 1
+        self.armazenamento.definir_conclusao(hoje, horario, concluida)
+        self.historico.definir(hoje, horario, concluida)
+    
+    def resetar_conclusoes(self):
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        self.tarefas_concluidas.clear()
+        self.versao_rotina += 1
+        self.armazenamento.limpar_conclusoes(hoje)
+        self.historico.limpar_dia(hoje)
+    
+    def carregar_historico(self):
+        """Abre o histórico em bitsets; na primeira vez importa o histórico do armazenamento"""
+        historico = HistoricoConclusoes(os.path.join(self.pasta, ARQUIVO_HISTORICO))
+        if historico.inicio is None:
+            historico.importar(self.armazenamento.carregar_historico(), agenda=self.rotina.keys())
+        elif historico.sem_confirmacoes:
+            # Arquivo de antes dos atrasos: eles vêm do armazenamento uma única vez
+            historico.importar_confirmacoes(self.armazenamento.carregar_historico())
+        historico.definir_agenda(datetime.now().strftime("%Y-%m-%d"), self.rotina_do_dia().keys())
+        return historico
+    
+    def atualizar_agenda_do_dia(self, data=None):
+        """Os horários da rotina do dia passam a ser os agendados do dia no histórico"""
+        data = data or datetime.now().strftime("%Y-%m-%d")
+        self.historico.definir_agenda(data, self.rotina_do_dia(datetime.strptime(data, "%Y-%m-%d").date()).keys())
+    
+    # ----- Alertas -----
+    
+    def carregar_alertas_disparados(self):
+        self.alertas_disparados = self.armazenamento.carregar_alertas(self.data_alertas)
+    
+    def resetar_alertas(self):
+        self.alertas_disparados.clear()
+        self.armazenamento.limpar_alertas(self.data_alertas)
+    
+    def ativar_alertas(self, ativos):
+        self.alertas_ativos = bool(ativos)
+    
+    def confirmar_alerta(self, marcacao):
+        """Registra que o alerta agendado da marcação foi fechado com a senha"""
+        if not marcacao or "horario" not in marcacao:
+            return
+        data = datetime.fromtimestamp(marcacao["prazo"]).strftime("%Y-%m-%d")
+        hora = datetime.now().strftime("%H:%M:%S")
+        self.armazenamento.confirmar_alerta(data, marcacao["horario"], hora)
+        self.historico.confirmar(data, marcacao["horario"], minutos_atraso(marcacao["horario"], hora))
+    
+    def iniciar_agendador(self):
+        """Inicia o agendador que dorme até o próximo horário da rotina"""
+        self.agendador.reagendar()
+        self.agendador.iniciar()
+    
+    def rodar_sem_interface(self):
+        """Faz da thread atual a dona do estado até o evento "sair" (ou Ctrl+C), e então para tudo
+        
+        Dorme até alguém publicar no barramento e drena; é o laço de quem roda sem Tk.
+        """
+        acordar = threading.Event()
+        encerrar = threading.Event()
+        self.eventos.assinar("sair", encerrar.set)
+        self.eventos.despertar = acordar.set
+        try:
+            while not encerrar.is_set():
+                acordar.wait()
+                acordar.clear()
+                self.eventos.drenar_tudo()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.parar()
+    
+    def parar(self):
+        """Para o agendador e grava tudo o que ainda estiver pendente"""
+        if self.api is not None:
+            self.api.parar()
+        self.agendador.parar()
+        if self.observador is not None:
+            self.observador.parar()
+        self.armazenamento.parar()
+        self.historico.parar()
+        self.gravador.parar()
+    
+    # ----- API local -----
+    
+    def iniciar_api(self, porta=PORTA_API):
+        """Sobe a API HTTP em 127.0.0.1; retorna o servidor, ou None se a porta não abrir"""
+        from api_local import ServidorAPI  # o asyncio sozinho custa ~10 MB de memória
+        self.api = ServidorAPI(self, porta)
+        if not self.api.iniciar():
+            print(f"API local indisponível na porta {porta}: {self.api.erro}")
+            self.api = None
+        return self.api
+    
+    def _requisicao_api(self, funcao, recurso, futuro):
+        """Atende na thread dona uma requisição da API; recurso é o que ela altera ("rotina", "compras") ou None"""
+        if not futuro.set_running_or_notify_cancel():
+            return
+        try:
+            resultado = funcao()
+        except Exception as e:
+            futuro.set_exception(e)
+            return
+        futuro.set_result(resultado)
+        if recurso is not None and self.ao_mudanca_externa:
+            arquivo = ARQUIVO_ROTINA if recurso == "rotina" else ARQUIVO_LISTA_COMPRAS
+            self.ao_mudanca_externa({"arquivo": arquivo, "alterados": [], "conflitos": [], "origem": "api"})
+    
+    # ----- Edições externas -----
+    
+    def iniciar_observador(self):
+        """Passa a mesclar as edições feitas fora do programa na rotina, nas variantes e na lista de compras"""
+        arquivos = [os.path.join(self.pasta, nome) for nome in (ARQUIVO_ROTINA, ARQUIVO_VARIANTES, ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS)]
+        self._bases = {arquivo: carregar_json(arquivo) for arquivo in arquivos}
+        self.observador = ObservadorArquivos(arquivos, self._arquivo_alterado)
+        # Gravação de um arquivo editado por fora espera a mescla em vez de sobrescrevê-lo
+        self.gravador.conferir = self._pode_gravar
+        self.gravador.ao_gravar = self._arquivo_gravado
+        self.observador.iniciar()
+    
+    def _pode_gravar(self, arquivo):
+        """False enquanto houver edição externa do arquivo não lida ou lida e ainda não mesclada"""
+        with self._trava_mesclas:
+            if self._mesclas_pendentes[arquivo]:
+                return False
+        return not self.observador.alterado(arquivo)
+    
+    def _arquivo_gravado(self, arquivo, dados):
+        if arquivo in self._bases:
+            self._bases[arquivo] = dados
+            self.observador.conhecer(arquivo)
+    
+    def _arquivo_alterado(self, arquivo):
+        """Thread do observador: lê só o arquivo que mudou e entrega a mescla ao dono do estado"""
+        deles = carregar_json(arquivo)
+        if deles is not None:  # apagado ou inválido: espera a próxima gravação
+            with self._trava_mesclas:
+                self._mesclas_pendentes[arquivo] += 1
+            self.eventos.publicar("mudanca_externa", arquivo, deles)
+    
+    def _mudanca_externa(self, arquivo, deles):
+        try:
+            resumo = self.aplicar_mudanca_externa(arquivo, deles)
+        finally:
+            with self._trava_mesclas:
+                self._mesclas_pendentes[arquivo] -= 1
+        if resumo and self.ao_mudanca_externa is not None:
+            self.ao_mudanca_externa(resumo)
+    
+    def aplicar_mudanca_externa(self, arquivo, deles):
+        """Mescla o novo conteúdo de um arquivo editado por fora com o estado em memória
+        
+        Só o que mudou no arquivo desde a última leitura é aplicado (e vai para o
+        armazenamento e o agendador). O que mudou dos dois lados fica com a versão
+        do programa, e a do arquivo é salva em *.conflito.json. Retorna
+        {"arquivo", "alterados", "conflitos"}, ou None se o conteúdo for inválido.
+        """
+        nome = os.path.basename(arquivo)
+        # Arquivo que não existia: a base é o estado atual (tudo o que ele trouxer é mudança deles)
+        base = self._bases.get(arquivo)
+        if nome == ARQUIVO_ROTINA and isinstance(deles, dict):
+            alterados, conflitos = self._mesclar_rotina(base or self.rotina.para_json(), deles)
+        elif nome == ARQUIVO_LISTA_COMPRAS and isinstance(deles, dict):
+            alterados, conflitos = self._mesclar_lista_compras(base or copy.deepcopy(self.compras.lista), deles)
+        elif nome == ARQUIVO_VARIANTES and isinstance(deles, list):
+            alterados, conflitos = self._mesclar_variantes(
+                [v.para_dict() for v in self.calendario.variantes] if base is None else base, deles
+            )
+        elif nome == ARQUIVO_COMPRAS and isinstance(deles, list):
+            alterados, conflitos = self._mesclar_marcados(self.compras.chaves_marcadas() if base is None else base, deles)
+        else:
+            print(f"Conteúdo inesperado em {arquivo}, ignorado")
+            return None
+        
+        self._bases[arquivo] = deles
+        if conflitos:
+            conteudo = {chave: deles.get(chave) for chave in conflitos} if isinstance(deles, dict) else deles
+            gravar_json_atomico(arquivo_conflito(arquivo), conteudo, indent=2)
+            print(f"Conflito em {nome}: {', '.join(sorted(conflitos))}; versão do arquivo salva em {arquivo_conflito(arquivo)}")
+        return {"arquivo": nome, "alterados": sorted(alterados), "conflitos": sorted(conflitos)}
+    
+    def _mesclar_rotina(self, base, deles):
+        alterados, conflitos = mesclar(base, self.rotina.para_json(), deles)
+        for horario in sorted(alterados):
+            if horario not in deles:
+                self.rotina.remover(horario)
+                self.armazenamento.remover_horario(horario)
+                continue
+            try:
+                novo = Horario.de_dict(horario, deles[horario])
+            except (ValueError, AttributeError) as e:
+                print(f"Horário ignorado em {ARQUIVO_ROTINA} ({horario}): {e}")
+                alterados.discard(horario)
+                continue
+            self.rotina.definir(novo)
+            self.armazenamento.salvar_horario(horario, novo.para_dict())
+        if alterados:
+            self._rotina_alterada()
+        return alterados, conflitos
+    
+    def _mesclar_variantes(self, base, deles):
+        """Mescla por nome de variante; a ordem (desempate de prioridade) é a atual, as novas no fim"""
+        def por_nome(lista):
+            return {dados["nome"]: dados for dados in lista if isinstance(dados, dict) and "nome" in dados}
+        
+        deles_por_nome = por_nome(deles)
+        nossas = [variante.para_dict() for variante in self.calendario.variantes]
+        alteradas, conflitos = mesclar(por_nome(base), por_nome(nossas), deles_por_nome)
+        novas = {}
+        for nome in alteradas & set(deles_por_nome):
+            try:
+                novas[nome] = Variante.de_dict(deles_por_nome[nome])
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"Variante ignorada em {ARQUIVO_VARIANTES} ({nome}): {e}")
+                alteradas.discard(nome)
+        if alteradas:
+            variantes = [novas.get(v.nome, v) for v in self.calendario.variantes if v.nome not in alteradas or v.nome in novas]
+            variantes += [novas[nome] for nome in deles_por_nome if nome in novas and self.calendario.variante(nome) is None]
+            self.calendario.definir_variantes(variantes)
+            self._rotina_alterada()
+        return alteradas, conflitos
+    
+    def _mesclar_lista_compras(self, base, deles):
+        compras = self.compras
+        alteradas, conflitos = mesclar(base, compras.lista, deles)
+        for categoria in alteradas:
+            if categoria not in deles:
+                compras.remover_categoria(categoria)
+                continue
+            compras.adicionar_categoria(categoria)
+            novos = set(deles[categoria])
+            for item in [item for item in compras.lista[categoria] if item not in novos]:
+                compras.remover_item(categoria, item)
+            for item in deles[categoria]:
+                compras.adicionar_item(categoria, item)
+        return alteradas, conflitos
+    
+    def _mesclar_marcados(self, base, deles):
+        """Marcações são sim/não: mudou dos dois lados = mesmo valor, então não há conflito"""
+        def conjunto(chaves):
+            return {chave: True for chave in chaves}
+        
+        alteradas, _ = mesclar(conjunto(base), conjunto(self.compras.chaves_marcadas()), conjunto(deles))
+        categorias = set()
+        marcadas = set(deles)
+        for chave in alteradas:
+            categoria, _, item = chave.partition("|")
+            if item in self.compras.itens_por_categoria.get(categoria, ()):
+                self.compras.definir_marcado(categoria, item, chave in marcadas)
+                categorias.add(categoria)
+        return categorias, set()
+    
+    def alerta_agendado(self, horario, prazo):
+        """Evento "alerta" do agendador, tratado na thread dona"""
+        if not self.alertas_ativos or horario not in self.rotina_do_dia(prazo.date()):
+            return
+        
+        data_prazo = prazo.strftime("%Y-%m-%d")
+        if data_prazo != self.data_alertas:
+            # Virou o dia: os alertas de ontem não bloqueiam os de hoje
+            self.alertas_disparados.clear()
+            self.data_alertas = data_prazo
+            self.atualizar_agenda_do_dia(data_prazo)
+        
+        if horario in self.alertas_disparados:
+            return
+        marcacao = MedidorLatencia.nova_marcacao(prazo)
+        marcacao["horario"] = horario
+        self.alertas_disparados.add(horario)
+        self.armazenamento.adicionar_alerta(self.data_alertas, horario)
+        if self.ao_alerta:
+            self.ao_alerta(horario, marcacao)
+    
+    def proximo_alerta(self, agora=None):
+        """Retorna o próximo horário ("HH:MM") de hoje ainda não disparado, ou None"""
+        agora = agora or datetime.now()
+        proximo = self.rotina_do_dia(agora.date()).proximo(minutos_do_dia(agora), self.alertas_disparados)
+        return proximo.horario if proximo is not None else None
+    
+    def em_andamento(self, agora=None):
+        """Horários (com duração) acontecendo agora, pela árvore de intervalos da rotina do dia"""
+        agora = agora or datetime.now()
+        return self.rotina_do_dia(agora.date()).em_andamento(minutos_do_dia(agora))
+    
+    def sobreposicoes(self, minutos, duracao=0, ignorar=None, data=None):
+        """Horários da rotina do dia que se sobrepõem ao intervalo (ignorar = "HH:MM" do horário sendo editado)"""
+        return self.rotina_do_dia(data).sobrepostos(minutos, duracao, ignorar)
+
+
+def main():
+    """Roda só o agendador, imprimindo os alertas no terminal"""
+    parser = argparse.ArgumentParser(description="Agenda Pessoal - alertas no terminal, sem interface")
+    parser.add_argument("--api", type=int, nargs="?", const=PORTA_API, metavar="PORTA",
+                        help=f"serve a API HTTP local em 127.0.0.1 (porta padrão: {PORTA_API})")
+    args = parser.parse_args()
+    core = AgendaCore()
+    
+    def imprimir_alerta(horario, marcacao):
+        dados = core.rotina_do_dia()[horario]
+        print(f"[{datetime.now():%H:%M:%S}] ⏰ {horario} - {dados.titulo}", flush=True)
+        for tarefa in dados.tarefas:
+            print(f"    {tarefa}", flush=True)
+    
+    def imprimir_mudanca(resumo):
+        if resumo["alterados"]:
+            print(f"[{datetime.now():%H:%M:%S}] 📝 {resumo['arquivo']}: {', '.join(resumo['alterados'])}", flush=True)
+    
+    core.ao_alerta = imprimir_alerta
+    core.ao_mudanca_externa = imprimir_mudanca
+    core.iniciar_agendador()
+    core.iniciar_observador()
+    if args.api is not None and core.iniciar_api(args.api):
+        print(f"API local em http://{core.api.host}:{core.api.porta}/api/v1/tasks", flush=True)
+    proximo = core.proximo_alerta()
+    print(f"Agenda rodando sem interface. Próximo alerta: {proximo or '-'}", flush=True)
+    core.rodar_sem_interface()  # a thread principal é a dona do estado
+
+
+if __name__ == "__main__":
+    main()
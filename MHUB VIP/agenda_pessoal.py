@@ -5,19 +5,49 @@ Desenvolvido com interface moderna e sistema de alertas com senha
 Com suporte a System Tray e edição de tarefas
 """
 
+import time
+
+INICIO_PROCESSO = time.perf_counter()
+
+import sys
+
+if __name__ == "__main__" and not {"--alerta", "--janela-do-servico", "-h", "--help"} & set(sys.argv[1:]):
+    # Instância única por pasta de dados: se já há uma, só repassa o pedido a ela, antes de carregar qualquer interface
+    import instancia
+    codigo = instancia.repassar_a_instancia(sys.argv[1:])
+    if codigo is not None:
+        sys.exit(codigo)
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Só alertas, sem janela: decide antes de importar customtkinter, que nem chega a ser carregado
+    import sem_janela
+    sys.exit(sem_janela.main())
+
 import customtkinter as ctk
 from datetime import datetime, timedelta
 import threading
-import time
-import winsound
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, filedialog
+import argparse
 import json
-import os
-from PIL import Image, ImageDraw
-import pystray
-from pystray import MenuItem as item
-import copy
+
+import dependencias
+from notificacoes import criar_backend, BACKENDS_NOTIFICACAO
+from lista_virtual import ListaVirtual
+from eventos import LOTE_EVENTOS
+from rotina import Horario, para_minutos, formatar_minutos, minutos_do_dia, duracao_ate, MINUTOS_DIA
+from armazenamento import ARMAZENAMENTOS, ARQUIVO_ROTINA, pasta_aplicativo
+from estilos import (
+    fonte, cor_periodo, cor_categoria, FAMILIA_TEXTO, FAMILIA_MONO,
+    ESTILO_CARD, ESTILO_CARD_TAREFA, COR_FUNDO_LISTA
+)
+from importacao import FORMATOS_IMPORTACAO
+from agenda_core import (
+    AgendaCore, CORES_DISPONIVEIS, PERIODOS_DISPONIVEIS, ETAPAS_LATENCIA, ARQUIVO_VARIANTES, PORTA_API
+)
+from bandeja import iniciar_bandeja, ALERTA_TESTE
+from servico import ServidorServico, CoreRemoto, comando_app, abrir_processo, argumentos_repassados
+from instancia import adicionar_opcoes_repasse, TEMPO_SUBIDA_SERVICO
 
 # Configuração do tema
 ctk.set_appearance_mode("dark")
@@ -26,215 +56,47 @@ ctk.set_default_color_theme("blue")
 # Senha para fechar alertas
 SENHA_ALERTA = "25798463"
 
-# Arquivo de dados
-ARQUIVO_ROTINA = "rotina_personalizada.json"
-ARQUIVO_COMPRAS = "itens_compras.json"
-ARQUIVO_LISTA_COMPRAS = "lista_compras.json"
-ARQUIVO_ALERTAS = "alertas_disparados.json"
-ARQUIVO_CONCLUSOES = "tarefas_concluidas.json"
+# Alturas estimadas das linhas (rotina e compras) até o widget real ser medido
+ALTURA_CABECALHO_PERIODO = 45
+ALTURA_BASE_CARD = 140
+ALTURA_LINHA_TAREFA = 24
+ALTURA_CABECALHO_CATEGORIA = 55
+ALTURA_LINHA_COMPRA = 38
 
-# Rotina diária padrão (usada na primeira execução)
-ROTINA_PADRAO = {
-    "05:00": {
-        "titulo": "🌅 O START - Limpeza Interna e Externa",
-        "periodo": "MANHÃ",
-        "cor": "#FF6B35",
-        "tarefas": [
-            "💧 Boca: Tome 1 Litro de Água + 1 comprimido de Vitamina C (1g)",
-            "🧊 Rosto: Lave com água fria",
-            "❄️ Técnica do Gelo: Mergulhe o rosto na água gelada ou passe gelo enrolado no pano"
-        ]
-    },
-    "07:00": {
-        "titulo": "☕ CAFÉ DA MANHÃ - Energia",
-        "periodo": "MANHÃ",
-        "cor": "#FF6B35",
-        "tarefas": [
-            "🍞 1 Pão (Francês ou 2 fatias)",
-            "🥜 30g Pasta de Amendoim (1 colher de sopa cheia)",
-            "🥚 4 Claras de Ovo (Cozidas/Mexidas) - Descarte as gemas"
-        ]
-    },
-    "08:00": {
-        "titulo": "💪 PRÉ-TREINO VASCULAR - ⛔ INÍCIO DO JEJUM DE CIGARRO",
-        "periodo": "MANHÃ",
-        "cor": "#E63946",
-        "tarefas": [
-            "🥤 O Coquetel: 200ml de Água",
-            "🍠 1 Colher de Sopa de Beterraba em Pó",
-            "🍋 Suco de Meio Limão",
-            "💊 10g Creatina + 5g BCAA",
-            "🏋️ Exercícios de Kegel: 3 séries de 15 contrações"
-        ]
-    },
-    "09:00": {
-        "titulo": "🛡️ BLINDAGEM E TREINO",
-        "periodo": "PREPARAÇÃO",
-        "cor": "#F77F00",
-        "tarefas": [
-            "☀️ Protetor Solar Facial (Toque Seco/Oil Free)",
-            "🔴 ATENÇÃO: Camada generosa na NUCA e pescoço",
-            "🏋️ Treino Pesado - Hipertrofia (09:00 às 10:00)",
-            "🧺 Use toalha própria no banco"
-        ]
-    },
-    "10:15": {
-        "titulo": "🚿 BANHO TÁTICO - Pós-Treino",
-        "periodo": "PÓS-TREINO",
-        "cor": "#4ECDC4",
-        "tarefas": [
-            "🌡️ Temperatura: Morna para Fria",
-            "🧴 Cabelo: Shampoo Jaborandi (ou Clear se caspa)",
-            "🧼 Costas/Peito: Sabonete de Enxofre (Granado)",
-            "🧴 Rosto/Nuca: Sabonete de Glicerina/Neutro",
-            "💧 Pós-Banho: Hidratante Facial em Gel (Hydro Boost)"
-        ]
-    },
-    "10:30": {
-        "titulo": "🍗 REFEIÇÃO PÓS-TREINO - A Maior do Dia",
-        "periodo": "PÓS-TREINO",
-        "cor": "#4ECDC4",
-        "tarefas": [
-            "🍗 200g de Frango ou Peixe",
-            "🍠 300g de Batata-Doce (Cozida/Assada)",
-            "⚠️ Continue SEM FUMAR - corpo absorvendo nutrientes"
-        ]
-    },
-    "11:00": {
-        "titulo": "🚬 FIM DO JEJUM DE CIGARRO",
-        "periodo": "TRANSIÇÃO",
-        "cor": "#6B705C",
-        "tarefas": [
-            "✅ Liberado (mas evite se conseguir)"
-        ]
-    },
-    "13:30": {
-        "titulo": "☀️ ALMOÇO ECONÔMICO",
-        "periodo": "TARDE",
-        "cor": "#FFD166",
-        "tarefas": [
-            "🍖 150g de Proteína (Moela, Fígado, PTS ou Frango)",
-            "🍠 250g de Batata-Doce (ou Arroz e Feijão)",
-            "🥦 Vegetais: Brócolis ou Repolho (regula hormônios)"
-        ]
-    },
-    "16:30": {
-        "titulo": "🥚 LANCHE DA TARDE - Saciedade",
-        "periodo": "TARDE",
-        "cor": "#FFD166",
-        "tarefas": [
-            "🥚 5 Ovos INTEIROS (Cozidos)",
-            "💡 As gemas e proteína te seguram sem fome até a noite"
-        ]
-    },
-    "20:00": {
-        "titulo": "🌙 JANTAR - Seca Barriga",
-        "periodo": "NOITE",
-        "cor": "#7B2CBF",
-        "tarefas": [
-            "🥚 5 Claras de Ovo OU 150g de Frango/Peixe",
-            "🥗 Salada de Folhas à vontade + Fio de Azeite",
-            "⛔ ZERO carboidrato pesado aqui",
-            "💊 Suplemento: 1 Cápsula de NAC (600mg)"
-        ]
-    },
-    "21:00": {
-        "titulo": "🌙 RITUAL FINAL - Recuperação",
-        "periodo": "NOITE",
-        "cor": "#7B2CBF",
-        "tarefas": [
-            "🧴 Lave o rosto (Sabonete Glicerina)",
-            "💈 Aplique Minoxidil na falha da bochecha e entradas",
-            "💧 Passe Hidratante nas áreas sem Minoxidil",
-            "💊 Tome ZMA + Melatonina",
-            "🌙 Apague as luzes - O músculo cresce agora!"
-        ]
-    }
-}
+TAB_ESTATISTICAS = "📊 Estatísticas"
+PERIODOS_ESTATISTICAS = {"30 dias": 30, "90 dias": 90, "1 ano": 365, "Tudo": None}
 
-# Lista de compras padrão
-LISTA_COMPRAS_PADRAO = {
-    "🥬 MERCADO / FEIRA": [
-        "Ovos (Mínimo 5 dúzias/mês - Base da dieta)",
-        "Peito de Frango (Pós-treino)",
-        "Proteína Barata (Moela, Fígado ou PTS/Soja - Almoço)",
-        "Arroz Branco (Pós-treino - energia rápida)",
-        "Batata-Doce (Almoço - energia lenta)",
-        "Pão (Francês ou Forma)",
-        "Pasta de Amendoim Integral (1kg)",
-        "Gelatina Incolor e Sem Sabor (Caixinhas)",
-        "Beterraba em Pó (Ou natural)",
-        "Limão (Saco grande)",
-        "Vegetais: Repolho ou Brócolis (Testosterona)",
-        "Azeite de Oliva (Extra virgem)"
-    ],
-    "💊 SUPLEMENTOS (O Kit)": [
-        "NAC 600mg (Limpeza Pulmão/Pele)",
-        "Vitamina C 1.000mg (Pele/Imunidade - Frasco 120 caps)",
-        "ZMA Ultra (Testo/Sono - Frasco concentrado)",
-        "Ômega 3 (Ereção/Coração - Frasco concentrado)",
-        "Creatina (Monohidratada)",
-        "Melatonina (A barata de R$ 20,00 - Opcional se o ZMA não bastar)"
-    ],
-    "🚿 HIGIENE & BANHO": [
-        "Sabonete de Enxofre (Granado Amarelo - SÓ COSTAS/PEITO)",
-        "Sabonete de Glicerina (Granado/Phebo - ROSTO E NUCA)",
-        "Shampoo Jaborandi (Bio Extratus - Dia a dia)",
-        "Shampoo Clear (Uso 1x semana)",
-        "Condicionador Floratrix (Só pontas)",
-        "Yamasterol Amarelo (Pré-Poo)"
-    ],
-    "🧴 ESTÉTICA & BANCADA": [
-        "Tônico de Jaborandi (Bio Extratus)",
-        "Sérum Vitamina C (Rosto manhã)",
-        "Hidratante Facial em Gel (Hydro Boost ou similar)",
-        "Protetor Solar Toque Seco (Rosto e Nuca)",
-        "Minoxidil (Barba/Cabelo)"
-    ]
-}
+# Log do tempo de inicialização (--medir-inicio)
+ARQUIVO_TEMPOS_INICIO = "tempos_inicializacao.log"
+ATRASO_AQUECIMENTO_MS = 1500  # espera a janela aparecer antes de aquecer as dependências
+INTERVALO_EVENTOS_MS = 20  # com eventos chegando, o barramento é olhado a cada 20 ms
+INTERVALO_EVENTOS_OCIOSO_MS = 250  # sem eventos, o intervalo dobra até este teto
 
-# Cores disponíveis para períodos
-CORES_DISPONIVEIS = {
-    "🟠 Laranja": "#FF6B35",
-    "🔴 Vermelho": "#E63946",
-    "🟡 Amarelo": "#FFD166",
-    "🟢 Verde": "#4ECDC4",
-    "🟣 Roxo": "#7B2CBF",
-    "⚫ Cinza": "#6B705C",
-    "🔵 Azul": "#00d4ff"
-}
 
-PERIODOS_DISPONIVEIS = ["MANHÃ", "PREPARAÇÃO", "TREINO", "PÓS-TREINO", "TRANSIÇÃO", "TARDE", "NOITE"]
+def ler_intervalo(entry_horario, entry_fim):
+    """(minutos, duracao) dos campos de horário e fim ("" = sem duração); ValueError se inválidos"""
+    minutos = para_minutos(entry_horario.get().strip())
+    fim = entry_fim.get().strip()
+    return minutos, duracao_ate(minutos, fim) if fim else 0
 
 
-def criar_icone_tray():
-    """Cria um ícone para o system tray"""
-    img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    
-    draw.rounded_rectangle([4, 8, 60, 60], radius=8, fill='#00d4ff')
-    draw.rounded_rectangle([4, 8, 60, 22], radius=8, fill='#E63946')
-    draw.rectangle([4, 15, 60, 22], fill='#E63946')
-    draw.ellipse([12, 4, 20, 12], fill='#333')
-    draw.ellipse([44, 4, 52, 12], fill='#333')
-    draw.line([15, 30, 50, 30], fill='white', width=2)
-    draw.line([15, 40, 50, 40], fill='white', width=2)
-    draw.line([15, 50, 50, 50], fill='white', width=2)
-    draw.line([20, 35, 28, 43], fill='#00ff88', width=3)
-    draw.line([28, 43, 45, 28], fill='#00ff88', width=3)
-    
-    return img
+def texto_sobreposicoes(sobrepostos):
+    """Aviso para o rodapé dos modais, ou "" se não há sobreposição"""
+    if not sobrepostos:
+        return ""
+    return "⚠️ Sobrepõe: " + ", ".join(f"{horario.intervalo} {horario.titulo}" for horario in sobrepostos)
 
 
 class ModalEditarTarefa(ctk.CTkToplevel):
     """Modal para editar uma tarefa"""
     
-    def __init__(self, parent, horario, dados, callback_salvar):
+    def __init__(self, parent, horario, dados, callback_salvar, consultar_sobreposicoes=None):
         super().__init__(parent)
         
         self.horario_original = horario
-        self.dados = copy.deepcopy(dados)
+        self.dados = dados  # Horario; só é lido, o salvar monta um novo
         self.callback_salvar = callback_salvar
+        self.consultar_sobreposicoes = consultar_sobreposicoes  # (minutos, duracao, ignorar) -> [Horario]
         self.tarefas_entries = []
         
         self.title("✏️ Editar Tarefa")
@@ -262,7 +124,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             scroll,
             text="✏️ EDITAR TAREFA",
-            font=ctk.CTkFont(family="Segoe UI", size=24, weight="bold"),
+            font=fonte(24, "bold", FAMILIA_TEXTO),
             text_color="#00d4ff"
         ).pack(pady=(0, 20))
         
@@ -277,7 +139,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             horario_frame,
             text="🕐 Horário:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
@@ -285,12 +147,44 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             horario_frame,
             width=100,
             height=35,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             placeholder_text="HH:MM"
         )
         self.entry_horario.pack(side="left", padx=10)
         self.entry_horario.insert(0, self.horario_original)
         
+        ctk.CTkLabel(
+            horario_frame,
+            text="⏱️ Até:",
+            font=fonte(14, "bold"),
+            text_color="white"
+        ).pack(side="left", padx=(10, 0))
+        
+        self.entry_fim = ctk.CTkEntry(
+            horario_frame,
+            width=100,
+            height=35,
+            font=fonte(14),
+            placeholder_text="HH:MM"
+        )
+        self.entry_fim.pack(side="left", padx=10)
+        if self.dados.duracao:
+            self.entry_fim.insert(0, formatar_minutos(self.dados.fim % MINUTOS_DIA))
+        
+        self.label_sobreposicao = ctk.CTkLabel(
+            config_frame,
+            text="",
+            font=fonte(12),
+            text_color="#ffa500",
+            anchor="w",
+            justify="left",
+            wraplength=600
+        )
+        self.label_sobreposicao.pack(fill="x", padx=15)
+        self.entry_horario.bind("<KeyRelease>", self.verificar_sobreposicao)
+        self.entry_fim.bind("<KeyRelease>", self.verificar_sobreposicao)
+        self.verificar_sobreposicao()
+        
         # Título
         titulo_frame = ctk.CTkFrame(config_frame, fg_color="transparent")
         titulo_frame.pack(fill="x", padx=15, pady=10)
@@ -298,17 +192,17 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             titulo_frame,
             text="📝 Título:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(anchor="w")
         
         self.entry_titulo = ctk.CTkEntry(
             titulo_frame,
             height=35,
-            font=ctk.CTkFont(size=14)
+            font=fonte(14)
         )
         self.entry_titulo.pack(fill="x", pady=5)
-        self.entry_titulo.insert(0, self.dados.get("titulo", ""))
+        self.entry_titulo.insert(0, self.dados.titulo)
         
         # Período
         periodo_frame = ctk.CTkFrame(config_frame, fg_color="transparent")
@@ -317,7 +211,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             periodo_frame,
             text="📅 Período:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
@@ -326,10 +220,10 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             values=PERIODOS_DISPONIVEIS,
             width=150,
             height=35,
-            font=ctk.CTkFont(size=12)
+            font=fonte(12)
         )
         self.combo_periodo.pack(side="left", padx=10)
-        self.combo_periodo.set(self.dados.get("periodo", "MANHÃ"))
+        self.combo_periodo.set(self.dados.periodo)
         
         # Cor
         cor_frame = ctk.CTkFrame(config_frame, fg_color="transparent")
@@ -338,11 +232,11 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             cor_frame,
             text="🎨 Cor:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
-        cor_atual = self.dados.get("cor", "#FF6B35")
+        cor_atual = self.dados.cor
         cor_nome = next((k for k, v in CORES_DISPONIVEIS.items() if v == cor_atual), "🟠 Laranja")
         
         self.combo_cor = ctk.CTkComboBox(
@@ -350,7 +244,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             values=list(CORES_DISPONIVEIS.keys()),
             width=150,
             height=35,
-            font=ctk.CTkFont(size=12)
+            font=fonte(12)
         )
         self.combo_cor.pack(side="left", padx=10)
         self.combo_cor.set(cor_nome)
@@ -362,7 +256,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             tarefas_label_frame,
             text="📋 Itens da Tarefa:",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=fonte(16, "bold"),
             text_color="#00d4ff"
         ).pack(side="left")
         
@@ -372,7 +266,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             command=self.adicionar_item,
             width=130,
             height=30,
-            font=ctk.CTkFont(size=12),
+            font=fonte(12),
             fg_color="#00ff88",
             text_color="black",
             hover_color="#00cc6a"
@@ -383,7 +277,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         self.tarefas_container.pack(fill="x", pady=10)
         
         # Carregar tarefas existentes
-        for tarefa in self.dados.get("tarefas", []):
+        for tarefa in self.dados.tarefas:
             self.adicionar_item(tarefa)
         
         # Botões de ação
@@ -396,7 +290,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             command=self.destroy,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             fg_color="#666",
             hover_color="#888"
         ).pack(side="left", padx=5)
@@ -407,7 +301,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             command=self.excluir_tarefa,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             fg_color="#E63946",
             hover_color="#ff6b6b"
         ).pack(side="left", padx=5)
@@ -418,7 +312,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             command=self.salvar,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             fg_color="#00d4ff",
             hover_color="#0099cc"
         ).pack(side="right", padx=5)
@@ -431,7 +325,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
         entry = ctk.CTkEntry(
             item_frame,
             height=35,
-            font=ctk.CTkFont(size=13),
+            font=fonte(13),
             placeholder_text="Digite o item..."
         )
         entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
@@ -443,7 +337,7 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             text="🗑️",
             width=35,
             height=35,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             fg_color="#E63946",
             hover_color="#ff6b6b",
             command=lambda f=item_frame, e=entry: self.remover_item(f, e)
@@ -458,13 +352,23 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             self.tarefas_entries.remove(entry)
         frame.destroy()
     
+    def verificar_sobreposicao(self, event=None):
+        """Avisa, enquanto digita, com quais horários do dia o intervalo se sobrepõe"""
+        if self.consultar_sobreposicoes is None:
+            return
+        try:
+            minutos, duracao = ler_intervalo(self.entry_horario, self.entry_fim)
+        except ValueError:
+            self.label_sobreposicao.configure(text="")
+            return
+        sobrepostos = self.consultar_sobreposicoes(minutos, duracao, self.horario_original)
+        self.label_sobreposicao.configure(text=texto_sobreposicoes(sobrepostos))
+    
     def salvar(self):
         """Salva as alterações"""
-        novo_horario = self.entry_horario.get().strip()
-        
-        # Validar horário
+        # Validar horário (e normalizar: "7:05" -> "07:05")
         try:
-            datetime.strptime(novo_horario, "%H:%M")
+            minutos, duracao = ler_intervalo(self.entry_horario, self.entry_fim)
         except ValueError:
             messagebox.showerror("Erro", "Horário inválido! Use o formato HH:MM")
             return
@@ -480,15 +384,18 @@ class ModalEditarTarefa(ctk.CTkToplevel):
             messagebox.showerror("Erro", "Adicione pelo menos um item à tarefa!")
             return
         
-        # Montar dados
-        novos_dados = {
-            "titulo": self.entry_titulo.get().strip() or "Tarefa sem título",
-            "periodo": self.combo_periodo.get(),
-            "cor": CORES_DISPONIVEIS.get(self.combo_cor.get(), "#FF6B35"),
-            "tarefas": tarefas
-        }
+        # Montar dados (campos extras do horário original são mantidos)
+        novos_dados = Horario(
+            minutos,
+            self.entry_titulo.get().strip() or "Tarefa sem título",
+            self.combo_periodo.get(),
+            CORES_DISPONIVEIS.get(self.combo_cor.get(), "#FF6B35"),
+            tarefas,
+            dict(self.dados.extras),
+            duracao
+        )
         
-        self.callback_salvar(self.horario_original, novo_horario, novos_dados)
+        self.callback_salvar(self.horario_original, formatar_minutos(minutos), novos_dados)
         self.destroy()
     
     def excluir_tarefa(self):
@@ -501,10 +408,11 @@ class ModalEditarTarefa(ctk.CTkToplevel):
 class ModalNovaTarefa(ctk.CTkToplevel):
     """Modal para criar nova tarefa"""
     
-    def __init__(self, parent, callback_salvar):
+    def __init__(self, parent, callback_salvar, consultar_sobreposicoes=None):
         super().__init__(parent)
         
         self.callback_salvar = callback_salvar
+        self.consultar_sobreposicoes = consultar_sobreposicoes
         self.tarefas_entries = []
         
         self.title("➕ Nova Tarefa")
@@ -530,7 +438,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             scroll,
             text="➕ NOVA TAREFA",
-            font=ctk.CTkFont(family="Segoe UI", size=24, weight="bold"),
+            font=fonte(24, "bold", FAMILIA_TEXTO),
             text_color="#00ff88"
         ).pack(pady=(0, 20))
         
@@ -545,7 +453,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             horario_frame,
             text="🕐 Horário:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
@@ -553,11 +461,40 @@ class ModalNovaTarefa(ctk.CTkToplevel):
             horario_frame,
             width=100,
             height=35,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             placeholder_text="HH:MM"
         )
         self.entry_horario.pack(side="left", padx=10)
         
+        ctk.CTkLabel(
+            horario_frame,
+            text="⏱️ Até:",
+            font=fonte(14, "bold"),
+            text_color="white"
+        ).pack(side="left", padx=(10, 0))
+        
+        self.entry_fim = ctk.CTkEntry(
+            horario_frame,
+            width=100,
+            height=35,
+            font=fonte(14),
+            placeholder_text="HH:MM"
+        )
+        self.entry_fim.pack(side="left", padx=10)
+        
+        self.label_sobreposicao = ctk.CTkLabel(
+            config_frame,
+            text="",
+            font=fonte(12),
+            text_color="#ffa500",
+            anchor="w",
+            justify="left",
+            wraplength=600
+        )
+        self.label_sobreposicao.pack(fill="x", padx=15)
+        self.entry_horario.bind("<KeyRelease>", self.verificar_sobreposicao)
+        self.entry_fim.bind("<KeyRelease>", self.verificar_sobreposicao)
+        
         # Título
         titulo_frame = ctk.CTkFrame(config_frame, fg_color="transparent")
         titulo_frame.pack(fill="x", padx=15, pady=10)
@@ -565,14 +502,14 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             titulo_frame,
             text="📝 Título:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(anchor="w")
         
         self.entry_titulo = ctk.CTkEntry(
             titulo_frame,
             height=35,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             placeholder_text="Ex: 🍳 Café da Manhã"
         )
         self.entry_titulo.pack(fill="x", pady=5)
@@ -584,7 +521,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             periodo_frame,
             text="📅 Período:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
@@ -604,7 +541,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             cor_frame,
             text="🎨 Cor:",
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             text_color="white"
         ).pack(side="left")
         
@@ -624,7 +561,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         ctk.CTkLabel(
             tarefas_label_frame,
             text="📋 Itens da Tarefa:",
-            font=ctk.CTkFont(size=16, weight="bold"),
+            font=fonte(16, "bold"),
             text_color="#00d4ff"
         ).pack(side="left")
         
@@ -665,7 +602,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
             command=self.salvar,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             fg_color="#00ff88",
             text_color="black",
             hover_color="#00cc6a"
@@ -679,7 +616,7 @@ class ModalNovaTarefa(ctk.CTkToplevel):
         entry = ctk.CTkEntry(
             item_frame,
             height=35,
-            font=ctk.CTkFont(size=13),
+            font=fonte(13),
             placeholder_text="Digite o item..."
         )
         entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
@@ -705,12 +642,22 @@ class ModalNovaTarefa(ctk.CTkToplevel):
             self.tarefas_entries.remove(entry)
         frame.destroy()
     
+    def verificar_sobreposicao(self, event=None):
+        """Avisa, enquanto digita, com quais horários do dia o intervalo se sobrepõe"""
+        if self.consultar_sobreposicoes is None:
+            return
+        try:
+            minutos, duracao = ler_intervalo(self.entry_horario, self.entry_fim)
+        except ValueError:
+            self.label_sobreposicao.configure(text="")
+            return
+        sobrepostos = self.consultar_sobreposicoes(minutos, duracao, None)
+        self.label_sobreposicao.configure(text=texto_sobreposicoes(sobrepostos))
+    
     def salvar(self):
         """Salva a nova tarefa"""
-        horario = self.entry_horario.get().strip()
-        
         try:
-            datetime.strptime(horario, "%H:%M")
+            minutos, duracao = ler_intervalo(self.entry_horario, self.entry_fim)
         except ValueError:
             messagebox.showerror("Erro", "Horário inválido! Use o formato HH:MM")
             return
@@ -725,23 +672,32 @@ class ModalNovaTarefa(ctk.CTkToplevel):
             messagebox.showerror("Erro", "Adicione pelo menos um item à tarefa!")
             return
         
-        dados = {
-            "titulo": self.entry_titulo.get().strip() or "Nova Tarefa",
-            "periodo": self.combo_periodo.get(),
-            "cor": CORES_DISPONIVEIS.get(self.combo_cor.get(), "#FF6B35"),
-            "tarefas": tarefas
-        }
+        dados = Horario(
+            minutos,
+            self.entry_titulo.get().strip() or "Nova Tarefa",
+            self.combo_periodo.get(),
+            CORES_DISPONIVEIS.get(self.combo_cor.get(), "#FF6B35"),
+            tarefas,
+            duracao=duracao
+        )
         
-        self.callback_salvar(horario, dados)
+        self.callback_salvar(dados.horario, dados)
         self.destroy()
 
 
 class AlertaComSenha(ctk.CTkToplevel):
     """Janela de alerta que só fecha com a senha correta"""
     
-    def __init__(self, parent, titulo, tarefas, cor):
+    def __init__(self, parent, titulo, tarefas, cor, medidor=None, marcacao=None, ao_confirmar=None):
         super().__init__(parent)
         
+        # Com medidor, cada etapa vira medidor.marcar(marcacao, etapa), mesmo sem marcação (None)
+        self.medidor = medidor
+        self.marcacao = marcacao
+        self.notificador = parent.notificador
+        # ao_confirmar(marcacao) quando a senha é digitada; padrão: registrar no núcleo da janela principal
+        self.ao_confirmar = ao_confirmar or parent.core.confirmar_alerta
+        
         self.title("⚠️ HORA DA TAREFA!")
         self.geometry("600x500")
         self.configure(fg_color="#1a1a2e")
@@ -763,21 +719,21 @@ class AlertaComSenha(ctk.CTkToplevel):
         ctk.CTkLabel(
             header_frame,
             text="⏰ ALERTA DE TAREFA!",
-            font=ctk.CTkFont(family="Segoe UI", size=24, weight="bold"),
+            font=fonte(24, "bold", FAMILIA_TEXTO),
             text_color="white"
         ).pack(pady=15)
         
         ctk.CTkLabel(
             main_frame,
             text=f"🕐 {datetime.now().strftime('%H:%M')}",
-            font=ctk.CTkFont(family="Segoe UI", size=20),
+            font=fonte(20, "normal", FAMILIA_TEXTO),
             text_color="#00d4ff"
         ).pack()
         
         ctk.CTkLabel(
             main_frame,
             text=titulo,
-            font=ctk.CTkFont(family="Segoe UI", size=18, weight="bold"),
+            font=fonte(18, "bold", FAMILIA_TEXTO),
             text_color="white",
             wraplength=550
         ).pack(pady=15)
@@ -789,7 +745,7 @@ class AlertaComSenha(ctk.CTkToplevel):
             ctk.CTkLabel(
                 tarefas_frame,
                 text=tarefa,
-                font=ctk.CTkFont(family="Segoe UI", size=14),
+                font=fonte(14, "normal", FAMILIA_TEXTO),
                 text_color="#e0e0e0",
                 anchor="w",
                 wraplength=520
@@ -801,7 +757,7 @@ class AlertaComSenha(ctk.CTkToplevel):
         ctk.CTkLabel(
             senha_frame,
             text="🔐 Digite a senha para fechar:",
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             text_color="#888"
         ).pack(pady=(15, 5))
         
@@ -811,7 +767,7 @@ class AlertaComSenha(ctk.CTkToplevel):
             show="*",
             width=200,
             height=40,
-            font=ctk.CTkFont(size=16),
+            font=fonte(16),
             justify="center"
         )
         self.entrada_senha.pack(pady=10)
@@ -820,7 +776,7 @@ class AlertaComSenha(ctk.CTkToplevel):
         self.label_erro = ctk.CTkLabel(
             senha_frame,
             text="",
-            font=ctk.CTkFont(size=12),
+            font=fonte(12),
             text_color="#ff4444"
         )
         self.label_erro.pack()
@@ -831,46 +787,26 @@ class AlertaComSenha(ctk.CTkToplevel):
             command=self.verificar_senha,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             fg_color=cor,
             hover_color="#333"
         ).pack(pady=(5, 15))
         
         self.after(100, lambda: self.entrada_senha.focus_set())
         
+        if self.medidor:
+            self.update_idletasks()
+            self.medidor.marcar(self.marcacao, "janela")
+        
         self.som_ativo = True
         self.repetir_som()
     
     def tocar_som(self):
-        """Toca o arquivo de áudio hey_listen.mp3"""
-        def _tocar():
-            try:
-                import pygame
-                
-                # Inicializar pygame mixer se necessário
-                if not pygame.mixer.get_init():
-                    pygame.mixer.init()
-                
-                # Caminho do arquivo de áudio
-                caminho_audio = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hey_listen.mp3")
-                
-                if os.path.exists(caminho_audio):
-                    pygame.mixer.music.load(caminho_audio)
-                    pygame.mixer.music.set_volume(1.0)  # Volume máximo
-                    pygame.mixer.music.play()
-                else:
-                    print(f"Arquivo não encontrado: {caminho_audio}")
-                    # Fallback: beep simples
-                    winsound.Beep(800, 500)
-                    
-            except Exception as e:
-                print(f"Erro ao tocar áudio: {e}")
-                try:
-                    winsound.Beep(800, 500)
-                except:
-                    pass
-        
-        threading.Thread(target=_tocar, daemon=True).start()
+        """Pede o som de alerta ao backend de notificação"""
+        ao_tocar = None
+        if self.medidor:
+            ao_tocar = lambda: self.medidor.marcar(self.marcacao, "som")
+        self.notificador.tocar_som(ao_tocar)
     
     def repetir_som(self):
         """Repete o som enquanto o alerta estiver aberto"""
@@ -881,6 +817,7 @@ class AlertaComSenha(ctk.CTkToplevel):
     def verificar_senha(self):
         if self.entrada_senha.get() == SENHA_ALERTA:
             self.som_ativo = False
+            self.ao_confirmar(self.marcacao)
             self.destroy()
         else:
             self.label_erro.configure(text="❌ Senha incorreta!")
@@ -892,10 +829,298 @@ class AlertaComSenha(ctk.CTkToplevel):
         self.tocar_som()
 
 
+class CabecalhoPeriodo(ctk.CTkFrame):
+    """Faixa colorida que separa os períodos da rotina"""
+    
+    def __init__(self, parent):
+        super().__init__(parent, corner_radius=10)
+        self.periodo = None
+        
+        self.label = ctk.CTkLabel(
+            self,
+            text="",
+            font=fonte(16, "bold", FAMILIA_TEXTO),
+            text_color="white"
+        )
+        self.label.pack(pady=8)
+    
+    def atualizar(self, periodo):
+        if periodo == self.periodo:
+            return
+        self.configure(fg_color=cor_periodo(periodo))
+        self.label.configure(text=f"  {periodo}  ")
+        self.periodo = periodo
+
+
+class CardTarefa(ctk.CTkFrame):
+    """Card de um horário da rotina, reciclável; atualizar() só reconfigura o que mudou"""
+    
+    def __init__(self, parent, app):
+        super().__init__(parent, **ESTILO_CARD_TAREFA)
+        
+        self.horario = None
+        self.estado = None
+        self.labels_tarefas = []
+        
+        # Header do card
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=15, pady=(15, 10))
+        
+        # Checkbox de conclusão
+        self.var_conclusao = ctk.BooleanVar(value=False)
+        self.check_conclusao = ctk.CTkCheckBox(
+            header,
+            text="",
+            variable=self.var_conclusao,
+            command=lambda: app.toggle_conclusao(self.horario, self.var_conclusao),
+            width=30,
+            checkbox_width=24,
+            checkbox_height=24,
+            fg_color="#00ff88"
+        )
+        self.check_conclusao.pack(side="left")
+        
+        # Horário
+        self.label_horario = ctk.CTkLabel(
+            header,
+            text="",
+            font=fonte(18, "bold", FAMILIA_MONO)
+        )
+        self.label_horario.pack(side="left", padx=10)
+        
+        # Status
+        self.label_status = ctk.CTkLabel(
+            header,
+            text="",
+            font=fonte(12, "bold")
+        )
+        self.label_status.pack(side="right")
+        
+        # Botão editar
+        self.btn_editar = ctk.CTkButton(
+            header,
+            text="✏️ Editar",
+            command=lambda: app.abrir_modal_editar(self.horario),
+            width=80,
+            height=28,
+            font=fonte(11),
+            fg_color="#333"
+        )
+        self.btn_editar.pack(side="right", padx=10)
+        
+        # Título
+        self.label_titulo = ctk.CTkLabel(
+            self,
+            text="",
+            font=fonte(14, "bold", FAMILIA_TEXTO),
+            anchor="w"
+        )
+        self.label_titulo.pack(fill="x", padx=15, pady=(0, 10))
+        
+        # Botão testar alerta (as linhas de tarefa entram antes dele)
+        self.btn_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.btn_frame.pack(fill="x", padx=15, pady=10)
+        
+        self.btn_testar = ctk.CTkButton(
+            self.btn_frame,
+            text="🔔 Testar Alerta",
+            command=lambda: app.disparar_alerta_manual(self.horario),
+            width=120,
+            height=28,
+            font=fonte(11),
+            fg_color="#333"
+        )
+        self.btn_testar.pack(side="right")
+    
+    @staticmethod
+    def status(concluida, atrasado, andamento=False):
+        if concluida:
+            return "✅ CONCLUÍDO", "#00ff88"
+        if andamento:
+            return "▶️ EM ANDAMENTO", "#00d4ff"
+        if atrasado:
+            return "⚠️ ATRASADO", "#E63946"
+        return "⏳ Pendente", "#ffa500"
+    
+    def atualizar(self, horario, dados, concluida, atrasado, andamento=False):
+        """Aplica o estado do horário; retorna False se nada mudou"""
+        tarefas = tuple(dados.tarefas)
+        situacao = (concluida, atrasado, andamento)
+        estado = (horario, dados.intervalo, dados.titulo, dados.cor, tarefas, situacao)
+        if estado == self.estado:
+            return False
+        horario_ant, intervalo_ant, titulo_ant, cor_ant, tarefas_ant, situacao_ant = self.estado or (None,) * 6
+        concluida_ant = situacao_ant[0] if situacao_ant else None
+        cor = dados.cor
+        
+        self.horario = horario
+        if dados.intervalo != intervalo_ant:
+            self.label_horario.configure(text=f"🕐 {dados.intervalo}")
+        
+        # Cores do card
+        if (cor, concluida) != (cor_ant, concluida_ant):
+            self.configure(
+                fg_color="#1a1a2e" if not concluida else "#0d2818",
+                border_color=cor if not concluida else "#00ff88"
+            )
+            self.check_conclusao.configure(border_color=cor)
+            self.label_horario.configure(text_color=cor if not concluida else "#00ff88")
+            self.btn_editar.configure(hover_color=cor)
+            self.btn_testar.configure(hover_color=cor)
+            self.label_titulo.configure(text_color="white" if not concluida else "#00ff88")
+            for label in self.labels_tarefas:
+                label.configure(text_color="#ccc" if not concluida else "#88cc88")
+        
+        # Status e checkbox
+        if situacao != situacao_ant:
+            status_text, status_color = self.status(concluida, atrasado, andamento)
+            self.label_status.configure(text=status_text, text_color=status_color)
+            if self.var_conclusao.get() != concluida:
+                self.var_conclusao.set(concluida)
+        
+        if dados.titulo != titulo_ant:
+            self.label_titulo.configure(text=dados.titulo)
+        
+        # Linhas de tarefa: reaproveita os labels existentes
+        if tarefas != tarefas_ant:
+            texto_cor = "#ccc" if not concluida else "#88cc88"
+            for i, tarefa in enumerate(tarefas):
+                if i < len(self.labels_tarefas):
+                    self.labels_tarefas[i].configure(text=f"  {tarefa}")
+                    continue
+                label = ctk.CTkLabel(
+                    self,
+                    text=f"  {tarefa}",
+                    font=fonte(12, "normal", FAMILIA_TEXTO),
+                    text_color=texto_cor,
+                    anchor="w",
+                    wraplength=1000
+                )
+                label.pack(fill="x", padx=15, pady=2, before=self.btn_frame)
+                self.labels_tarefas.append(label)
+            for label in self.labels_tarefas[len(tarefas):]:
+                label.destroy()
+            del self.labels_tarefas[len(tarefas):]
+        
+        self.estado = estado
+        return True
+
+
+class CabecalhoCategoria(ctk.CTkFrame):
+    """Faixa de uma categoria de compras com recolher, adicionar item e remover"""
+    
+    def __init__(self, parent, app):
+        super().__init__(parent, corner_radius=8)
+        self.categoria = None
+        self.estado = None
+        
+        self.btn_recolher = ctk.CTkButton(
+            self,
+            text="▾",
+            width=30,
+            height=35,
+            font=fonte(16, "bold"),
+            fg_color="transparent",
+            hover_color="#333",
+            command=lambda: app.alternar_categoria(self.categoria)
+        )
+        self.btn_recolher.pack(side="left", padx=(5, 0), pady=5)
+        
+        self.label = ctk.CTkLabel(
+            self,
+            text="",
+            font=fonte(18, "bold", FAMILIA_TEXTO),
+            text_color="white"
+        )
+        self.label.pack(side="left", padx=10, pady=10)
+        
+        # Botão remover categoria
+        ctk.CTkButton(
+            self,
+            text="🗑️",
+            width=35,
+            height=35,
+            fg_color="#aa0000",
+            hover_color="#cc0000",
+            command=lambda: app.remover_categoria(self.categoria)
+        ).pack(side="right", padx=5, pady=5)
+        
+        # Botão adicionar item
+        ctk.CTkButton(
+            self,
+            text="➕ Item",
+            width=80,
+            height=35,
+            fg_color="#00aa00",
+            hover_color="#00cc00",
+            command=lambda: app.adicionar_item_lista(self.categoria)
+        ).pack(side="right", padx=5, pady=5)
+    
+    def atualizar(self, categoria, marcados, total, recolhida):
+        estado = (categoria, marcados, total, recolhida)
+        if estado == self.estado:
+            return
+        if categoria != self.categoria:
+            self.configure(fg_color=cor_categoria(categoria))
+            self.categoria = categoria
+        self.label.configure(text=f"{categoria}  ({marcados}/{total})")
+        self.btn_recolher.configure(text="▸" if recolhida else "▾")
+        self.estado = estado
+
+
+class LinhaItemCompra(ctk.CTkFrame):
+    """Um item da lista de compras, reciclável; atualizar() só reconfigura o que mudou"""
+    
+    def __init__(self, parent, app):
+        super().__init__(parent, fg_color="#1a1a2e", corner_radius=0)
+        self.categoria = None
+        self.item = None
+        self.estado = None
+        
+        self.var_marcado = ctk.BooleanVar(value=False)
+        self.checkbox = ctk.CTkCheckBox(
+            self,
+            text="",
+            variable=self.var_marcado,
+            font=fonte(14),
+            checkbox_width=22,
+            checkbox_height=22,
+            command=lambda: app.toggle_item_compra(self.categoria, self.item)
+        )
+        self.checkbox.pack(side="left", padx=15, pady=5)
+        
+        # Botão remover item
+        ctk.CTkButton(
+            self,
+            text="✕",
+            width=28,
+            height=28,
+            font=fonte(12),
+            fg_color="#444",
+            hover_color="#E63946",
+            command=lambda: app.remover_item_lista(self.categoria, self.item)
+        ).pack(side="right", padx=15)
+    
+    def atualizar(self, categoria, item, marcado):
+        estado = (categoria, item, marcado)
+        if estado == self.estado:
+            return
+        categoria_ant, item_ant, _ = self.estado or (None, None, None)
+        self.categoria, self.item = categoria, item
+        if categoria != categoria_ant:
+            cor = cor_categoria(categoria)
+            self.checkbox.configure(border_color=cor, fg_color=cor)
+        if item != item_ant:
+            self.checkbox.configure(text=item)
+        if self.var_marcado.get() != marcado:
+            self.var_marcado.set(marcado)
+        self.estado = estado
+
+
 class AgendaPessoal(ctk.CTk):
     """Aplicação principal da Agenda Pessoal"""
     
-    def __init__(self):
+    def __init__(self, backend_notificacao=None, armazenamento="sqlite", pasta_dados=None, porta_api=None, core=None):
         super().__init__()
         
         self.title("📋 Agenda Pessoal - Rotina Diária")
@@ -904,32 +1129,60 @@ class AgendaPessoal(ctk.CTk):
         
         self.center_window()
         
-        # Carregar dados
-        self.rotina = self.carregar_rotina()
-        self.alertas_ativos = True
-        self.alertas_disparados = set()
-        self.carregar_alertas_disparados()
-        self.tarefas_concluidas = {}
-        self.carregar_conclusoes()
+        # Núcleo sem interface: rotina, conclusões, alertas e compras; com --servico,
+        # o CoreRemoto que fala com o núcleo do processo do serviço
+        self.core = core or AgendaCore(armazenamento, pasta_dados)
+        self.cliente = core is not None
+        self.porta_api = porta_api  # None = sem API local
+        self.core.ao_alerta = self.disparar_alerta
+        self.core.ao_mudanca_externa = self.aplicar_mudanca_externa
+        # Pedidos das outras threads (bandeja) chegam pelo barramento do núcleo
+        self.core.eventos.assinar("mostrar", self._restaurar_janela_main_thread)
+        self.core.eventos.assinar("testar_alerta", self.testar_alerta)
+        self.core.eventos.assinar("resetar_alertas", self.resetar_alertas_silencioso)
+        self.core.eventos.assinar("sair", self.encerrar)
+        self.core.eventos.assinar("importacao_lida", self.concluir_importacao)
+        self._intervalo_eventos = INTERVALO_EVENTOS_MS
+        # Instância única: os pedidos das outras execuções do app chegam pelo socket do serviço
+        self.servico = None
+        if not self.cliente:
+            self.servico = ServidorServico(self.core)
+            self.servico.iniciar()
+        
+        # Rotina: horários em andamento (da árvore de intervalos), recalculados a cada sincronização
+        self.em_andamento = set()
         
         # Lista de compras
-        self.checkboxes_compras = {}
-        self.itens_marcados = set()
-        self.lista_compras = {}
-        self.carregar_lista_compras()
-        self.carregar_itens_compras()
+        self.categorias_recolhidas = set()
+        
+        # Som, janela de alerta e avisos da bandeja
+        self.notificador = criar_backend(
+            backend_notificacao,
+            abrir_janela=self.abrir_alerta,
+            obter_bandeja=lambda: self.tray_icon
+        )
         
         # System Tray
         self.tray_icon = None
-        self.tray_thread = None
         self.app_running = True
         
-        self.protocol("WM_DELETE_WINDOW", self.minimizar_para_tray)
+        # Ligada ao serviço, fechar encerra este processo: a bandeja e os alertas ficam lá
+        self.protocol("WM_DELETE_WINDOW", self.encerrar if self.cliente else self.minimizar_para_tray)
         
         self.criar_interface()
+        self.bombear_eventos()
         self.iniciar_verificador_background()
         self.atualizar_relogio()
         self.atualizar_proximo_alerta()
+        
+        # Som primeiro (um alerta pode disparar a qualquer momento), bandeja depois
+        self.after(ATRASO_AQUECIMENTO_MS, self.aquecer_dependencias)
+    
+    def aquecer_dependencias(self):
+        """Decodifica o áudio e carrega PIL/pystray em segundo plano"""
+        self.notificador.iniciar()
+        if not self.cliente:
+            dependencias.aquecer_em_background(dependencias.pil, dependencias.pystray)
     
     def center_window(self):
         self.update_idletasks()
@@ -939,70 +1192,10 @@ class AgendaPessoal(ctk.CTk):
         y = (self.winfo_screenheight() // 2) - (height // 2)
         self.geometry(f"{width}x{height}+{x}+{y}")
     
-    def carregar_rotina(self):
-        """Carrega a rotina do arquivo ou usa a padrão"""
-        try:
-            if os.path.exists(ARQUIVO_ROTINA):
-                with open(ARQUIVO_ROTINA, "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except:
-            pass
-        return copy.deepcopy(ROTINA_PADRAO)
-    
-    def salvar_rotina(self):
-        """Salva a rotina no arquivo"""
-        try:
-            with open(ARQUIVO_ROTINA, "w", encoding="utf-8") as f:
-                json.dump(self.rotina, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Erro ao salvar rotina: {e}")
-    
-    def carregar_conclusoes(self):
-        """Carrega as conclusões do dia"""
-        try:
-            if os.path.exists(ARQUIVO_CONCLUSOES):
-                with open(ARQUIVO_CONCLUSOES, "r", encoding="utf-8") as f:
-                    dados = json.load(f)
-                data_hoje = datetime.now().strftime("%Y-%m-%d")
-                if dados.get("data") == data_hoje:
-                    self.tarefas_concluidas = dados.get("conclusoes", {})
-                else:
-                    self.tarefas_concluidas = {}
-        except:
-            self.tarefas_concluidas = {}
-    
-    def salvar_conclusoes(self):
-        """Salva as conclusões"""
-        try:
-            dados = {
-                "data": datetime.now().strftime("%Y-%m-%d"),
-                "conclusoes": self.tarefas_concluidas
-            }
-            with open(ARQUIVO_CONCLUSOES, "w", encoding="utf-8") as f:
-                json.dump(dados, f, ensure_ascii=False)
-        except:
-            pass
-    
     def iniciar_tray(self):
-        if self.tray_icon is not None:
-            return
-        
-        image = criar_icone_tray()
-        self.tray_icon = pystray.Icon(
-            "agenda_pessoal",
-            image,
-            "📋 Agenda Pessoal - Rodando em segundo plano",
-            menu=pystray.Menu(
-                item('📋 Abrir Agenda', self.restaurar_janela, default=True),
-                item('🔔 Testar Alerta', self.testar_alerta_tray),
-                item('🔄 Resetar Alertas', self.resetar_alertas_tray),
-                pystray.Menu.SEPARATOR,
-                item('❌ Sair Completamente', self.sair_completamente)
-            )
-        )
-        
-        self.tray_thread = threading.Thread(target=self.tray_icon.run, daemon=True)
-        self.tray_thread.start()
+        if self.tray_icon is None:
+            # O menu só publica no barramento: a thread da bandeja não toca na interface
+            self.tray_icon = iniciar_bandeja(self.core.eventos.publicar)
     
     def parar_tray(self):
         if self.tray_icon is not None:
@@ -1010,13 +1203,13 @@ class AgendaPessoal(ctk.CTk):
             self.tray_icon = None
     
     def minimizar_para_tray(self):
-        self.withdraw()
         self.iniciar_tray()
-        if self.tray_icon:
-            self.tray_icon.notify("Agenda Pessoal", "🔔 App rodando em segundo plano.")
-    
-    def restaurar_janela(self, icon=None, item=None):
-        self.after(0, self._restaurar_janela_main_thread)
+        if self.tray_icon is None:
+            # Sem pystray não há como restaurar uma janela escondida
+            self.iconify()
+            return
+        self.withdraw()
+        self.notificador.aviso_bandeja("Agenda Pessoal", "🔔 App rodando em segundo plano.")
     
     def _restaurar_janela_main_thread(self):
         self.deiconify()
@@ -1024,35 +1217,63 @@ class AgendaPessoal(ctk.CTk):
         self.focus_force()
         self.state('normal')
     
-    def testar_alerta_tray(self, icon=None, item=None):
-        self.after(0, self.testar_alerta)
+    def resetar_alertas_silencioso(self):
+        """Reset pedido de fora da janela: avisa pela bandeja em vez de um diálogo"""
+        self.core.resetar_alertas()
+        self.notificador.aviso_bandeja("Agenda Pessoal", "✅ Alertas resetados!")
     
-    def resetar_alertas_tray(self, icon=None, item=None):
-        self.alertas_disparados.clear()
-        self.salvar_alertas_disparados()
-        if self.tray_icon:
-            self.tray_icon.notify("Agenda Pessoal", "✅ Alertas resetados!")
-    
-    def sair_completamente(self, icon=None, item=None):
+    def encerrar(self):
+        if not self.app_running:
+            return  # "sair" do serviço e a conexão fechada chegam juntos
         self.app_running = False
+        if self.servico is not None:
+            self.servico.parar()
+        self.core.parar()  # grava o que estiver pendente antes de sair
+        self.notificador.parar()
         self.parar_tray()
-        self.after(0, self.destroy)
+        self.destroy()
+    
+    def bombear_eventos(self):
+        """Único ponto em que o que outras threads publicaram entra na thread do Tk
+        
+        Reagendado com after, sem nenhuma chamada ao Tk vinda de outra thread: logo,
+        se o lote não esvaziou a fila; a cada INTERVALO_EVENTOS_MS enquanto chegam
+        eventos; sem eventos, o intervalo dobra até INTERVALO_EVENTOS_OCIOSO_MS.
+        """
+        if not self.app_running:
+            return
+        if self.core.eventos.pendentes:
+            self.core.eventos.drenar(LOTE_EVENTOS)
+            self._intervalo_eventos = INTERVALO_EVENTOS_MS
+        else:
+            self._intervalo_eventos = min(self._intervalo_eventos * 2, INTERVALO_EVENTOS_OCIOSO_MS)
+        if self.core.eventos.pendentes:
+            self.after_idle(self.bombear_eventos)  # o resto depois de atender a interface
+        else:
+            self.after(self._intervalo_eventos, self.bombear_eventos)
     
     def iniciar_verificador_background(self):
-        def verificar_loop():
-            while self.app_running:
-                try:
-                    if self.alertas_ativos:
-                        hora_atual = datetime.now().strftime("%H:%M")
-                        if hora_atual in self.rotina and hora_atual not in self.alertas_disparados:
-                            self.alertas_disparados.add(hora_atual)
-                            self.salvar_alertas_disparados()
-                            self.after(0, lambda h=hora_atual: self.disparar_alerta(h))
-                except Exception as e:
-                    print(f"Erro: {e}")
-                time.sleep(30)
-        
-        threading.Thread(target=verificar_loop, daemon=True).start()
+        """Inicia o agendador de alertas do núcleo, o observador dos arquivos editáveis por fora e a API local (se pedida)"""
+        if self.cliente:
+            return  # tudo isso roda no processo do serviço
+        self.core.iniciar_agendador()
+        self.core.iniciar_observador()
+        if self.porta_api is not None:
+            self.core.iniciar_api(self.porta_api)
+    
+    def aplicar_mudanca_externa(self, resumo):
+        """Edição externa já mesclada pelo núcleo: reconcilia só a lista afetada"""
+        if resumo["arquivo"] in (ARQUIVO_ROTINA, ARQUIVO_VARIANTES):
+            self.sincronizar_rotina()
+        else:
+            self.sincronizar_compras()
+        if resumo["conflitos"]:
+            messagebox.showwarning(
+                "Conflito",
+                f"{resumo['arquivo']} foi editado fora do programa enquanto havia alterações aqui:\n"
+                f"{', '.join(resumo['conflitos'])}\n\n"
+                "Ficou a versão do programa; a do arquivo foi salva em *.conflito.json."
+            )
     
     def criar_interface(self):
         # Header
@@ -1066,14 +1287,14 @@ class AgendaPessoal(ctk.CTk):
         ctk.CTkLabel(
             header_content,
             text="📋 AGENDA PESSOAL",
-            font=ctk.CTkFont(family="Segoe UI", size=28, weight="bold"),
+            font=fonte(28, "bold", FAMILIA_TEXTO),
             text_color="#00d4ff"
         ).pack(side="left", pady=20)
         
         self.label_relogio = ctk.CTkLabel(
             header_content,
             text="",
-            font=ctk.CTkFont(family="Consolas", size=24, weight="bold"),
+            font=fonte(24, "bold", FAMILIA_MONO),
             text_color="#00ff88"
         )
         self.label_relogio.pack(side="right", pady=20)
@@ -1082,7 +1303,7 @@ class AgendaPessoal(ctk.CTk):
             header_content,
             text="🔔 Alertas",
             command=self.toggle_alertas,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             progress_color="#00d4ff"
         )
         self.switch_alertas.pack(side="right", padx=30, pady=20)
@@ -1097,13 +1318,17 @@ class AgendaPessoal(ctk.CTk):
             fg_color="#16213e",
             segmented_button_fg_color="#1a1a2e",
             segmented_button_selected_color="#00d4ff",
-            segmented_button_unselected_color="#333"
+            segmented_button_unselected_color="#333",
+            command=self.ao_trocar_tab
         )
         self.tabview.pack(fill="both", expand=True)
         
         self.tab_rotina = self.tabview.add("📅 Rotina do Dia")
         self.criar_tab_rotina()
         
+        tab_estatisticas = self.tabview.add(TAB_ESTATISTICAS)
+        self.criar_tab_estatisticas(tab_estatisticas)
+        
         tab_compras = self.tabview.add("🛒 Lista de Compras")
         self.criar_tab_compras(tab_compras)
         
@@ -1111,11 +1336,7 @@ class AgendaPessoal(ctk.CTk):
         self.criar_tab_controles(tab_controles)
     
     def criar_tab_rotina(self):
-        """Cria o conteúdo da tab de rotina"""
-        # Limpar tab
-        for widget in self.tab_rotina.winfo_children():
-            widget.destroy()
-        
+        """Cria o conteúdo fixo da tab de rotina; os cards vêm de sincronizar_rotina()"""
         # Botão de adicionar tarefa
         btn_frame = ctk.CTkFrame(self.tab_rotina, fg_color="transparent")
         btn_frame.pack(fill="x", padx=10, pady=10)
@@ -1126,246 +1347,256 @@ class AgendaPessoal(ctk.CTk):
             command=self.abrir_modal_nova_tarefa,
             width=150,
             height=40,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             fg_color="#00ff88",
             text_color="black",
             hover_color="#00cc6a"
         ).pack(side="left")
         
+        self.btn_importar = ctk.CTkButton(
+            btn_frame,
+            text="📥 Importar",
+            command=self.importar_rotina,
+            width=120,
+            height=40,
+            font=fonte(14),
+            fg_color="#333",
+            hover_color="#555"
+        )
+        self.btn_importar.pack(side="left", padx=(10, 0))
+        
         ctk.CTkButton(
             btn_frame,
             text="🔄 Resetar Conclusões",
             command=self.resetar_conclusoes,
             width=170,
             height=40,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             fg_color="#E63946",
             hover_color="#ff6b6b"
         ).pack(side="right")
         
-        # Frame com scroll
-        self.scroll_frame = ctk.CTkScrollableFrame(
+        # Variantes da rotina que valem hoje (fim de semana, descanso...)
+        self.label_variantes = ctk.CTkLabel(btn_frame, text="", font=fonte(13), text_color="#888")
+        self.label_variantes.pack(side="left", padx=15)
+        
+        # Lista virtualizada: só os cards perto da área visível existem como widgets
+        self.lista_rotina = ListaVirtual(
             self.tab_rotina,
-            fg_color="transparent",
-            scrollbar_button_color="#00d4ff"
+            criar_widget=self.criar_widget_rotina,
+            vincular=self.vincular_widget_rotina,
+            tipo_cabecalho="periodo",
+            margens={"periodo": (15, 5), "card": (5, 5)}
         )
-        self.scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.lista_rotina.pack(fill="both", expand=True, padx=10, pady=10)
+        self.sincronizar_rotina()
+    
+    def sincronizar_rotina(self):
+        """Reconcilia a lista com a rotina: cards visíveis são revinculados, só o que mudou é reconfigurado"""
+        variantes = self.core.variantes_do_dia()
+        self.em_andamento = {dados.horario for dados in self.core.em_andamento()}
+        self.label_variantes.configure(text=f"📆 Hoje: {' + '.join(variantes)}" if variantes else "📆 Hoje: rotina padrão")
         
         # Agrupar por período
         periodos = {}
-        for horario, dados in sorted(self.rotina.items()):
-            periodo = dados.get("periodo", "MANHÃ")
-            if periodo not in periodos:
-                periodos[periodo] = []
-            periodos[periodo].append((horario, dados))
-        
-        cores_periodo = {
-            "MANHÃ": "#FF6B35",
-            "PREPARAÇÃO": "#F77F00",
-            "TREINO": "#00B894",
-            "PÓS-TREINO": "#4ECDC4",
-            "TRANSIÇÃO": "#6B705C",
-            "TARDE": "#FFD166",
-            "NOITE": "#7B2CBF"
-        }
+        for horario, dados in self.core.rotina_do_dia().items():  # já em ordem de hora
+            if dados.periodo not in periodos:
+                periodos[dados.periodo] = []
+            periodos[dados.periodo].append((horario, dados))
         
+        linhas = []
         for periodo in PERIODOS_DISPONIVEIS:
             if periodo not in periodos:
                 continue
-            
-            itens = periodos[periodo]
-            
-            periodo_frame = ctk.CTkFrame(
-                self.scroll_frame,
-                fg_color=cores_periodo.get(periodo, "#333"),
-                corner_radius=10
-            )
-            periodo_frame.pack(fill="x", pady=(15, 5))
-            
-            ctk.CTkLabel(
-                periodo_frame,
-                text=f"  {periodo}  ",
-                font=ctk.CTkFont(family="Segoe UI", size=16, weight="bold"),
-                text_color="white"
-            ).pack(pady=8)
-            
-            for horario, dados in itens:
-                self.criar_card_tarefa(horario, dados)
-    
-    def criar_card_tarefa(self, horario, dados):
-        """Cria um card de tarefa"""
-        hora_atual = datetime.now().strftime("%H:%M")
-        tarefa_concluida = self.tarefas_concluidas.get(horario, False)
-        
-        card = ctk.CTkFrame(
-            self.scroll_frame,
-            fg_color="#1a1a2e" if not tarefa_concluida else "#0d2818",
-            corner_radius=12,
-            border_width=2,
-            border_color=dados["cor"] if not tarefa_concluida else "#00ff88"
-        )
-        card.pack(fill="x", pady=5, padx=5)
-        
-        # Header do card
-        header = ctk.CTkFrame(card, fg_color="transparent")
-        header.pack(fill="x", padx=15, pady=(15, 10))
-        
-        # Checkbox de conclusão
-        var_conclusao = ctk.BooleanVar(value=tarefa_concluida)
-        check_conclusao = ctk.CTkCheckBox(
-            header,
-            text="",
-            variable=var_conclusao,
-            command=lambda h=horario, v=var_conclusao: self.toggle_conclusao(h, v),
-            width=30,
-            checkbox_width=24,
-            checkbox_height=24,
-            fg_color="#00ff88",
-            border_color=dados["cor"]
+            linhas.append((("periodo", periodo), "periodo", ALTURA_CABECALHO_PERIODO))
+            for horario, dados in periodos[periodo]:
+                altura = ALTURA_BASE_CARD + ALTURA_LINHA_TAREFA * len(dados.tarefas)
+                linhas.append((("card", horario), "card", altura))
+        
+        self.lista_rotina.definir_linhas(linhas)
+    
+    def criar_widget_rotina(self, tipo, parent):
+        if tipo == "periodo":
+            return CabecalhoPeriodo(parent)
+        return CardTarefa(parent, self)
+    
+    def vincular_widget_rotina(self, widget, chave):
+        tipo, valor = chave
+        if tipo == "periodo":
+            widget.atualizar(valor)
+            return
+        dados = self.core.rotina_do_dia()[valor]
+        widget.atualizar(
+            valor,
+            dados,
+            self.core.tarefas_concluidas.get(valor, False),
+            dados.minutos < minutos_do_dia(datetime.now()),
+            valor in self.em_andamento
         )
-        check_conclusao.pack(side="left")
-        
-        # Horário
-        ctk.CTkLabel(
-            header,
-            text=f"🕐 {horario}",
-            font=ctk.CTkFont(family="Consolas", size=18, weight="bold"),
-            text_color=dados["cor"] if not tarefa_concluida else "#00ff88"
-        ).pack(side="left", padx=10)
-        
-        # Status
-        if tarefa_concluida:
-            status_text = "✅ CONCLUÍDO"
-            status_color = "#00ff88"
-        elif horario < hora_atual:
-            status_text = "⚠️ ATRASADO"
-            status_color = "#E63946"
-        else:
-            status_text = "⏳ Pendente"
-            status_color = "#ffa500"
-        
-        ctk.CTkLabel(
-            header,
-            text=status_text,
-            font=ctk.CTkFont(size=12, weight="bold"),
-            text_color=status_color
-        ).pack(side="right")
-        
-        # Botão editar
-        ctk.CTkButton(
-            header,
-            text="✏️ Editar",
-            command=lambda h=horario: self.abrir_modal_editar(h),
-            width=80,
-            height=28,
-            font=ctk.CTkFont(size=11),
-            fg_color="#333",
-            hover_color=dados["cor"]
-        ).pack(side="right", padx=10)
-        
-        # Título
-        titulo_color = "white" if not tarefa_concluida else "#00ff88"
-        ctk.CTkLabel(
-            card,
-            text=dados["titulo"],
-            font=ctk.CTkFont(family="Segoe UI", size=14, weight="bold"),
-            text_color=titulo_color,
-            anchor="w"
-        ).pack(fill="x", padx=15, pady=(0, 10))
-        
-        # Tarefas
-        for tarefa in dados.get("tarefas", []):
-            texto_cor = "#ccc" if not tarefa_concluida else "#88cc88"
-            ctk.CTkLabel(
-                card,
-                text=f"  {tarefa}",
-                font=ctk.CTkFont(family="Segoe UI", size=12),
-                text_color=texto_cor,
-                anchor="w",
-                wraplength=1000
-            ).pack(fill="x", padx=15, pady=2)
-        
-        # Botão testar alerta
-        btn_frame = ctk.CTkFrame(card, fg_color="transparent")
-        btn_frame.pack(fill="x", padx=15, pady=10)
-        
-        ctk.CTkButton(
-            btn_frame,
-            text="🔔 Testar Alerta",
-            command=lambda h=horario: self.disparar_alerta_manual(h),
-            width=120,
-            height=28,
-            font=ctk.CTkFont(size=11),
-            fg_color="#333",
-            hover_color=dados["cor"]
-        ).pack(side="right")
+    
+    def atualizar_card(self, horario):
+        """Atualiza só o card do horário (cores, status, checkbox e linhas), se estiver na tela"""
+        if horario in self.core.rotina_do_dia():
+            self.lista_rotina.atualizar_linha(("card", horario))
     
     def toggle_conclusao(self, horario, var):
         """Marca/desmarca tarefa como concluída"""
-        self.tarefas_concluidas[horario] = var.get()
-        self.salvar_conclusoes()
-        self.criar_tab_rotina()  # Recriar para atualizar visual
+        self.core.definir_conclusao(horario, var.get())
+        self.atualizar_card(horario)
     
     def resetar_conclusoes(self):
         """Reseta todas as conclusões do dia"""
         if messagebox.askyesno("Confirmar", "Resetar todas as conclusões de hoje?"):
-            self.tarefas_concluidas.clear()
-            self.salvar_conclusoes()
-            self.criar_tab_rotina()
+            self.core.resetar_conclusoes()
+            self.sincronizar_rotina()
     
     def abrir_modal_editar(self, horario):
         """Abre o modal de edição"""
-        if horario in self.rotina:
-            ModalEditarTarefa(self, horario, self.rotina[horario], self.salvar_edicao)
+        if horario in self.core.rotina_do_dia():
+            ModalEditarTarefa(self, horario, self.core.rotina_do_dia()[horario], self.salvar_edicao,
+                              self.core.sobreposicoes)
     
     def abrir_modal_nova_tarefa(self):
         """Abre o modal de nova tarefa"""
-        ModalNovaTarefa(self, self.adicionar_tarefa)
+        ModalNovaTarefa(self, self.adicionar_tarefa, self.core.sobreposicoes)
     
     def salvar_edicao(self, horario_original, novo_horario, novos_dados):
         """Salva a edição de uma tarefa"""
-        # Excluir tarefa
-        if novo_horario is None:
-            if horario_original in self.rotina:
-                del self.rotina[horario_original]
-        else:
-            # Remover original se mudou o horário
-            if horario_original != novo_horario and horario_original in self.rotina:
-                del self.rotina[horario_original]
-            
-            # Adicionar/atualizar
-            self.rotina[novo_horario] = novos_dados
-        
-        self.salvar_rotina()
-        self.criar_tab_rotina()
+        self.core.salvar_edicao(horario_original, novo_horario, novos_dados)
+        self.sincronizar_rotina()
         messagebox.showinfo("Sucesso", "✅ Tarefa salva com sucesso!")
     
     def adicionar_tarefa(self, horario, dados):
         """Adiciona uma nova tarefa"""
-        if horario in self.rotina:
+        if horario in self.core.rotina_do_dia():
             if not messagebox.askyesno("Conflito", f"Já existe uma tarefa às {horario}. Substituir?"):
                 return
         
-        self.rotina[horario] = dados
-        self.salvar_rotina()
-        self.criar_tab_rotina()
+        self.core.adicionar_tarefa(horario, dados)
+        self.sincronizar_rotina()
         messagebox.showinfo("Sucesso", "✅ Nova tarefa criada!")
     
-    def criar_tab_compras(self, parent):
-        """Cria o conteúdo da tab de lista de compras"""
-        self.tab_compras_parent = parent
-        self.recriar_tab_compras()
-    
-    def recriar_tab_compras(self):
-        """Recria a tab de compras"""
-        parent = self.tab_compras_parent
+    def importar_rotina(self):
+        """Escolhe um .ics/.csv e o lê numa thread; o resultado volta pelo barramento"""
+        extensoes = " ".join(f"*{extensao}" for extensao in FORMATOS_IMPORTACAO)
+        arquivo = filedialog.askopenfilename(
+            parent=self,
+            title="Importar rotina",
+            filetypes=[("Calendário ou planilha", extensoes), ("Todos os arquivos", "*.*")]
+        )
+        if not arquivo:
+            return
+        self.btn_importar.configure(state="disabled", text="⏳ Lendo...")
+        
+        def ler():
+            try:
+                lido = self.core.ler_importacao(arquivo)
+            except (OSError, ValueError) as e:
+                lido = e
+            self.core.eventos.publicar("importacao_lida", arquivo, lido)
+        
+        threading.Thread(target=ler, daemon=True).start()
+    
+    def concluir_importacao(self, arquivo, lido):
+        """Na thread do Tk: pergunta sobre conflitos, grava tudo de uma vez e redesenha uma vez"""
+        self.btn_importar.configure(state="normal", text="📥 Importar")
+        if isinstance(lido, Exception):
+            messagebox.showerror("Erro", f"Não foi possível importar {arquivo}:\n{lido}")
+            return
+        if not lido["horarios"]:
+            messagebox.showwarning("Importar", f"Nenhum horário encontrado em {arquivo} ({lido['eventos']} eventos lidos).")
+            return
         
-        # Limpar tab
-        for widget in parent.winfo_children():
-            widget.destroy()
+        substituir = False
+        conflitos = self.core.conflitos_importacao(lido)
+        if conflitos:
+            substituir = messagebox.askyesnocancel(
+                "Conflito",
+                f"{len(conflitos)} horário(s) já existem com outro conteúdo:\n{', '.join(conflitos[:20])}"
+                f"{' ...' if len(conflitos) > 20 else ''}\n\nSubstituir pelos importados? (Não = manter os atuais)"
+            )
+            if substituir is None:
+                return
         
-        self.checkboxes_compras = {}
+        resumo = self.core.aplicar_importacao(lido, substituir)
+        self.sincronizar_rotina()
+        linhas = [
+            f"✅ {len(resumo['novos'])} novos, {len(resumo['substituidos'])} substituídos",
+            f"{resumo['iguais']} já existiam iguais, {len(resumo['mantidos'])} mantidos",
+            f"{lido['eventos']} eventos lidos ({lido['repetidos']} repetidos, {lido['dia_inteiro']} de dia inteiro, "
+            f"{lido['invalidos']} inválidos)"
+        ]
+        linhas.extend(lido["erros"])
+        messagebox.showinfo("Importar", "\n".join(linhas))
+    
+    def criar_tab_estatisticas(self, parent):
+        """Cria a tab de estatísticas; o conteúdo é uma imagem desenhada ao abrir a tab"""
+        barra = ctk.CTkFrame(parent, fg_color="transparent")
+        barra.pack(fill="x", padx=10, pady=10)
+        
+        self.periodo_estatisticas = ctk.CTkSegmentedButton(
+            barra,
+            values=list(PERIODOS_ESTATISTICAS),
+            command=lambda _: self.atualizar_estatisticas(),
+            font=fonte(14),
+            selected_color="#00d4ff",
+            selected_hover_color="#0099cc"
+        )
+        self.periodo_estatisticas.set("90 dias")
+        self.periodo_estatisticas.pack(side="left")
         
+        ctk.CTkButton(
+            barra,
+            text="🔄 Atualizar",
+            command=self.atualizar_estatisticas,
+            width=120,
+            height=32,
+            font=fonte(14),
+            fg_color="#333"
+        ).pack(side="right")
+        
+        self.label_tempo_estatisticas = ctk.CTkLabel(barra, text="", font=fonte(12), text_color="#888")
+        self.label_tempo_estatisticas.pack(side="right", padx=10)
+        
+        area = ctk.CTkFrame(parent, fg_color="transparent")
+        area.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.canvas_estatisticas = tk.Canvas(area, bg=COR_FUNDO_LISTA, highlightthickness=0, bd=0)
+        scrollbar = ctk.CTkScrollbar(area, command=self.canvas_estatisticas.yview, button_color="#00d4ff")
+        scrollbar.pack(side="right", fill="y")
+        self.canvas_estatisticas.pack(side="left", fill="both", expand=True)
+        self.canvas_estatisticas.configure(yscrollcommand=scrollbar.set)
+        self.foto_estatisticas = None
+    
+    def ao_trocar_tab(self):
+        if self.tabview.get() == TAB_ESTATISTICAS:
+            # Depois do idle, para a tab já ter largura quando a imagem for desenhada
+            self.after_idle(self.atualizar_estatisticas)
+    
+    def atualizar_estatisticas(self):
+        """Recalcula as estatísticas do período escolhido e redesenha a imagem"""
+        canvas = self.canvas_estatisticas
+        estatisticas = dependencias.estatisticas.obter()
+        canvas.delete("all")
+        if estatisticas is None:
+            canvas.create_text(20, 20, anchor="nw", fill="#888", font=("Segoe UI", 14),
+                               text="As estatísticas precisam do NumPy e do Pillow (pip install numpy Pillow)")
+            return
+        
+        inicio = time.perf_counter()
+        dados = estatisticas.calcular(
+            self.core.historico.copiar(),
+            self.core.rotina_do_dia(),
+            PERIODOS_DISPONIVEIS,
+            dias=PERIODOS_ESTATISTICAS[self.periodo_estatisticas.get()]
+        )
+        imagem = estatisticas.desenhar(dados, largura=max(canvas.winfo_width(), 700))
+        self.foto_estatisticas = estatisticas.foto_tk(imagem)
+        canvas.create_image(0, 0, anchor="nw", image=self.foto_estatisticas)
+        canvas.configure(scrollregion=(0, 0, imagem.width, imagem.height))
+        self.label_tempo_estatisticas.configure(text=f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+    
+    def criar_tab_compras(self, parent):
+        """Cria o conteúdo da tab de lista de compras"""
         # Botão adicionar categoria
         btn_frame = ctk.CTkFrame(parent, fg_color="transparent")
         btn_frame.pack(fill="x", padx=10, pady=10)
@@ -1376,7 +1607,7 @@ class AgendaPessoal(ctk.CTk):
             command=self.adicionar_categoria,
             width=160,
             height=40,
-            font=ctk.CTkFont(size=14, weight="bold"),
+            font=fonte(14, "bold"),
             fg_color="#00ff88",
             text_color="black",
             hover_color="#00cc6a"
@@ -1388,120 +1619,78 @@ class AgendaPessoal(ctk.CTk):
             command=self.resetar_lista_compras,
             width=180,
             height=40,
-            font=ctk.CTkFont(size=14),
+            font=fonte(14),
             fg_color="#E63946",
             hover_color="#ff6b6b"
         ).pack(side="right")
         
-        scroll_frame = ctk.CTkScrollableFrame(parent, fg_color="transparent")
-        scroll_frame.pack(fill="both", expand=True, padx=10, pady=10)
-        
-        cores_categoria = {
-            "🥬 MERCADO / FEIRA": "#00ff88",
-            "💊 SUPLEMENTOS (O Kit)": "#00d4ff",
-            "🚿 HIGIENE & BANHO": "#4ECDC4",
-            "🧴 ESTÉTICA & BANCADA": "#7B2CBF"
-        }
-        
-        for categoria, itens in self.lista_compras.items():
-            cor_cat = cores_categoria.get(categoria, "#7B2CBF")
-            
-            card = ctk.CTkFrame(
-                scroll_frame,
-                fg_color="#1a1a2e",
-                corner_radius=12,
-                border_width=2,
-                border_color=cor_cat
-            )
-            card.pack(fill="x", pady=10, padx=5)
-            
-            # Header com botões
-            header = ctk.CTkFrame(card, fg_color=cor_cat, corner_radius=8)
-            header.pack(fill="x", padx=10, pady=10)
-            
-            ctk.CTkLabel(
-                header,
-                text=categoria,
-                font=ctk.CTkFont(family="Segoe UI", size=18, weight="bold"),
-                text_color="white"
-            ).pack(side="left", padx=15, pady=10)
-            
-            # Botão remover categoria
-            ctk.CTkButton(
-                header,
-                text="🗑️",
-                width=35,
-                height=35,
-                fg_color="#aa0000",
-                hover_color="#cc0000",
-                command=lambda c=categoria: self.remover_categoria(c)
-            ).pack(side="right", padx=5, pady=5)
-            
-            # Botão adicionar item
-            ctk.CTkButton(
-                header,
-                text="➕ Item",
-                width=80,
-                height=35,
-                fg_color="#00aa00",
-                hover_color="#00cc00",
-                command=lambda c=categoria: self.adicionar_item_lista(c)
-            ).pack(side="right", padx=5, pady=5)
-            
-            # Itens
-            for item_text in itens:
-                item_frame = ctk.CTkFrame(card, fg_color="transparent")
-                item_frame.pack(fill="x", padx=15, pady=3)
-                
-                item_key = f"{categoria}|{item_text}"
-                
-                checkbox = ctk.CTkCheckBox(
-                    item_frame,
-                    text=item_text,
-                    font=ctk.CTkFont(size=14),
-                    checkbox_width=22,
-                    checkbox_height=22,
-                    border_color=cor_cat,
-                    fg_color=cor_cat,
-                    command=lambda k=item_key: self.toggle_item_compra(k)
-                )
-                checkbox.pack(side="left", pady=5)
-                
-                # Botão remover item
-                ctk.CTkButton(
-                    item_frame,
-                    text="✕",
-                    width=28,
-                    height=28,
-                    font=ctk.CTkFont(size=12),
-                    fg_color="#444",
-                    hover_color="#E63946",
-                    command=lambda c=categoria, i=item_text: self.remover_item_lista(c, i)
-                ).pack(side="right")
-                
-                self.checkboxes_compras[item_key] = checkbox
-                if item_key in self.itens_marcados:
-                    checkbox.select()
-            
-            # Se não tem itens
+        # Mesma lista virtualizada da rotina: um widget por linha visível, não por item
+        self.lista_compras = ListaVirtual(
+            parent,
+            criar_widget=self.criar_widget_compras,
+            vincular=self.vincular_widget_compras,
+            tipo_cabecalho="categoria",
+            margens={"categoria": (15, 0), "item": (0, 0), "vazio": (0, 0)}
+        )
+        self.lista_compras.pack(fill="both", expand=True, padx=10, pady=10)
+        self.sincronizar_compras()
+    
+    def sincronizar_compras(self):
+        """Reconcilia a lista com as categorias; só as linhas visíveis que mudaram são reconfiguradas"""
+        linhas = []
+        for categoria, itens in self.core.compras.lista.items():
+            linhas.append((("categoria", categoria), "categoria", ALTURA_CABECALHO_CATEGORIA))
+            if categoria in self.categorias_recolhidas:
+                continue
+            for item in itens:
+                linhas.append((("item", categoria, item), "item", ALTURA_LINHA_COMPRA))
             if not itens:
-                ctk.CTkLabel(
-                    card,
-                    text="  Nenhum item. Clique em '➕ Item' para adicionar.",
-                    font=ctk.CTkFont(size=12),
-                    text_color="#888"
-                ).pack(pady=10)
-            
-            ctk.CTkFrame(card, fg_color="transparent", height=10).pack()
+                linhas.append((("vazio", categoria), "vazio", ALTURA_LINHA_COMPRA))
+        
+        self.lista_compras.definir_linhas(linhas)
+    
+    def criar_widget_compras(self, tipo, parent):
+        if tipo == "categoria":
+            return CabecalhoCategoria(parent, self)
+        if tipo == "item":
+            return LinhaItemCompra(parent, self)
+        return ctk.CTkLabel(
+            parent,
+            text="  Nenhum item. Clique em '➕ Item' para adicionar.",
+            font=fonte(12),
+            text_color="#888",
+            fg_color="#1a1a2e",
+            height=ALTURA_LINHA_COMPRA
+        )
+    
+    def vincular_widget_compras(self, widget, chave):
+        compras = self.core.compras
+        if chave[0] == "categoria":
+            categoria = chave[1]
+            widget.atualizar(
+                categoria,
+                len(compras.marcados_por_categoria.get(categoria, ())),
+                len(compras.lista.get(categoria, ())),
+                categoria in self.categorias_recolhidas
+            )
+        elif chave[0] == "item":
+            _, categoria, item = chave
+            widget.atualizar(categoria, item, compras.esta_marcado(categoria, item))
+    
+    def alternar_categoria(self, categoria):
+        """Recolhe/expande os itens de uma categoria"""
+        if categoria in self.categorias_recolhidas:
+            self.categorias_recolhidas.discard(categoria)
+        else:
+            self.categorias_recolhidas.add(categoria)
+        self.sincronizar_compras()
     
     def resetar_lista_compras(self):
         """Reseta a lista de compras para o padrão"""
         if messagebox.askyesno("Confirmar", "Isso vai apagar suas personalizações e voltar à lista padrão. Continuar?"):
-            self.lista_compras = copy.deepcopy(LISTA_COMPRAS_PADRAO)
-            self.itens_marcados.clear()
-            self.salvar_lista_compras()
-            self.salvar_itens_compras()
-            self.recriar_tab_compras()
+            self.core.compras.resetar()
+            self.categorias_recolhidas.clear()
+            self.sincronizar_compras()
     
     def criar_tab_controles(self, parent):
         """Cria o conteúdo da tab de controles"""
@@ -1509,13 +1698,13 @@ class AgendaPessoal(ctk.CTk):
         container.pack(fill="both", expand=True, padx=20, pady=20)
         
         # System Tray
-        tray_card = ctk.CTkFrame(container, fg_color="#1a1a2e", corner_radius=12)
+        tray_card = ctk.CTkFrame(container, **ESTILO_CARD)
         tray_card.pack(fill="x", pady=10)
         
         ctk.CTkLabel(
             tray_card,
             text="🖥️ System Tray",
-            font=ctk.CTkFont(size=18, weight="bold"),
+            font=fonte(18, "bold"),
             text_color="#00d4ff"
         ).pack(pady=15)
         
@@ -1532,18 +1721,18 @@ class AgendaPessoal(ctk.CTk):
         ctk.CTkLabel(
             tray_card,
             text="O app continua rodando e os alertas funcionam",
-            font=ctk.CTkFont(size=12),
+            font=fonte(12),
             text_color="#888"
         ).pack(pady=(0, 15))
         
         # Alertas
-        alertas_card = ctk.CTkFrame(container, fg_color="#1a1a2e", corner_radius=12)
+        alertas_card = ctk.CTkFrame(container, **ESTILO_CARD)
         alertas_card.pack(fill="x", pady=10)
         
         ctk.CTkLabel(
             alertas_card,
             text="🔔 Controle de Alertas",
-            font=ctk.CTkFont(size=18, weight="bold"),
+            font=fonte(18, "bold"),
             text_color="#00d4ff"
         ).pack(pady=15)
         
@@ -1560,18 +1749,18 @@ class AgendaPessoal(ctk.CTk):
         ctk.CTkLabel(
             alertas_card,
             text="Permite que os alertas toquem novamente",
-            font=ctk.CTkFont(size=12),
+            font=fonte(12),
             text_color="#888"
         ).pack(pady=(0, 15))
         
         # Teste
-        teste_card = ctk.CTkFrame(container, fg_color="#1a1a2e", corner_radius=12)
+        teste_card = ctk.CTkFrame(container, **ESTILO_CARD)
         teste_card.pack(fill="x", pady=10)
         
         ctk.CTkLabel(
             teste_card,
             text="🧪 Testar Sistema",
-            font=ctk.CTkFont(size=18, weight="bold"),
+            font=fonte(18, "bold"),
             text_color="#00d4ff"
         ).pack(pady=15)
         
@@ -1588,28 +1777,63 @@ class AgendaPessoal(ctk.CTk):
         ctk.CTkLabel(
             teste_card,
             text=f"Senha: {'*' * len(SENHA_ALERTA)}",
-            font=ctk.CTkFont(size=12),
+            font=fonte(12),
             text_color="#888"
         ).pack(pady=(0, 15))
         
         # Próximo alerta
-        proximo_card = ctk.CTkFrame(container, fg_color="#1a1a2e", corner_radius=12)
+        proximo_card = ctk.CTkFrame(container, **ESTILO_CARD)
         proximo_card.pack(fill="x", pady=10)
         
         ctk.CTkLabel(
             proximo_card,
             text="⏰ Próximo Alerta",
-            font=ctk.CTkFont(size=18, weight="bold"),
+            font=fonte(18, "bold"),
             text_color="#00d4ff"
         ).pack(pady=15)
         
         self.label_proximo = ctk.CTkLabel(
             proximo_card,
             text="Calculando...",
-            font=ctk.CTkFont(size=16),
+            font=fonte(16),
             text_color="#00ff88"
         )
         self.label_proximo.pack(pady=(0, 15))
+        
+        # Latência dos alertas
+        latencia_card = ctk.CTkFrame(container, **ESTILO_CARD)
+        latencia_card.pack(fill="x", pady=10)
+        
+        ctk.CTkLabel(
+            latencia_card,
+            text="📊 Latência dos Alertas (hoje)",
+            font=fonte(18, "bold"),
+            text_color="#00d4ff"
+        ).pack(pady=15)
+        
+        self.label_latencias = ctk.CTkLabel(
+            latencia_card,
+            text="",
+            font=fonte(13, "normal", FAMILIA_MONO),
+            text_color="#e0e0e0",
+            justify="left"
+        )
+        self.label_latencias.pack(pady=(0, 15))
+        self.atualizar_label_latencias()
+    
+    def atualizar_label_latencias(self):
+        """Mostra p50/p95/max de cada etapa do alerta no dia de hoje"""
+        resumo = self.core.medidor_latencia.resumo(datetime.now().strftime("%Y-%m-%d"))
+        if not resumo:
+            self.label_latencias.configure(text="Nenhum alerta medido hoje")
+            return
+        
+        linhas = [f"{'Etapa':<20}{'p50':>10}{'p95':>10}{'máx':>10}{'n':>5}"]
+        for etapa, nome in ETAPAS_LATENCIA.items():
+            if etapa in resumo:
+                p50, p95, maximo, n = resumo[etapa]
+                linhas.append(f"{nome:<20}{p50:>8.0f}ms{p95:>8.0f}ms{maximo:>8.0f}ms{n:>5}")
+        self.label_latencias.configure(text="\n".join(linhas))
     
     def atualizar_relogio(self):
         if not self.app_running:
@@ -1627,120 +1851,58 @@ class AgendaPessoal(ctk.CTk):
         if not self.app_running:
             return
         try:
-            hora_atual = datetime.now().strftime("%H:%M")
-            proximo = None
-            for horario in sorted(self.rotina.keys()):
-                if horario > hora_atual and horario not in self.alertas_disparados:
-                    proximo = horario
-                    break
+            proximo = self.core.proximo_alerta()
             
             if proximo:
-                dados = self.rotina[proximo]
-                self.label_proximo.configure(text=f"🕐 {proximo} - {dados['titulo']}")
+                dados = self.core.rotina_do_dia()[proximo]
+                texto = f"🕐 {proximo} - {dados.titulo}"
             else:
-                self.label_proximo.configure(text="✅ Todos os alertas disparados")
+                texto = "✅ Todos os alertas disparados"
+            for dados in self.core.em_andamento():
+                texto += f"\n▶️ Agora: {dados.intervalo} - {dados.titulo}"
+            self.label_proximo.configure(text=texto)
             
+            self.atualizar_label_latencias()
+            self.sincronizar_rotina()  # status "atrasado" muda com o relógio
             self.after(60000, self.atualizar_proximo_alerta)
         except:
             pass
     
     def toggle_alertas(self):
-        self.alertas_ativos = self.switch_alertas.get()
+        self.core.alertas_ativos = self.switch_alertas.get()
     
-    def disparar_alerta(self, horario):
-        if horario not in self.rotina:
+    def disparar_alerta(self, horario, marcacao=None):
+        self.core.medidor_latencia.marcar(marcacao, "tk")
+        if horario not in self.core.rotina_do_dia():
             return
-        dados = self.rotina[horario]
+        dados = self.core.rotina_do_dia()[horario]
+        self.notificador.alerta_visual(dados.titulo, dados.tarefas, dados.cor, marcacao)
+        self.atualizar_label_latencias()
+    
+    def abrir_alerta(self, titulo, tarefas, cor, marcacao=None):
+        """Alerta visual dos backends de notificação: janela que só fecha com senha"""
         self._restaurar_janela_main_thread()
-        AlertaComSenha(self, dados["titulo"], dados["tarefas"], dados["cor"])
+        AlertaComSenha(self, titulo, tarefas, cor, medidor=self.core.medidor_latencia, marcacao=marcacao)
     
     def disparar_alerta_manual(self, horario):
-        if horario not in self.rotina:
+        if horario not in self.core.rotina_do_dia():
             return
-        dados = self.rotina[horario]
-        AlertaComSenha(self, dados["titulo"], dados["tarefas"], dados["cor"])
+        dados = self.core.rotina_do_dia()[horario]
+        AlertaComSenha(self, dados.titulo, dados.tarefas, dados.cor)
     
     def testar_alerta(self):
         self._restaurar_janela_main_thread()
-        AlertaComSenha(
-            self,
-            "🧪 TESTE DE ALERTA",
-            ["✅ Este é um teste", "🔐 Digite a senha para fechar", "🔔 Som repete a cada 10s"],
-            "#00d4ff"
-        )
+        AlertaComSenha(self, *ALERTA_TESTE)
     
     def resetar_alertas(self):
-        self.alertas_disparados.clear()
-        self.salvar_alertas_disparados()
+        self.core.resetar_alertas()
         self.atualizar_proximo_alerta()
         messagebox.showinfo("Resetado", "✅ Alertas resetados!")
     
-    def toggle_item_compra(self, item_key):
-        if item_key in self.itens_marcados:
-            self.itens_marcados.remove(item_key)
-        else:
-            self.itens_marcados.add(item_key)
-        self.salvar_itens_compras()
-    
-    def salvar_alertas_disparados(self):
-        try:
-            dados = {
-                "data": datetime.now().strftime("%Y-%m-%d"),
-                "alertas": list(self.alertas_disparados)
-            }
-            with open(ARQUIVO_ALERTAS, "w") as f:
-                json.dump(dados, f)
-        except:
-            pass
-    
-    def carregar_alertas_disparados(self):
-        try:
-            if os.path.exists(ARQUIVO_ALERTAS):
-                with open(ARQUIVO_ALERTAS, "r") as f:
-                    dados = json.load(f)
-                if dados.get("data") == datetime.now().strftime("%Y-%m-%d"):
-                    self.alertas_disparados = set(dados.get("alertas", []))
-                else:
-                    self.alertas_disparados = set()
-        except:
-            self.alertas_disparados = set()
-    
-    def salvar_itens_compras(self):
-        try:
-            with open(ARQUIVO_COMPRAS, "w", encoding="utf-8") as f:
-                json.dump(list(self.itens_marcados), f, ensure_ascii=False)
-        except:
-            pass
-    
-    def carregar_itens_compras(self):
-        try:
-            if os.path.exists(ARQUIVO_COMPRAS):
-                with open(ARQUIVO_COMPRAS, "r", encoding="utf-8") as f:
-                    self.itens_marcados = set(json.load(f))
-            else:
-                self.itens_marcados = set()
-        except:
-            self.itens_marcados = set()
-    
-    def carregar_lista_compras(self):
-        """Carrega a lista de compras personalizada"""
-        try:
-            if os.path.exists(ARQUIVO_LISTA_COMPRAS):
-                with open(ARQUIVO_LISTA_COMPRAS, "r", encoding="utf-8") as f:
-                    self.lista_compras = json.load(f)
-            else:
-                self.lista_compras = copy.deepcopy(LISTA_COMPRAS_PADRAO)
-                self.salvar_lista_compras()
-        except:
-            self.lista_compras = copy.deepcopy(LISTA_COMPRAS_PADRAO)
-    
-    def salvar_lista_compras(self):
-        """Salva a lista de compras personalizada"""
-        try:
-            with open(ARQUIVO_LISTA_COMPRAS, "w", encoding="utf-8") as f:
-                json.dump(self.lista_compras, f, ensure_ascii=False, indent=2)
-        except:
-            pass
+    def toggle_item_compra(self, categoria, item):
+        self.core.compras.alternar_item(categoria, item)
+        self.lista_compras.atualizar_linha(("item", categoria, item))
+        self.lista_compras.atualizar_linha(("categoria", categoria))
     
     def adicionar_item_lista(self, categoria):
         """Adiciona um item à lista de compras"""
@@ -1751,26 +1913,18 @@ class AgendaPessoal(ctk.CTk):
         texto = dialog.get_input()
         
         if texto and texto.strip():
-            if categoria in self.lista_compras:
-                if texto.strip() not in self.lista_compras[categoria]:
-                    self.lista_compras[categoria].append(texto.strip())
-                    self.salvar_lista_compras()
-                    self.recriar_tab_compras()
+            if categoria in self.core.compras.lista:
+                if self.core.compras.adicionar_item(categoria, texto.strip()):
+                    self.categorias_recolhidas.discard(categoria)
+                    self.sincronizar_compras()
+                    self.lista_compras.rolar_para(("item", categoria, texto.strip()))
                 else:
                     messagebox.showinfo("Info", "Este item já existe na lista!")
     
     def remover_item_lista(self, categoria, item):
         """Remove um item da lista de compras"""
-        if categoria in self.lista_compras:
-            if item in self.lista_compras[categoria]:
-                self.lista_compras[categoria].remove(item)
-                # Remover também dos marcados
-                item_key = f"{categoria}|{item}"
-                if item_key in self.itens_marcados:
-                    self.itens_marcados.remove(item_key)
-                    self.salvar_itens_compras()
-                self.salvar_lista_compras()
-                self.recriar_tab_compras()
+        if self.core.compras.remover_item(categoria, item):
+            self.sincronizar_compras()
     
     def adicionar_categoria(self):
         """Adiciona uma nova categoria"""
@@ -1781,31 +1935,115 @@ class AgendaPessoal(ctk.CTk):
         texto = dialog.get_input()
         
         if texto and texto.strip():
-            if texto.strip() not in self.lista_compras:
-                self.lista_compras[texto.strip()] = []
-                self.salvar_lista_compras()
-                self.recriar_tab_compras()
+            if self.core.compras.adicionar_categoria(texto.strip()):
+                self.sincronizar_compras()
             else:
                 messagebox.showinfo("Info", "Esta categoria já existe!")
     
     def remover_categoria(self, categoria):
         """Remove uma categoria inteira"""
         if messagebox.askyesno("Confirmar", f"Remover a categoria '{categoria}' e todos os itens?"):
-            if categoria in self.lista_compras:
-                # Remover itens marcados dessa categoria
-                itens_remover = [k for k in self.itens_marcados if k.startswith(f"{categoria}|")]
-                for item_key in itens_remover:
-                    self.itens_marcados.remove(item_key)
-                self.salvar_itens_compras()
-                
-                del self.lista_compras[categoria]
-                self.salvar_lista_compras()
-                self.recriar_tab_compras()
+            if self.core.compras.remover_categoria(categoria):
+                self.categorias_recolhidas.discard(categoria)
+                self.sincronizar_compras()
+
+
+def registrar_tempo_inicio():
+    """Grava quanto tempo o processo levou até a janela ficar ociosa"""
+    segundos = time.perf_counter() - INICIO_PROCESSO
+    modo = "exe" if getattr(sys, "frozen", False) else "script"
+    linha = f"{datetime.now():%Y-%m-%d %H:%M:%S}  {modo:<6}  {segundos * 1000:8.1f} ms"
+    print(f"Inicialização: {linha}")
+    try:
+        with open(ARQUIVO_TEMPOS_INICIO, "a", encoding="utf-8") as f:
+            f.write(linha + "\n")
+    except Exception as e:
+        print(f"Erro ao gravar tempo de inicialização: {e}")
+
+
+class RelatorioEtapas:
+    """Medidor do processo de alerta do modo --headless: cada etapa vira uma linha JSON na saída
+    
+    A marcação fica no processo principal, que a completa ao ler as linhas;
+    aqui não há marcação, só a etapa.
+    """
+    
+    @staticmethod
+    def marcar(marcacao, etapa):
+        try:
+            print(json.dumps({"etapa": etapa}), flush=True)
+        except (OSError, ValueError):
+            pass  # o processo principal já saiu
+    
+    def confirmar(self, marcacao):
+        self.marcar(marcacao, "confirmado")
+
+
+class JanelaAlertaAvulsa(ctk.CTk):
+    """Raiz invisível do processo aberto pelo modo --headless para mostrar um único alerta"""
+    
+    def __init__(self, backend_notificacao, pedido):
+        super().__init__()
+        self.withdraw()
+        self.notificador = criar_backend(backend_notificacao)
+        relatorio = RelatorioEtapas()
+        alerta = AlertaComSenha(self, pedido["titulo"], pedido["tarefas"], pedido["cor"],
+                                medidor=relatorio, marcacao=None, ao_confirmar=relatorio.confirmar)
+        alerta.bind("<Destroy>", lambda e: self.after_idle(self.encerrar) if e.widget is alerta else None)
+    
+    def encerrar(self):
+        self.notificador.parar()
+        self.destroy()
 
 
 def main():
-    app = AgendaPessoal()
+    parser = argparse.ArgumentParser(description="Agenda Pessoal - Rotina Diária")
+    parser.add_argument("--medir-inicio", action="store_true",
+                        help=f"grava o tempo até a janela ficar pronta em {ARQUIVO_TEMPOS_INICIO}")
+    parser.add_argument("--notificacao", choices=list(BACKENDS_NOTIFICACAO),
+                        help="backend de som/avisos (padrão: o da plataforma)")
+    parser.add_argument("--armazenamento", choices=list(ARMAZENAMENTOS), default="sqlite",
+                        help="onde guardar os dados (padrão: sqlite; os JSON antigos são importados na primeira vez)")
+    parser.add_argument("--pasta-dados",
+                        help="pasta dos arquivos de dados (padrão: a pasta do aplicativo)")
+    parser.add_argument("--api", type=int, nargs="?", const=PORTA_API, metavar="PORTA",
+                        help=f"serve a API HTTP local em 127.0.0.1 para outros programas (porta padrão: {PORTA_API})")
+    parser.add_argument("--headless", action="store_true",
+                        help="só os alertas, sem janela nem customtkinter (a janela com senha abre ao disparar)")
+    parser.add_argument("--servico", action="store_true",
+                        help="a janela vira cliente do serviço (--headless --bandeja), aberto se preciso; "
+                             "fechá-la encerra só a janela")
+    parser.add_argument("--alerta", action="store_true", help=argparse.SUPPRESS)  # processo de um alerta do --headless
+    parser.add_argument("--janela-do-servico", action="store_true", help=argparse.SUPPRESS)  # aberta pela bandeja do serviço
+    adicionar_opcoes_repasse(parser)
+    args = parser.parse_args()
+    
+    if args.alerta:
+        JanelaAlertaAvulsa(args.notificacao, json.load(sys.stdin)).mainloop()
+        return
+    
+    core = None
+    if args.servico:
+        pasta = args.pasta_dados or pasta_aplicativo()
+        core = CoreRemoto.conectar(pasta)
+        if core is None:
+            comando = comando_app("--headless", "--bandeja", *argumentos_repassados(args))
+            if args.api is not None:
+                comando += ["--api", str(args.api)]
+            abrir_processo(comando)
+            core = CoreRemoto.conectar(pasta, TEMPO_SUBIDA_SERVICO)
+        if core is None:
+            print("Não foi possível conectar ao serviço da agenda.")
+            sys.exit(1)
+    
+    app = AgendaPessoal(args.notificacao, args.armazenamento, args.pasta_dados, args.api, core)
+    if args.medir_inicio:
+        app.after_idle(registrar_tempo_inicio)
+    if args.evento != "mostrar":
+        app.core.eventos.publicar(args.evento)
     app.mainloop()
+    # Se a janela fechou por outro caminho, não perde as gravações pendentes
+    app.core.parar()
 
 
 if __name__ == "__main__":
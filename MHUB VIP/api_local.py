@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - API local (HTTP/JSON)
+Servidor asyncio opcional, só em 127.0.0.1, para outros programas da máquina
+(o MHUB, scripts) lerem e alterarem a rotina do dia e a lista de compras sem
+abrir os arquivos enquanto o app os grava. As rotas seguem o formato da
+/api/v1/tasks do MHUB:
+    
+    GET    /api/v1/tasks[?date=YYYY-MM-DD]   {"tasks": [...]} (id = "HH:MM")
+    POST   /api/v1/tasks                      time, title; opcional: items, period, color, end_time
+    PATCH  /api/v1/tasks/:id                  is_completed e/ou title
+    DELETE /api/v1/tasks/:id
+    GET    /api/v1/shopping                   {"categories": [{"name", "items": [{"name", "checked"}]}]}
+    POST   /api/v1/shopping/items             category, item
+    PATCH  /api/v1/shopping/items             category, item, checked
+
+Erros vêm como {"error": "mensagem"}. Os GET têm ETag, tirada da versão do
+recurso (que muda a cada alteração); com If-None-Match igual a resposta é 304
+sem corpo, sem passar pela thread dona. Fora isso nada roda na thread do
+servidor: cada requisição vira um evento "api" no barramento do núcleo e é
+atendida pela thread dona do estado, como os alertas e as edições externas.
+
+Contra páginas abertas no navegador (CSRF): requisições com Origin são
+recusadas (403), e as que têm corpo (POST, PATCH) precisam de Content-Type
+application/json (415), que um formulário ou um fetch "simples" não mandam
+sem passar pela checagem de CORS. Um DELETE sem corpo, como o do MHUB, não
+precisa: o método já não é "simples", então o navegador nunca o manda de
+outra origem sem a checagem.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import re
+import secrets
+import threading
+from datetime import datetime, date
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from rotina import Horario, para_minutos, duracao_ate, formatar_minutos, MINUTOS_DIA
+
+HOST_API = "127.0.0.1"
+TEMPO_RESPOSTA_DONO = 5.0  # segundos esperando a thread dona antes de responder 503
+TEMPO_OCIOSO_CONEXAO = 30.0  # segundos de keep-alive sem nova requisição
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+MOTIVOS = {200: "OK", 201: "Created", 304: "Not Modified", 400: "Bad Request", 403: "Forbidden",
+           404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 415: "Unsupported Media Type",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErroAPI(Exception):
+    """Erro com código HTTP, respondido como {"error": mensagem}"""
+    
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def etag(chave):
+    return '"' + hashlib.blake2b(chave.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def etag_confere(if_none_match, atual):
+    """If-None-Match (lista separada por vírgulas, fracas aceitas, ou *) inclui a ETag atual?"""
+    if not if_none_match:
+        return False
+    candidatos = [candidato.strip() for candidato in if_none_match.split(",")]
+    return "*" in candidatos or any(candidato.removeprefix("W/") == atual for candidato in candidatos)
+
+
+# ----- Recursos (rodam na thread dona, via barramento) -----
+
+def tarefa_json(core, dados, data, concluidas):
+    return {
+        "id": dados.horario,
+        "title": dados.titulo,
+        "is_completed": bool(concluidas.get(dados.horario, False)),
+        "target_date": data.isoformat(),
+        "time": dados.horario,
+        "end_time": formatar_minutos(dados.fim % MINUTOS_DIA) if dados.duracao else None,
+        "duration_minutes": dados.duracao,
+        "period": dados.periodo,
+        "color": dados.cor,
+        "items": list(dados.tarefas),
+        "variant": core.calendario.origem(data, dados.horario)
+    }
+
+
+def listar_tarefas(core, data=None):
+    hoje = datetime.now().date()
+    data = data or hoje
+    concluidas = core.tarefas_concluidas if data == hoje else core.armazenamento.carregar_conclusoes(data.isoformat())
+    return {"tasks": [tarefa_json(core, horario, data, concluidas) for horario in core.rotina_do_dia(data).horarios()]}
+
+
+def _tarefa_de_hoje(core, id_tarefa):
+    rotina = core.rotina_do_dia()
+    if id_tarefa not in rotina:
+        raise ErroAPI(404, "Tarefa não encontrada")
+    return rotina[id_tarefa]
+
+
+def criar_tarefa(core, corpo):
+    titulo = corpo.get("title")
+    if not isinstance(titulo, str) or not titulo.strip():
+        raise ErroAPI(400, "Campo obrigatório: title")
+    try:
+        minutos = para_minutos(str(corpo.get("time", "")))
+        duracao = duracao_ate(minutos, str(corpo["end_time"])) if corpo.get("end_time") else 0
+    except ValueError:
+        raise ErroAPI(400, "time/end_time inválido (use HH:MM)")
+    itens = corpo.get("items", [])
+    if not isinstance(itens, list) or not all(isinstance(item, str) for item in itens):
+        raise ErroAPI(400, "items deve ser uma lista de textos")
+    horario = Horario(minutos, titulo.strip(), str(corpo.get("period", "MANHÃ")),
+                      str(corpo.get("color", "#FF6B35")), itens, duracao=duracao)
+    core.adicionar_tarefa(horario.horario, horario)
+    return tarefa_json(core, core.rotina_do_dia()[horario.horario], datetime.now().date(), core.tarefas_concluidas)
+
+
+def alterar_tarefa(core, id_tarefa, corpo):
+    dados = _tarefa_de_hoje(core, id_tarefa)
+    if "title" in corpo:
+        if not isinstance(corpo["title"], str) or not corpo["title"].strip():
+            raise ErroAPI(400, "title inválido")
+        novos = dados.copiar()
+        novos.titulo = corpo["title"].strip()
+        core.salvar_edicao(id_tarefa, id_tarefa, novos)
+    if "is_completed" in corpo:
+        core.definir_conclusao(id_tarefa, bool(corpo["is_completed"]))
+    return tarefa_json(core, core.rotina_do_dia()[id_tarefa], datetime.now().date(), core.tarefas_concluidas)
+
+
+def remover_tarefa(core, id_tarefa):
+    _tarefa_de_hoje(core, id_tarefa)
+    core.salvar_edicao(id_tarefa, None, None)
+    return {"deleted": True, "id": id_tarefa}
+
+
+def listar_compras(core):
+    compras = core.compras
+    return {"categories": [
+        {"name": categoria, "items": [{"name": item, "checked": compras.esta_marcado(categoria, item)} for item in itens]}
+        for categoria, itens in compras.lista.items()
+    ]}
+
+
+def _item_do_corpo(corpo):
+    categoria, item = corpo.get("category"), corpo.get("item")
+    if not isinstance(categoria, str) or not isinstance(item, str) or not item.strip():
+        raise ErroAPI(400, "Campos obrigatórios: category, item")
+    return categoria, item.strip()
+
+
+def adicionar_item_compra(core, corpo):
+    categoria, item = _item_do_corpo(corpo)
+    if categoria not in core.compras.lista:
+        raise ErroAPI(404, "Categoria não encontrada")
+    if not core.compras.adicionar_item(categoria, item):
+        raise ErroAPI(400, "Item já existe")
+    return {"category": categoria, "item": item, "checked": False}
+
+
+def marcar_item_compra(core, corpo):
+    categoria, item = _item_do_corpo(corpo)
+    if item not in core.compras.itens_por_categoria.get(categoria, ()):
+        raise ErroAPI(404, "Item não encontrado")
+    if "checked" not in corpo:
+        raise ErroAPI(400, "Campo obrigatório: checked")
+    core.compras.definir_marcado(categoria, item, bool(corpo["checked"]))
+    return {"category": categoria, "item": item, "checked": core.compras.esta_marcado(categoria, item)}
+
+
+def _data_da_consulta(consulta):
+    texto = consulta.get("date", [None])[0]
+    if not texto:
+        return None
+    try:
+        return date.fromisoformat(texto)
+    except ValueError:
+        raise ErroAPI(400, "date inválida (use YYYY-MM-DD)")
+
+
+def versao(core, recurso):
+    """Versão atual do recurso; lida na thread do servidor sem trava (um inteiro)"""
+    return core.versao_rotina if recurso == "rotina" else core.compras.versao
+
+
+# (método, padrão do caminho) -> (função, recurso lido ou alterado; só GET não altera)
+ROTAS = [
+    ("GET", re.compile(r"/api/v1/tasks/?$"), lambda core, consulta, corpo: listar_tarefas(core, _data_da_consulta(consulta)), "rotina"),
+    ("POST", re.compile(r"/api/v1/tasks/?$"), lambda core, consulta, corpo: criar_tarefa(core, corpo), "rotina"),
+    ("PATCH", re.compile(r"/api/v1/tasks/([^/]+)$"), lambda core, consulta, corpo, id_tarefa: alterar_tarefa(core, id_tarefa, corpo), "rotina"),
+    ("DELETE", re.compile(r"/api/v1/tasks/([^/]+)$"), lambda core, consulta, corpo, id_tarefa: remover_tarefa(core, id_tarefa), "rotina"),
+    ("GET", re.compile(r"/api/v1/shopping/?$"), lambda core, consulta, corpo: listar_compras(core), "compras"),
+    ("POST", re.compile(r"/api/v1/shopping/items/?$"), lambda core, consulta, corpo: adicionar_item_compra(core, corpo), "compras"),
+    ("PATCH", re.compile(r"/api/v1/shopping/items/?$"), lambda core, consulta, corpo: marcar_item_compra(core, corpo), "compras"),
+]
+
+
+class ServidorAPI:
+    """Servidor HTTP/1.1 mínimo (keep-alive, Content-Length) num loop asyncio em thread própria
+    
+    executar(funcao) é como as requisições chegam à thread dona: publica
+    ("api", funcao, futuro) no barramento do núcleo e o tratador do núcleo
+    resolve o futuro.
+    """
+    
+    def __init__(self, core, porta, host=HOST_API):
+        self.core = core
+        self.host = host
+        self.porta = porta
+        self._loop = None
+        self._servidor = None
+        self._thread = None
+        self._pronto = threading.Event()
+        self._conexoes = set()  # escritores das conexões abertas (keep-alive), fechados ao parar
+        self._execucao = secrets.token_hex(8)  # as versões recomeçam do zero a cada execução
+        self.erro = None
+        self.requisicoes = 0
+        self.respostas_304 = 0
+    
+    # ----- Ciclo de vida -----
+    
+    def iniciar(self):
+        """Sobe o servidor; retorna False (com o motivo em erro) se a porta não abrir"""
+        if self._thread is not None:
+            return True
+        self._thread = threading.Thread(target=self._rodar, name="api_local", daemon=True)
+        self._thread.start()
+        self._pronto.wait(5)
+        if self.erro is not None:
+            self._thread = None
+            return False
+        return True
+    
+    def parar(self):
+        if self._loop is not None and self._servidor is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._fechar)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _rodar(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._servir())
+        except OSError as e:
+            self.erro = e
+        finally:
+            self._pronto.set()
+            self._loop.close()
+    
+    def _fechar(self):
+        self._servidor.close()
+        for escritor in list(self._conexoes):
+            escritor.close()
+    
+    async def _servir(self):
+        self._servidor = await asyncio.start_server(self._conexao, self.host, self.porta)
+        self.porta = self._servidor.sockets[0].getsockname()[1]  # porta 0 = qualquer livre
+        self._pronto.set()
+        async with self._servidor:
+            try:
+                await self._servidor.serve_forever()
+            except asyncio.CancelledError:
+                pass
+    
+    # ----- HTTP -----
+    
+    async def _conexao(self, leitor, escritor):
+        self._conexoes.add(escritor)
+        try:
+            while True:
+                try:
+                    linha = await asyncio.wait_for(leitor.readline(), TEMPO_OCIOSO_CONEXAO)
+                except asyncio.TimeoutError:
+                    break
+                if not linha.strip():
+                    break
+                metodo, _, resto = linha.decode("latin-1").strip().partition(" ")
+                alvo, _, versao = resto.partition(" ")
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if not linha.strip():
+                        break
+                    nome, _, valor = linha.decode("latin-1").partition(":")
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+                
+                tamanho = int(cabecalhos.get("content-length") or 0)
+                if tamanho > TAMANHO_MAXIMO_CORPO:
+                    await self._responder(escritor, 413, {"error": "Corpo grande demais"}, manter=False)
+                    break
+                corpo = await leitor.readexactly(tamanho) if tamanho else b""
+                manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+                status, resposta, extras = await self._atender(metodo.upper(), alvo, cabecalhos, corpo)
+                await self._responder(escritor, status, resposta, extras, manter)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._conexoes.discard(escritor)
+            escritor.close()
+    
+    async def _responder(self, escritor, status, resposta, extras=None, manter=True):
+        corpo = b"" if resposta is None else resposta
+        if isinstance(corpo, dict):
+            corpo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        linhas = [f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}"]
+        if status != 304:
+            linhas.append("Content-Type: application/json; charset=utf-8")
+        linhas.append(f"Content-Length: {len(corpo)}")
+        linhas.append(f"Connection: {'keep-alive' if manter else 'close'}")
+        for nome, valor in (extras or {}).items():
+            linhas.append(f"{nome}: {valor}")
+        escritor.write(("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + corpo)
+        await escritor.drain()
+    
+    async def _atender(self, metodo, alvo, cabecalhos, corpo):
+        """(status, corpo, cabeçalhos extras) da requisição"""
+        self.requisicoes += 1
+        # Só clientes locais: um nome que não seja o do próprio host é DNS rebinding
+        host = cabecalhos.get("host", "").rsplit(":", 1)[0].strip("[]")
+        if host not in ("127.0.0.1", "localhost", "::1", ""):
+            return 403, {"error": "Host não permitido"}, None
+        # Só navegadores mandam Origin (até "null"): nenhum cliente da API é uma página
+        if "origin" in cabecalhos:
+            return 403, {"error": "Origem não permitida"}, None
+        
+        partes = urlsplit(alvo)
+        caminho = unquote(partes.path)
+        rota = None
+        metodos = set()
+        for metodo_rota, padrao, funcao, recurso in ROTAS:
+            encontrado = padrao.match(caminho)
+            if encontrado:
+                metodos.add(metodo_rota)
+                if metodo_rota == metodo:
+                    rota = (funcao, recurso, encontrado.groups())
+        if rota is None:
+            if metodos:
+                return 405, {"error": "Método não permitido"}, {"Allow": ", ".join(sorted(metodos))}
+            return 404, {"error": "Rota não encontrada"}, None
+        
+        funcao, recurso, argumentos = rota
+        consulta = parse_qs(partes.query)
+        if metodo == "GET":
+            # Versão igual à da ETag do cliente: 304 sem incomodar a thread dona
+            atual = self._etag(recurso, consulta)
+            if etag_confere(cabecalhos.get("if-none-match"), atual):
+                self.respostas_304 += 1
+                return 304, None, {"ETag": atual, "Cache-Control": "no-cache"}
+        elif metodo in ("POST", "PATCH") or corpo:
+            tipo = cabecalhos.get("content-type", "").partition(";")[0].strip().lower()
+            if tipo != "application/json":
+                return 415, {"error": "Use Content-Type: application/json"}, None
+        try:
+            dados = json.loads(corpo) if corpo else {}
+        except ValueError:
+            return 400, {"error": "JSON inválido"}, None
+        if not isinstance(dados, dict):
+            return 400, {"error": "JSON inválido"}, None
+        
+        def executar():
+            # A ETag sai na thread dona junto com a resposta: as duas são do mesmo estado
+            return funcao(self.core, consulta, dados, *argumentos), self._etag(recurso, consulta)
+        
+        futuro = concurrent.futures.Future()
+        self.core.eventos.publicar("api", executar, None if metodo == "GET" else recurso, futuro)
+        try:
+            resultado = await asyncio.wait_for(asyncio.wrap_future(futuro), TEMPO_RESPOSTA_DONO)
+        except asyncio.TimeoutError:
+            return 503, {"error": "O aplicativo não respondeu a tempo"}, None
+        except ErroAPI as e:
+            return e.status, {"error": str(e)}, None
+        except Exception as e:
+            return 500, {"error": str(e)}, None
+        
+        resultado, atual = resultado
+        resposta = json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+        if metodo != "GET":
+            return 201 if metodo == "POST" else 200, resposta, None
+        return 200, resposta, {"ETag": atual, "Cache-Control": "no-cache"}
+    
+    def _etag(self, recurso, consulta):
+        """ETag do GET: versão do recurso, dia de hoje (as tarefas dependem dele) e a data pedida"""
+        data = consulta.get("date", [""])[0] if recurso == "rotina" else ""
+        return etag(f"{self._execucao}|{recurso}|{versao(self.core, recurso)}|{date.today().isoformat()}|{data}")
@@ -0,0 +1,635 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Armazenamento
+Rotina, conclusões, alertas disparados e lista de compras atrás de uma
+interface com operações pequenas (uma linha por alteração), com duas
+implementações: os arquivos JSON de sempre e um banco SQLite em modo WAL
+"""
+
+import copy
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from diario import DiarioEventos
+from persistencia import GravadorAdiado
+
+# Arquivos de dados (nomes dentro da pasta de dados)
+ARQUIVO_ROTINA = "rotina_personalizada.json"
+ARQUIVO_COMPRAS = "itens_compras.json"
+ARQUIVO_LISTA_COMPRAS = "lista_compras.json"
+ARQUIVO_ALERTAS = "alertas_disparados.json"
+ARQUIVO_CONCLUSOES = "tarefas_concluidas.json"
+ARQUIVO_BANCO = "agenda.db"
+
+CAMPOS_HORARIO = ("titulo", "periodo", "cor")
+
+
+def pasta_aplicativo():
+    """Pasta do executável (PyInstaller) ou destes scripts; não depende do cwd"""
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def carregar_json(arquivo, padrao=None):
+    """Lê um arquivo JSON; retorna padrao se não existir ou estiver inválido"""
+    try:
+        if os.path.exists(arquivo):
+            with open(arquivo, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except Exception as e:
+        print(f"Erro ao carregar {arquivo}: {e}")
+    return padrao
+
+
+def chave_compra(categoria, item):
+    return f"{categoria}|{item}"
+
+
+class Armazenamento:
+    """Interface dos armazenamentos; carregar_* retorna None quando não há nada salvo"""
+    
+    nome = "base"
+    
+    # ----- Rotina -----
+    
+    def carregar_rotina(self):
+        raise NotImplementedError
+    
+    def salvar_horario(self, horario, dados):
+        raise NotImplementedError
+    
+    def salvar_horarios(self, horarios):
+        """Inclui ou substitui vários horários ({horario: dados}) de uma vez (importação)"""
+        raise NotImplementedError
+    
+    def remover_horario(self, horario):
+        raise NotImplementedError
+    
+    def substituir_rotina(self, rotina):
+        raise NotImplementedError
+    
+    # ----- Conclusões e alertas do dia -----
+    
+    def carregar_conclusoes(self, data):
+        raise NotImplementedError
+    
+    def definir_conclusao(self, data, horario, concluida):
+        raise NotImplementedError
+    
+    def limpar_conclusoes(self, data):
+        raise NotImplementedError
+    
+    def carregar_alertas(self, data):
+        raise NotImplementedError
+    
+    def adicionar_alerta(self, data, horario):
+        raise NotImplementedError
+    
+    def limpar_alertas(self, data):
+        raise NotImplementedError
+    
+    def confirmar_alerta(self, data, horario, hora):
+        """Registra que o alerta do horário foi fechado com a senha às hora (HH:MM:SS)"""
+        raise NotImplementedError
+    
+    def carregar_historico(self):
+        """Retorna {data: {"conclusoes": {horario: bool}, "alertas": [horario], "confirmados": {horario: hora}}}"""
+        raise NotImplementedError
+    
+    # ----- Compras -----
+    
+    def carregar_compras(self):
+        """Retorna (lista, marcados) com marcados = {(categoria, item)}; lista None se não houver"""
+        raise NotImplementedError
+    
+    def definir_marcado(self, categoria, item, marcado):
+        raise NotImplementedError
+    
+    def adicionar_item(self, categoria, item):
+        raise NotImplementedError
+    
+    def remover_item(self, categoria, item):
+        raise NotImplementedError
+    
+    def adicionar_categoria(self, categoria):
+        raise NotImplementedError
+    
+    def remover_categoria(self, categoria):
+        raise NotImplementedError
+    
+    def substituir_compras(self, lista, marcados):
+        raise NotImplementedError
+    
+    def parar(self):
+        """Grava o que estiver pendente e libera os recursos"""
+
+
+class ArmazenamentoJSON(Armazenamento):
+    """Rotina e compras em arquivos JSON, gravados inteiros (mas adiados e atômicos)
+    
+    Guarda um espelho do que está nos arquivos para montar o novo conteúdo.
+    Conclusões e alertas vão para o diário de eventos (um append por alteração).
+    """
+    
+    nome = "json"
+    
+    def __init__(self, pasta, gravador=None):
+        self.pasta = pasta
+        self.gravador = gravador or GravadorAdiado()
+        self._trava = threading.Lock()
+        self._rotina = None
+        self._lista = None
+        self._marcados = []
+        self.diario = DiarioEventos(pasta)
+        if self.diario.sequencia == 0:
+            self._importar_arquivos_do_dia()
+    
+    def caminho(self, arquivo):
+        return os.path.join(self.pasta, arquivo)
+    
+    # ----- Rotina -----
+    
+    def carregar_rotina(self):
+        with self._trava:
+            self._rotina = carregar_json(self.caminho(ARQUIVO_ROTINA))
+            return copy.deepcopy(self._rotina)
+    
+    def _gravar_rotina(self):
+        self.gravador.marcar(self.caminho(ARQUIVO_ROTINA), copy.deepcopy(self._rotina), indent=2)
+    
+    def salvar_horario(self, horario, dados):
+        with self._trava:
+            if self._rotina is None:
+                self._rotina = {}
+            self._rotina[horario] = copy.deepcopy(dados)
+            self._gravar_rotina()
+    
+    def salvar_horarios(self, horarios):
+        with self._trava:
+            if self._rotina is None:
+                self._rotina = {}
+            self._rotina.update(copy.deepcopy(horarios))
+            self._gravar_rotina()
+    
+    def remover_horario(self, horario):
+        with self._trava:
+            if self._rotina and self._rotina.pop(horario, None) is not None:
+                self._gravar_rotina()
+    
+    def substituir_rotina(self, rotina):
+        with self._trava:
+            self._rotina = copy.deepcopy(rotina)
+            self._gravar_rotina()
+    
+    # ----- Conclusões e alertas (diário de eventos, com o histórico de todos os dias) -----
+    
+    def _importar_arquivos_do_dia(self):
+        """Na primeira vez, leva o dia salvo nos arquivos antigos para o diário"""
+        conclusoes = carregar_json(self.caminho(ARQUIVO_CONCLUSOES), {})
+        for horario, concluida in conclusoes.get("conclusoes", {}).items() if conclusoes.get("data") else ():
+            self.diario.registrar("conclusao", conclusoes["data"], horario=horario, concluida=bool(concluida))
+        alertas = carregar_json(self.caminho(ARQUIVO_ALERTAS), {})
+        for horario in alertas.get("alertas", []) if alertas.get("data") else ():
+            self.diario.registrar("alerta", alertas["data"], horario=horario)
+    
+    def carregar_conclusoes(self, data):
+        return self.diario.dia(data)["conclusoes"]
+    
+    def definir_conclusao(self, data, horario, concluida):
+        self.diario.registrar("conclusao", data, horario=horario, concluida=concluida)
+    
+    def limpar_conclusoes(self, data):
+        self.diario.registrar("limpar_conclusoes", data)
+    
+    def carregar_alertas(self, data):
+        return set(self.diario.dia(data)["alertas"])
+    
+    def adicionar_alerta(self, data, horario):
+        self.diario.registrar("alerta", data, horario=horario)
+    
+    def limpar_alertas(self, data):
+        self.diario.registrar("limpar_alertas", data)
+    
+    def confirmar_alerta(self, data, horario, hora):
+        self.diario.registrar("confirmacao", data, horario=horario, hora=hora)
+    
+    def carregar_historico(self):
+        return self.diario.historico()
+    
+    # ----- Compras -----
+    
+    def carregar_compras(self):
+        lista = carregar_json(self.caminho(ARQUIVO_LISTA_COMPRAS))
+        marcados = carregar_json(self.caminho(ARQUIVO_COMPRAS), [])
+        with self._trava:
+            self._lista = copy.deepcopy(lista)
+            self._marcados = list(marcados)
+        pares = set()
+        for chave in marcados:
+            categoria, _, item = chave.partition("|")
+            pares.add((categoria, item))
+        return lista, pares
+    
+    def _gravar_lista(self):
+        self.gravador.marcar(
+            self.caminho(ARQUIVO_LISTA_COMPRAS),
+            {categoria: list(itens) for categoria, itens in self._lista.items()},
+            indent=2
+        )
+    
+    def _gravar_marcados(self):
+        self.gravador.marcar(self.caminho(ARQUIVO_COMPRAS), list(self._marcados))
+    
+    def definir_marcado(self, categoria, item, marcado):
+        chave = chave_compra(categoria, item)
+        with self._trava:
+            if marcado and chave not in self._marcados:
+                self._marcados.append(chave)
+            elif not marcado and chave in self._marcados:
+                self._marcados.remove(chave)
+            else:
+                return
+            self._gravar_marcados()
+    
+    def adicionar_item(self, categoria, item):
+        with self._trava:
+            self._lista.setdefault(categoria, []).append(item)
+            self._gravar_lista()
+    
+    def remover_item(self, categoria, item):
+        chave = chave_compra(categoria, item)
+        with self._trava:
+            itens = self._lista.get(categoria, [])
+            if item in itens:
+                itens.remove(item)
+                self._gravar_lista()
+            if chave in self._marcados:
+                self._marcados.remove(chave)
+                self._gravar_marcados()
+    
+    def adicionar_categoria(self, categoria):
+        with self._trava:
+            self._lista.setdefault(categoria, [])
+            self._gravar_lista()
+    
+    def remover_categoria(self, categoria):
+        prefixo = chave_compra(categoria, "")
+        with self._trava:
+            self._lista.pop(categoria, None)
+            self._gravar_lista()
+            restantes = [chave for chave in self._marcados if not chave.startswith(prefixo)]
+            if len(restantes) != len(self._marcados):
+                self._marcados = restantes
+                self._gravar_marcados()
+    
+    def substituir_compras(self, lista, marcados):
+        with self._trava:
+            self._lista = copy.deepcopy(lista)
+            self._marcados = [chave_compra(categoria, item) for categoria, item in marcados]
+            self._gravar_lista()
+            self._gravar_marcados()
+    
+    def parar(self):
+        self.diario.parar()
+        self.gravador.parar()
+
+
+ESQUEMA_SQLITE = """
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor TEXT
+);
+CREATE TABLE IF NOT EXISTS horarios (
+    horario TEXT PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    periodo TEXT,
+    cor TEXT,
+    extras TEXT
+);
+CREATE TABLE IF NOT EXISTS tarefas (
+    horario TEXT NOT NULL REFERENCES horarios(horario) ON DELETE CASCADE,
+    posicao INTEGER NOT NULL,
+    texto TEXT NOT NULL,
+    PRIMARY KEY (horario, posicao)
+);
+CREATE TABLE IF NOT EXISTS conclusoes (
+    data TEXT NOT NULL,
+    horario TEXT NOT NULL,
+    concluida INTEGER NOT NULL,
+    PRIMARY KEY (data, horario)
+);
+CREATE TABLE IF NOT EXISTS alertas_disparados (
+    data TEXT NOT NULL,
+    horario TEXT NOT NULL,
+    PRIMARY KEY (data, horario)
+);
+CREATE TABLE IF NOT EXISTS alertas_confirmados (
+    data TEXT NOT NULL,
+    horario TEXT NOT NULL,
+    hora TEXT NOT NULL,
+    PRIMARY KEY (data, horario)
+);
+CREATE TABLE IF NOT EXISTS categorias (
+    categoria TEXT PRIMARY KEY,
+    posicao INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS itens_compra (
+    categoria TEXT NOT NULL REFERENCES categorias(categoria) ON DELETE CASCADE,
+    item TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    marcado INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (categoria, item)
+);
+CREATE INDEX IF NOT EXISTS idx_itens_compra_posicao ON itens_compra (categoria, posicao);
+"""
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """Um arquivo SQLite em modo WAL; cada alteração é uma transação de poucas linhas
+    
+    A conexão é compartilhada entre a interface e a thread do agendador, protegida por uma trava.
+    Com um gravador, rotina e compras também são exportadas para os arquivos
+    JSON de sempre, que continuam sendo onde o usuário edita (e o observador
+    do núcleo mescla) fora do programa.
+    """
+    
+    nome = "sqlite"
+    
+    # Arquivo exportado -> indentação
+    EXPORTACOES = {ARQUIVO_ROTINA: 2, ARQUIVO_LISTA_COMPRAS: 2, ARQUIVO_COMPRAS: None}
+    
+    def __init__(self, caminho, gravador=None, pasta=None):
+        self.caminho = caminho
+        self.pasta = os.path.dirname(caminho) if pasta is None else pasta  # dos JSON exportados
+        self.gravador = gravador
+        self._trava = threading.Lock()
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute("PRAGMA synchronous=NORMAL")  # no WAL continua seguro contra queda do processo
+        self._conexao.execute("PRAGMA foreign_keys=ON")
+        with self._conexao:
+            self._conexao.executescript(ESQUEMA_SQLITE)
+    
+    def _executar(self, *comandos):
+        """Roda os (sql, parametros) numa única transação"""
+        with self._trava, self._conexao:
+            for sql, parametros in comandos:
+                self._conexao.execute(sql, parametros)
+    
+    def _consultar(self, sql, parametros=()):
+        with self._trava:
+            return self._conexao.execute(sql, parametros).fetchall()
+    
+    def obter_meta(self, chave):
+        linhas = self._consultar("SELECT valor FROM meta WHERE chave = ?", (chave,))
+        return linhas[0][0] if linhas else None
+    
+    def definir_meta(self, chave, valor):
+        self._executar(("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)", (chave, valor)))
+    
+    # ----- Exportação para JSON -----
+    
+    def _exportar(self, *arquivos):
+        """Marca os arquivos para exportar; o conteúdo sai do banco só na hora de gravar, na thread do gravador"""
+        if self.gravador is None:
+            return
+        for arquivo in arquivos:
+            self.gravador.marcar(os.path.join(self.pasta, arquivo), functools.partial(self.conteudo_exportado, arquivo),
+                                 indent=self.EXPORTACOES[arquivo])
+    
+    def conteudo_exportado(self, arquivo):
+        """Conteúdo do arquivo JSON equivalente ao banco (formato do ArmazenamentoJSON)"""
+        if arquivo == ARQUIVO_ROTINA:
+            return self.carregar_rotina() or {}
+        if arquivo == ARQUIVO_LISTA_COMPRAS:
+            return self.carregar_compras()[0] or {}
+        return [chave_compra(categoria, item) for categoria, item in self._consultar(
+            "SELECT categoria, item FROM itens_compra WHERE marcado ORDER BY categoria, posicao")]
+    
+    def exportar_json(self):
+        """Exporta tudo o que o banco tem (na abertura: os JSON podem ser de antes do banco)"""
+        if self.obter_meta("rotina") is not None:
+            self._exportar(ARQUIVO_ROTINA)
+        if self.obter_meta("compras") is not None:
+            self._exportar(ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS)
+    
+    # ----- Rotina -----
+    
+    def carregar_rotina(self):
+        horarios = self._consultar("SELECT horario, titulo, periodo, cor, extras FROM horarios ORDER BY horario")
+        if not horarios and self.obter_meta("rotina") is None:
+            return None
+        rotina = {}
+        for horario, titulo, periodo, cor, extras in horarios:
+            dados = json.loads(extras) if extras else {}
+            dados.update(titulo=titulo, periodo=periodo, cor=cor, tarefas=[])
+            rotina[horario] = dados
+        for horario, texto in self._consultar("SELECT horario, texto FROM tarefas ORDER BY horario, posicao"):
+            if horario in rotina:
+                rotina[horario]["tarefas"].append(texto)
+        return rotina
+    
+    @staticmethod
+    def _comandos_horario(horario, dados):
+        extras = {k: v for k, v in dados.items() if k not in CAMPOS_HORARIO and k != "tarefas"}
+        comandos = [
+            ("DELETE FROM tarefas WHERE horario = ?", (horario,)),
+            ("INSERT OR REPLACE INTO horarios (horario, titulo, periodo, cor, extras) VALUES (?, ?, ?, ?, ?)",
+             (horario, dados.get("titulo", ""), dados.get("periodo"), dados.get("cor"),
+              json.dumps(extras, ensure_ascii=False) if extras else None))
+        ]
+        for posicao, texto in enumerate(dados.get("tarefas", [])):
+            comandos.append(("INSERT INTO tarefas (horario, posicao, texto) VALUES (?, ?, ?)", (horario, posicao, texto)))
+        return comandos
+    
+    def salvar_horario(self, horario, dados):
+        self._executar(*self._comandos_horario(horario, dados),
+                       ("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('rotina', '1')", ()))
+        self._exportar(ARQUIVO_ROTINA)
+    
+    def salvar_horarios(self, horarios):
+        comandos = [("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('rotina', '1')", ())]
+        for horario, dados in horarios.items():
+            comandos.extend(self._comandos_horario(horario, dados))
+        self._executar(*comandos)
+        self._exportar(ARQUIVO_ROTINA)
+    
+    def remover_horario(self, horario):
+        self._executar(("DELETE FROM horarios WHERE horario = ?", (horario,)))
+        self._exportar(ARQUIVO_ROTINA)
+    
+    def substituir_rotina(self, rotina):
+        comandos = [("DELETE FROM horarios", ()),
+                    ("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('rotina', '1')", ())]
+        for horario, dados in rotina.items():
+            comandos.extend(self._comandos_horario(horario, dados))
+        self._executar(*comandos)
+        self._exportar(ARQUIVO_ROTINA)
+    
+    # ----- Conclusões e alertas (o histórico de dias anteriores fica no banco) -----
+    
+    def carregar_conclusoes(self, data):
+        linhas = self._consultar("SELECT horario, concluida FROM conclusoes WHERE data = ?", (data,))
+        return {horario: bool(concluida) for horario, concluida in linhas}
+    
+    def definir_conclusao(self, data, horario, concluida):
+        self._executar(("INSERT OR REPLACE INTO conclusoes (data, horario, concluida) VALUES (?, ?, ?)",
+                        (data, horario, int(concluida))))
+    
+    def limpar_conclusoes(self, data):
+        self._executar(("DELETE FROM conclusoes WHERE data = ?", (data,)))
+    
+    def carregar_alertas(self, data):
+        return {h for (h,) in self._consultar("SELECT horario FROM alertas_disparados WHERE data = ?", (data,))}
+    
+    def adicionar_alerta(self, data, horario):
+        self._executar(("INSERT OR IGNORE INTO alertas_disparados (data, horario) VALUES (?, ?)", (data, horario)))
+    
+    def limpar_alertas(self, data):
+        self._executar(("DELETE FROM alertas_disparados WHERE data = ?", (data,)))
+    
+    def confirmar_alerta(self, data, horario, hora):
+        self._executar(("INSERT OR REPLACE INTO alertas_confirmados (data, horario, hora) VALUES (?, ?, ?)",
+                        (data, horario, hora)))
+    
+    def carregar_historico(self):
+        historico = {}
+        
+        def dia(data):
+            return historico.setdefault(data, {"conclusoes": {}, "alertas": [], "confirmados": {}})
+        
+        for data, horario, concluida in self._consultar("SELECT data, horario, concluida FROM conclusoes"):
+            dia(data)["conclusoes"][horario] = bool(concluida)
+        for data, horario in self._consultar("SELECT data, horario FROM alertas_disparados ORDER BY data, horario"):
+            dia(data)["alertas"].append(horario)
+        for data, horario, hora in self._consultar("SELECT data, horario, hora FROM alertas_confirmados"):
+            dia(data)["confirmados"][horario] = hora
+        return historico
+    
+    # ----- Compras -----
+    
+    def carregar_compras(self):
+        categorias = self._consultar("SELECT categoria FROM categorias ORDER BY posicao")
+        if not categorias and self.obter_meta("compras") is None:
+            return None, set()
+        lista = {categoria: [] for (categoria,) in categorias}
+        marcados = set()
+        for categoria, item, marcado in self._consultar(
+                "SELECT categoria, item, marcado FROM itens_compra ORDER BY categoria, posicao"):
+            lista[categoria].append(item)
+            if marcado:
+                marcados.add((categoria, item))
+        return lista, marcados
+    
+    def definir_marcado(self, categoria, item, marcado):
+        self._executar(("UPDATE itens_compra SET marcado = ? WHERE categoria = ? AND item = ?",
+                        (int(marcado), categoria, item)))
+        self._exportar(ARQUIVO_COMPRAS)
+    
+    def adicionar_item(self, categoria, item):
+        self._executar((
+            "INSERT OR IGNORE INTO itens_compra (categoria, item, posicao) "
+            "SELECT ?, ?, COALESCE(MAX(posicao) + 1, 0) FROM itens_compra WHERE categoria = ?",
+            (categoria, item, categoria)
+        ))
+        self._exportar(ARQUIVO_LISTA_COMPRAS)
+    
+    def remover_item(self, categoria, item):
+        self._executar(("DELETE FROM itens_compra WHERE categoria = ? AND item = ?", (categoria, item)))
+        self._exportar(ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS)
+    
+    def adicionar_categoria(self, categoria):
+        self._executar(
+            ("INSERT OR IGNORE INTO categorias (categoria, posicao) "
+             "SELECT ?, COALESCE(MAX(posicao) + 1, 0) FROM categorias", (categoria,)),
+            ("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('compras', '1')", ())
+        )
+        self._exportar(ARQUIVO_LISTA_COMPRAS)
+    
+    def remover_categoria(self, categoria):
+        self._executar(("DELETE FROM categorias WHERE categoria = ?", (categoria,)))
+        self._exportar(ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS)
+    
+    @staticmethod
+    def _comandos_compras(lista, marcados):
+        comandos = [("DELETE FROM categorias", ()),
+                    ("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('compras', '1')", ())]
+        for posicao_categoria, (categoria, itens) in enumerate(lista.items()):
+            comandos.append(("INSERT INTO categorias (categoria, posicao) VALUES (?, ?)", (categoria, posicao_categoria)))
+            for posicao, item in enumerate(itens):
+                comandos.append((
+                    "INSERT OR IGNORE INTO itens_compra (categoria, item, posicao, marcado) VALUES (?, ?, ?, ?)",
+                    (categoria, item, posicao, int((categoria, item) in marcados))
+                ))
+        return comandos
+    
+    def substituir_compras(self, lista, marcados):
+        self._executar(*self._comandos_compras(lista, marcados))
+        self._exportar(ARQUIVO_LISTA_COMPRAS, ARQUIVO_COMPRAS)
+    
+    # ----- Migração -----
+    
+    def migrar_de_json(self, pasta):
+        """Importa os arquivos JSON (e o diário de eventos) numa transação; só roda uma vez por banco
+        
+        Os arquivos JSON ficam onde estão, como cópia de segurança.
+        Retorna True se importou algo.
+        """
+        if self.obter_meta("migrado_json") is not None:
+            return False
+        
+        origem = ArmazenamentoJSON(pasta)
+        rotina = origem.carregar_rotina()
+        lista, marcados = origem.carregar_compras()
+        historico = origem.carregar_historico()
+        origem.parar()
+        
+        comandos = []
+        if rotina is not None:
+            comandos.append(("DELETE FROM horarios", ()))
+            comandos.append(("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('rotina', '1')", ()))
+            for horario, dados in rotina.items():
+                comandos.extend(self._comandos_horario(horario, dados))
+        if lista is not None:
+            comandos.extend(self._comandos_compras(lista, marcados))
+        for data, dia in historico.items():
+            for horario, concluida in dia["conclusoes"].items():
+                comandos.append(("INSERT OR REPLACE INTO conclusoes (data, horario, concluida) VALUES (?, ?, ?)",
+                                 (data, horario, int(bool(concluida)))))
+            for horario in dia["alertas"]:
+                comandos.append(("INSERT OR IGNORE INTO alertas_disparados (data, horario) VALUES (?, ?)",
+                                 (data, horario)))
+            for horario, hora in dia["confirmados"].items():
+                comandos.append(("INSERT OR REPLACE INTO alertas_confirmados (data, horario, hora) VALUES (?, ?, ?)",
+                                 (data, horario, hora)))
+        comandos.append(("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('migrado_json', ?)", (pasta,)))
+        self._executar(*comandos)
+        return len(comandos) > 1
+    
+    def parar(self):
+        # Não fecha a conexão (a thread do agendador ainda pode gravar); só devolve o WAL ao banco
+        with self._trava:
+            self._conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+ARMAZENAMENTOS = {
+    "json": ArmazenamentoJSON,
+    "sqlite": ArmazenamentoSQLite
+}
+
+
+def criar_armazenamento(nome="sqlite", pasta=None, gravador=None):
+    """Abre o armazenamento na pasta de dados; o SQLite importa os JSON na primeira vez e depois os exporta"""
+    pasta = pasta or pasta_aplicativo()
+    if nome == "json":
+        return ArmazenamentoJSON(pasta, gravador)
+    armazenamento = ArmazenamentoSQLite(os.path.join(pasta, ARQUIVO_BANCO), gravador, pasta)
+    if armazenamento.migrar_de_json(pasta):
+        print(f"Dados importados dos arquivos JSON para {armazenamento.caminho}")
+    armazenamento.exportar_json()
+    return armazenamento
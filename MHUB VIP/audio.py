@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Motor de áudio dos alertas
+O clipe é decodificado uma única vez para um pygame.mixer.Sound em memória e
+todos os pedidos de reprodução passam por uma fila atendida por uma só thread
+"""
+
+import os
+import queue
+import threading
+import time
+
+import dependencias
+
+ARQUIVO_AUDIO_ALERTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hey_listen.mp3")
+JANELA_DUPLICATAS_AUDIO = 1.0  # segundos; pedidos repetidos dentro dela são descartados
+
+
+class MotorAudio:
+    """Toca o som de alerta a partir de um buffer pré-carregado, numa thread de reprodução longa"""
+    
+    def __init__(self, caminho=ARQUIVO_AUDIO_ALERTA, janela_duplicatas=JANELA_DUPLICATAS_AUDIO, fallback=None):
+        self.caminho = caminho
+        # fallback() toca algo quando não há pygame/arquivo (fornecido pelo backend de notificação)
+        self.fallback = fallback
+        self.janela_duplicatas = janela_duplicatas
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._thread = None
+        self._ultimo_pedido = None
+        self._som = None
+        self._musica = None
+        self.descartados = 0
+    
+    def iniciar(self):
+        """Sobe a thread de reprodução; o primeiro trabalho dela é decodificar o clipe"""
+        with self._trava:
+            if self._thread is None:
+                self._fila = queue.Queue()  # cada thread tem a sua: a parada de uma não cala a seguinte
+                self._thread = threading.Thread(target=self._loop, args=(self._fila,), daemon=True)
+                self._thread.start()
+    
+    def tocar(self, ao_tocar=None):
+        """Pede a reprodução do som; ao_tocar() é chamado quando ele começa a tocar"""
+        self.iniciar()
+        agora = time.monotonic()
+        with self._trava:
+            duplicado = self._ultimo_pedido is not None and agora - self._ultimo_pedido < self.janela_duplicatas
+            if not duplicado:
+                self._ultimo_pedido = agora
+        
+        if duplicado:
+            # O mesmo som já está tocando: só confirma para quem pediu
+            self.descartados += 1
+            if ao_tocar:
+                ao_tocar()
+            return
+        self._fila.put(ao_tocar or False)  # None é o sinal de parada
+    
+    def parar(self):
+        """Encerra a thread de reprodução; um tocar() depois sobe outra"""
+        with self._trava:
+            if self._thread is not None:
+                self._fila.put(None)
+                self._thread = None
+    
+    def _carregar(self):
+        """Decodifica o arquivo para memória (Sound); cai para mixer.music carregado uma vez"""
+        pygame = dependencias.pygame.obter()
+        if pygame is None:
+            return
+        if not os.path.exists(self.caminho):
+            print(f"Arquivo não encontrado: {self.caminho}")
+            return
+        try:
+            self._som = pygame.mixer.Sound(self.caminho)
+            self._som.set_volume(1.0)  # Volume máximo
+        except Exception as e:
+            print(f"Sound indisponível para {self.caminho} ({e}), usando mixer.music")
+            try:
+                pygame.mixer.music.load(self.caminho)
+                pygame.mixer.music.set_volume(1.0)
+                self._musica = pygame.mixer.music
+            except Exception as e:
+                print(f"Erro ao carregar áudio: {e}")
+    
+    def _reproduzir(self, ao_tocar):
+        if self._som is not None:
+            self._som.stop()
+            self._som.play()
+        elif self._musica is not None:
+            self._musica.play()
+        elif self.fallback:
+            self.fallback()
+        if ao_tocar:
+            ao_tocar()
+    
+    def _loop(self, fila):
+        self._carregar()
+        while True:
+            pedido = fila.get()
+            if pedido is None:
+                break
+            try:
+                self._reproduzir(pedido or None)
+            except Exception as e:
+                print(f"Erro ao tocar áudio: {e}")
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Ícone da bandeja
+Usado pela janela e pelo serviço (--headless --bandeja), que não carrega
+customtkinter: o menu só publica eventos no barramento de quem for o dono do
+estado, com os mesmos nomes nos dois ("mostrar", "testar_alerta",
+"resetar_alertas", "sair"). PIL e pystray vêm de dependencias, sob demanda.
+"""
+
+import threading
+
+import dependencias
+
+# (texto, evento publicado); None é o separador
+MENU_BANDEJA = (
+    ("📋 Abrir Agenda", "mostrar"),
+    ("🔔 Testar Alerta", "testar_alerta"),
+    ("🔄 Resetar Alertas", "resetar_alertas"),
+    None,
+    ("❌ Sair Completamente", "sair"),
+)
+
+ALERTA_TESTE = (
+    "🧪 TESTE DE ALERTA",
+    ["✅ Este é um teste", "🔐 Digite a senha para fechar", "🔔 Som repete a cada 10s"],
+    "#00d4ff"
+)
+
+
+def criar_icone_tray():
+    """Cria um ícone para o system tray"""
+    PIL = dependencias.pil.obter()
+    Image, ImageDraw = PIL.Image, PIL.ImageDraw
+    img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    
+    draw.rounded_rectangle([4, 8, 60, 60], radius=8, fill='#00d4ff')
+    draw.rounded_rectangle([4, 8, 60, 22], radius=8, fill='#E63946')
+    draw.rectangle([4, 15, 60, 22], fill='#E63946')
+    draw.ellipse([12, 4, 20, 12], fill='#333')
+    draw.ellipse([44, 4, 52, 12], fill='#333')
+    draw.line([15, 30, 50, 30], fill='white', width=2)
+    draw.line([15, 40, 50, 40], fill='white', width=2)
+    draw.line([15, 50, 50, 50], fill='white', width=2)
+    draw.line([20, 35, 28, 43], fill='#00ff88', width=3)
+    draw.line([28, 43, 45, 28], fill='#00ff88', width=3)
+    
+    return img
+
+
+def iniciar_bandeja(publicar, dica="📋 Agenda Pessoal - Rodando em segundo plano"):
+    """Mostra o ícone numa thread própria; cada item do menu chama publicar(evento)
+    
+    Retorna o pystray.Icon (para aviso_bandeja e stop()), ou None sem pystray/PIL.
+    """
+    pystray = dependencias.pystray.obter()
+    if pystray is None or dependencias.pil.obter() is None:
+        return None
+    
+    def item(texto, evento):
+        return pystray.MenuItem(texto, lambda icon=None, item=None: publicar(evento), default=evento == "mostrar")
+    
+    menu = [pystray.Menu.SEPARATOR if entrada is None else item(*entrada) for entrada in MENU_BANDEJA]
+    icone = pystray.Icon("agenda_pessoal", criar_icone_tray(), dica, menu=pystray.Menu(*menu))
+    threading.Thread(target=icone.run, daemon=True).start()
+    return icone
@@ -0,0 +1,570 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Benchmarks
+Medições do núcleo e dos backends; as que precisam de tela (estilos) só
+avisam e seguem quando não há uma. Uso:
+    python benchmarks.py            (roda todos)
+    python benchmarks.py alertas    (roda só um)
+Os arquivos de dados são criados numa pasta temporária.
+"""
+
+import contextlib
+import http.client
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from agenda_core import AgendaCore
+from armazenamento import ARMAZENAMENTOS
+from notificacoes import BackendMemoria
+from eventos import BarramentoEventos
+from rotina import ArvoreIntervalos, MINUTOS_DIA
+
+
+@contextlib.contextmanager
+def diretorio_temporario():
+    """Pasta temporária para os arquivos de dados, apagada no fim"""
+    pasta = tempfile.mkdtemp(prefix="agenda_bench_")
+    try:
+        yield pasta
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def benchmark_alertas(n=2000):
+    """Pipeline agendador -> núcleo -> backend em memória, sem Tk nem áudio"""
+    with diretorio_temporario() as pasta:
+        core = AgendaCore(pasta=pasta)
+        backend = BackendMemoria()
+        
+        def ao_alerta(horario, marcacao):
+            dados = core.rotina_do_dia()[horario]
+            core.medidor_latencia.marcar(marcacao, "tk")
+            backend.alerta_visual(dados.titulo, dados.tarefas, dados.cor, marcacao)
+            core.medidor_latencia.marcar(marcacao, "janela")
+            backend.tocar_som(lambda: core.medidor_latencia.marcar(marcacao, "som"))
+        
+        core.ao_alerta = ao_alerta
+        horario = sorted(core.rotina)[0]
+        hora, minuto = map(int, horario.split(":"))
+        base = datetime.now().replace(hour=hora, minute=minuto, second=0, microsecond=0)
+        
+        inicio = time.perf_counter()
+        for i in range(n):
+            # Um dia diferente por alerta, para passar pela deduplicação
+            core.alerta_agendado(horario, base + timedelta(days=i + 1))
+        duracao = time.perf_counter() - inicio
+        core.parar()
+    
+    print(f"alertas: {n} em {duracao * 1000:.0f} ms -> {n / duracao:,.0f} alertas/s "
+          f"({backend.contagens['alerta']} visuais, {backend.contagens['som']} sons, "
+          f"{core.gravador.gravacoes} gravações para {core.gravador.marcacoes} alterações)")
+
+
+def benchmark_armazenamento(n=2000):
+    """Tempo por alteração na thread que chama (marcar item, concluir tarefa) em cada armazenamento"""
+    for nome in ARMAZENAMENTOS:
+        with diretorio_temporario() as pasta:
+            core = AgendaCore(nome, pasta)
+            categoria = next(iter(core.compras.lista))
+            item = core.compras.lista[categoria][0]
+            horario = sorted(core.rotina)[0]
+            
+            inicio = time.perf_counter()
+            for i in range(n):
+                core.compras.alternar_item(categoria, item)
+                core.definir_conclusao(horario, i % 2 == 0)
+            duracao = time.perf_counter() - inicio
+            core.parar()
+        print(f"armazenamento {nome}: {2 * n} alterações em {duracao * 1000:.0f} ms "
+              f"-> {duracao * 1e6 / (2 * n):.0f} µs por alteração")
+
+
+def benchmark_historico(anos=5, horarios=24):
+    """Histórico sintético de vários anos: tamanho do arquivo e tempo das consultas por período"""
+    import random
+    from datetime import date
+    
+    from historico import HistoricoConclusoes
+    
+    aleatorio = random.Random(42)
+    slots = [f"{h:02d}:00" for h in range(horarios)]
+    hoje = date.today()
+    historico = {
+        (hoje - timedelta(days=d)).isoformat(): {
+            "conclusoes": {slot: aleatorio.random() < 0.8 for slot in slots}
+        }
+        for d in range(365 * anos)
+    }
+    
+    with diretorio_temporario() as pasta:
+        arquivo = os.path.join(pasta, "historico.bin")
+        inicio = time.perf_counter()
+        importado = HistoricoConclusoes(arquivo)
+        importado.importar(historico)
+        importado.parar()
+        importacao = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        store = HistoricoConclusoes(arquivo)
+        abertura = time.perf_counter() - inicio
+        tamanho = os.path.getsize(arquivo)
+        
+        desde = hoje - timedelta(days=365)
+        repeticoes = 1000
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            store.taxa("08:00", desde, hoje)
+        taxa_us = (time.perf_counter() - inicio) * 1e6 / repeticoes
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            store.contar_dias_completos()
+        completos_us = (time.perf_counter() - inicio) * 1e6 / repeticoes
+        
+        inicio = time.perf_counter()
+        for i in range(repeticoes):
+            store.definir(hoje, "08:00", i % 2 == 0)
+        escrita_us = (time.perf_counter() - inicio) * 1e6 / repeticoes
+        inicio = time.perf_counter()
+        store.descarregar()
+        gravacao_us = (time.perf_counter() - inicio) * 1e6
+        store.parar()
+    
+    feitos, agendados = store.taxa("08:00", desde, hoje)
+    print(f"historico: {anos} anos x {horarios} horários = {tamanho / 1024:.1f} KB "
+          f"(importação {importacao * 1000:.0f} ms, abertura {abertura * 1000:.1f} ms)")
+    print(f"    taxa 08:00 em 365 dias ({feitos}/{agendados}): {taxa_us:.1f} µs; "
+          f"dias 100% em todo o período ({store.contar_dias_completos()}): {completos_us:.1f} µs; "
+          f"marcar conclusão: {escrita_us:.0f} µs (gravação da linha com fsync, na thread do gravador: "
+          f"{gravacao_us:.0f} µs)")
+
+
+def benchmark_estatisticas(anos=5, repeticoes=20):
+    """Abrir a aba de estatísticas com anos de histórico: cálculo (NumPy) e imagem (PIL), sem ler o armazenamento"""
+    from datetime import date
+    
+    import estatisticas
+    from agenda_core import PERIODOS_DISPONIVEIS
+    from historico import HistoricoConclusoes
+    
+    aleatorio = random.Random(42)
+    hoje = date.today()
+    with diretorio_temporario() as pasta:
+        core = AgendaCore("json", pasta)
+        rotina = core.rotina_do_dia()
+        core.parar()
+        historico = {
+            (hoje - timedelta(days=d)).isoformat(): {
+                "conclusoes": {h: aleatorio.random() < 0.8 for h in rotina.keys()},
+                "confirmados": {h: f"{h[:3]}{aleatorio.randrange(int(h[3:]), 60):02d}:00" for h in rotina.keys()}
+            }
+            for d in range(365 * anos)
+        }
+        store = HistoricoConclusoes(os.path.join(pasta, "historico.bin"))
+        store.importar(historico, agenda=rotina.keys())
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            dados = estatisticas.calcular(store.copiar(), rotina, PERIODOS_DISPONIVEIS, dias=None, hoje=hoje)
+        calculo = (time.perf_counter() - inicio) / repeticoes
+        inicio = time.perf_counter()
+        estatisticas.desenhar(dados)
+        desenho = time.perf_counter() - inicio
+        store.parar()
+    print(f"estatisticas: {anos} anos x {len(rotina.keys())} horários -> cálculo {calculo * 1000:.1f} ms, "
+          f"imagem {desenho * 1000:.0f} ms ({dados['dias']} dias, {len(dados['atrasados'])} horários atrasados)")
+
+
+def benchmark_estilos(reconstrucoes=10):
+    """Reconstruir as abas de rotina e de compras: fontes do registro vs. uma CTkFont por widget (precisa de tela)
+    
+    Mede o tempo de cada reconstrução e quantas fontes o Tk tem registradas
+    (tkinter.font.names()) antes e depois de cada uma.
+    """
+    from sem_janela import tem_tela
+    
+    if not tem_tela():
+        print("estilos: sem tela para o Tk (DISPLAY), nada medido")
+        return
+    import tkinter.font
+    
+    import customtkinter as ctk
+    import agenda_pessoal
+    
+    def fonte_por_widget(tamanho, peso="normal", familia=None):
+        # Como era antes do registro: cada widget criava a sua CTkFont
+        return ctk.CTkFont(family=familia, size=tamanho, weight=peso)
+    
+    with diretorio_temporario() as pasta:
+        try:
+            app = agenda_pessoal.AgendaPessoal(BackendMemoria.nome, pasta_dados=pasta)
+        except Exception as e:
+            print(f"estilos: sem tela para o Tk ({e})")
+            return
+        app.update()
+        aba_compras = app.tabview.tab("🛒 Lista de Compras")
+        abas = {
+            "rotina": (app.tab_rotina, app.criar_tab_rotina),
+            "compras": (aba_compras, lambda: app.criar_tab_compras(aba_compras))
+        }
+        
+        def reconstruir(aba, criar):
+            """(segundos, fontes antes, fontes depois) de uma reconstrução da aba"""
+            for filho in aba.winfo_children():
+                filho.destroy()
+            app.update()
+            antes = len(tkinter.font.names(app))
+            inicio = time.perf_counter()
+            criar()
+            app.update()
+            return time.perf_counter() - inicio, antes, len(tkinter.font.names(app))
+        
+        resultados = {}
+        fonte_registro = agenda_pessoal.fonte
+        try:
+            for caminho, criar_fonte in (("CTkFont por widget", fonte_por_widget), ("registro", fonte_registro)):
+                agenda_pessoal.fonte = criar_fonte
+                for nome, (aba, criar) in abas.items():
+                    medidas = [reconstruir(aba, criar) for _ in range(reconstrucoes)]
+                    resultados[caminho, nome] = (
+                        sum(duracao for duracao, _, _ in medidas) / reconstrucoes,
+                        medidas[0][1],
+                        [depois - antes for _, antes, depois in medidas],
+                        medidas[-1][2]
+                    )
+        finally:
+            agenda_pessoal.fonte = fonte_registro
+            app.encerrar()
+    
+    print(f"estilos: {reconstrucoes} reconstruções de cada aba (tempo médio; fontes do Tk antes -> depois)")
+    for (caminho, nome), (duracao, inicial, novas, final) in resultados.items():
+        print(f"    {nome:8} {caminho:19} {duracao * 1000:6.1f} ms; {inicial} -> {final} fontes "
+              f"(+{max(novas)} por reconstrução, no máximo)")
+
+
+def benchmark_eventos(threads=8, por_thread=5000):
+    """Várias threads publicando ao mesmo tempo enquanto a dona drena em lotes
+    
+    Confere que nenhum evento se perde ou se repete, que a ordem de cada
+    thread é mantida e que o estado só foi tocado pela thread dona.
+    """
+    barramento = BarramentoEventos()
+    dona = threading.current_thread()
+    recebidos = {produtor: [] for produtor in range(threads)}
+    intrusos = []
+    
+    def tratar(produtor, numero):
+        if threading.current_thread() is not dona:
+            intrusos.append(threading.current_thread().name)
+        recebidos[produtor].append(numero)
+    
+    barramento.assinar("teste", tratar)
+    largada = threading.Barrier(threads + 1)
+    
+    def produzir(produtor):
+        largada.wait()
+        for numero in range(por_thread):
+            barramento.publicar("teste", produtor, numero)
+    
+    produtores = [threading.Thread(target=produzir, args=(i,)) for i in range(threads)]
+    for produtor in produtores:
+        produtor.start()
+    largada.wait()
+    inicio = time.perf_counter()
+    drenagens = 0
+    while any(produtor.is_alive() for produtor in produtores) or barramento.pendentes:
+        if barramento.drenar():
+            drenagens += 1
+    duracao = time.perf_counter() - inicio
+    for produtor in produtores:
+        produtor.join()
+    
+    total = threads * por_thread
+    em_ordem = all(numeros == list(range(por_thread)) for numeros in recebidos.values())
+    assert barramento.tratados == total, (barramento.tratados, total)
+    assert em_ordem, "ordem de uma thread não foi mantida"
+    assert not intrusos, f"tratador rodou fora da thread dona: {intrusos[:3]}"
+    print(f"eventos: {total} de {threads} threads em {duracao * 1000:.0f} ms -> {total / duracao:,.0f} eventos/s, "
+          f"{drenagens} drenagens (maior lote {barramento.maior_lote}), nenhum perdido, ordem mantida")
+
+
+def benchmark_intervalos(eventos=50000, consultas=20000):
+    """Calendário grande (um ano de eventos importados): árvore de intervalos vs. varrer todos"""
+    aleatorio = random.Random(20)
+    minutos_ano = 365 * MINUTOS_DIA
+    intervalos = []
+    for i in range(eventos):
+        inicio = aleatorio.randrange(minutos_ano)
+        intervalos.append((inicio, inicio + aleatorio.choice((1, 15, 30, 60, 90, 240)), i))
+    comeco = time.perf_counter()
+    arvore = ArvoreIntervalos(intervalos)
+    montagem = time.perf_counter() - comeco
+    pontos = [aleatorio.randrange(minutos_ano) for _ in range(consultas)]
+    
+    comeco = time.perf_counter()
+    pela_arvore = [arvore.em(ponto) for ponto in pontos]
+    tempo_arvore = time.perf_counter() - comeco
+    
+    amostra = pontos[:100]  # a varredura é lenta demais para todas as consultas
+    comeco = time.perf_counter()
+    varrendo = [[i for inicio, fim, i in intervalos if inicio <= ponto < fim] for ponto in amostra]
+    tempo_varredura = (time.perf_counter() - comeco) / len(amostra) * consultas
+    assert [sorted(achados) for achados in pela_arvore[:len(amostra)]] == [sorted(achados) for achados in varrendo]
+    print(f"intervalos: {eventos} eventos, árvore montada em {montagem * 1000:.0f} ms; {consultas} consultas "
+          f"\"em andamento\" em {tempo_arvore * 1000:.0f} ms (varrendo: ~{tempo_varredura * 1000:.0f} ms, "
+          f"{tempo_varredura / tempo_arvore:.0f}x), mesmos resultados")
+
+
+def benchmark_importacao(eventos=20000):
+    """Calendário .ics com milhares de eventos: leitura em fluxo, pico de memória e gravação única"""
+    aleatorio = random.Random(21)
+    for nome in ARMAZENAMENTOS:
+        with diretorio_temporario() as pasta:
+            arquivo = os.path.join(pasta, "calendario.ics")
+            with open(arquivo, "w", encoding="utf-8", newline="") as f:
+                f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+                for i in range(eventos):
+                    hora, minuto = aleatorio.randrange(5, 23), aleatorio.choice((0, 15, 30, 45))
+                    f.write(f"BEGIN:VEVENT\r\nUID:{i}\r\nSUMMARY:Evento {hora:02d}:{minuto:02d}\r\n"
+                            f"DTSTART:2026{i % 12 + 1:02d}{i % 28 + 1:02d}T{hora:02d}{minuto:02d}00\r\n"
+                            f"DURATION:PT30M\r\nDESCRIPTION:Item um\\nItem dois\r\nEND:VEVENT\r\n")
+                f.write("END:VCALENDAR\r\n")
+            core = AgendaCore(nome, pasta)
+            core.iniciar_observador()  # como no app: a importação não pode voltar como mudança externa
+            recalculos = []
+            core.calendario.invalidar = lambda original=core.calendario.invalidar: (recalculos.append(1), original())
+            
+            inicio = time.perf_counter()
+            resumo = core.importar_rotina(arquivo)
+            duracao = time.perf_counter() - inicio
+            tracemalloc.start()  # de novo só a leitura, medindo a memória (o tracemalloc deixa tudo mais lento)
+            core.ler_importacao(arquivo)
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            tamanho = os.path.getsize(arquivo)
+            core.parar()
+        print(f"importacao {nome}: {resumo['eventos']} eventos ({tamanho / 1024 / 1024:.1f} MiB) em {duracao * 1000:.0f} ms, "
+              f"pico {pico / 1024:.0f} KiB, {len(resumo['novos'])} horários novos, {resumo['repetidos']} repetidos, "
+              f"{len(recalculos)} recálculo(s) da rotina")
+
+
+def benchmark_api(n=500):
+    """Cliente consultando GET /api/v1/tasks: respostas completas vs. 304 com If-None-Match"""
+    with diretorio_temporario() as pasta:
+        core = AgendaCore("sqlite", pasta)
+        acordar = threading.Event()
+        core.eventos.despertar = acordar.set
+        api = core.iniciar_api(0)
+        medidas = {}
+        
+        def consultar():
+            conexao = http.client.HTTPConnection(api.host, api.porta)
+            for nome, cabecalhos in (("completa", {}), ("304", None)):
+                recebidos = 0
+                inicio = time.perf_counter()
+                for _ in range(n):
+                    conexao.request("GET", "/api/v1/tasks", headers=cabecalhos or {})
+                    resposta = conexao.getresponse()
+                    recebidos += len(resposta.read())
+                    if cabecalhos is None:
+                        cabecalhos = {"If-None-Match": resposta.getheader("ETag")}
+                medidas[nome] = (time.perf_counter() - inicio, recebidos)
+            conexao.close()
+        
+        cliente = threading.Thread(target=consultar)
+        cliente.start()
+        while cliente.is_alive():  # esta thread faz o papel da dona do estado
+            acordar.wait(0.1)
+            acordar.clear()
+            core.eventos.drenar_tudo()
+        core.parar()
+    for nome, (duracao, recebidos) in medidas.items():
+        print(f"api {nome}: {n} GET em {duracao * 1000:.0f} ms -> {n / duracao:,.0f} req/s, "
+              f"{recebidos / n:,.0f} bytes de corpo por resposta")
+    print(f"api: {api.respostas_304} respostas 304")
+
+
+def _memoria_residente(pid):
+    """VmRSS do processo em MB (Linux)"""
+    with open(f"/proc/{pid}/status") as f:
+        for linha in f:
+            if linha.startswith("VmRSS:"):
+                return int(linha.split()[1]) / 1024
+    return None
+
+
+# O que o --headless importa, na ordem em que importa (python -X importtime)
+IMPORTS_HEADLESS = ("argparse", "tempfile", "multiprocessing.connection", "sqlite3", "agenda_core", "servico",
+                    "sem_janela")
+
+
+def _medir_imports(modulos):
+    """Em outro processo: [(módulo, MB a mais de memória residente)], começando pelo interpretador sozinho"""
+    import subprocess
+    
+    codigo = ("import importlib, sys; sys.path.insert(0, sys.argv[1]); status = lambda: open('/proc/self/status').read()\n"
+              "rss = lambda: int(next(l for l in status().splitlines() if l.startswith('VmRSS:')).split()[1])\n"
+              "print(rss())\n"
+              "for nome in sys.argv[2:]:\n"
+              "    importlib.import_module(nome)\n"
+              "    print(rss())")
+    saida = subprocess.run([sys.executable, "-c", codigo, os.path.dirname(os.path.abspath(__file__)), *modulos],
+                           capture_output=True, text=True, check=True).stdout
+    valores = [int(linha) / 1024 for linha in saida.split()]
+    return [("python", valores[0])] + [(nome, depois - antes)
+                                        for nome, antes, depois in zip(modulos, valores, valores[1:])]
+
+
+def _memoria_janela(pasta, espera):
+    """Roda no processo medido: janela de verdade com as abas de rotina, estatísticas e compras montadas"""
+    import agenda_pessoal
+    
+    app = agenda_pessoal.AgendaPessoal(BackendMemoria.nome, pasta_dados=pasta)
+    for aba in ("📅 Rotina do Dia", agenda_pessoal.TAB_ESTATISTICAS, "🛒 Lista de Compras"):
+        app.tabview.set(aba)
+        app.ao_trocar_tab()
+        app.update()
+    
+    def medir():
+        print(f"{_memoria_residente(os.getpid()):.1f}", flush=True)
+        app.encerrar()
+    
+    app.after(int(espera * 1000), medir)  # depois do aquecimento (som, bandeja) que a janela agenda
+    app.mainloop()
+
+
+def benchmark_memoria(espera=5.0):
+    """Memória residente do modo --headless vs. a janela com as três abas montadas (só Linux)"""
+    import subprocess
+    from sem_janela import tem_tela
+    from servico import SCRIPT_APP
+    
+    if not os.path.exists("/proc/self/status"):
+        print("memoria: precisa do /proc (Linux)")
+        return
+    with diretorio_temporario() as pasta:
+        headless = subprocess.Popen([sys.executable, SCRIPT_APP, "--headless", "--pasta-dados", pasta],
+                                    stdout=subprocess.PIPE, text=True, encoding="utf-8")
+        for linha in headless.stdout:
+            if linha.startswith("Agenda rodando"):
+                break
+        rss_headless = _memoria_residente(headless.pid)
+        with open(f"/proc/{headless.pid}/maps") as f:
+            modulos = f.read()
+        headless.terminate()
+        headless.wait()
+        
+        if tem_tela():
+            medir = ("import sys; sys.path.insert(0, sys.argv[1]); import benchmarks; "
+                     "benchmarks._memoria_janela(sys.argv[2], float(sys.argv[3]))")
+            saida = subprocess.run([sys.executable, "-c", medir, os.path.dirname(os.path.abspath(__file__)),
+                                    pasta, str(espera)], capture_output=True, text=True)
+            if saida.returncode == 0 and saida.stdout.split():
+                janela = f"janela com as três abas {float(saida.stdout.split()[-1]):.1f} MB"
+            else:
+                erro = (saida.stderr.strip().splitlines() or ["sem saída"])[-1]
+                janela = f"janela não medida ({erro})"
+        else:
+            # Sem tela não há janela para medir; importar a interface (customtkinter, Tk, pygame, PIL) dá um piso
+            interface = sum(mb for _, mb in _medir_imports(("agenda_pessoal",)))
+            janela = f"janela não medida (sem tela), só importar a interface {interface:.1f} MB"
+    carregadas = [nome for nome in ("libtk", "libtcl", "SDL", "_imaging") if nome in modulos]
+    print(f"memoria: --headless {rss_headless:.1f} MB, {janela}; "
+          f"bibliotecas de interface no --headless: {', '.join(carregadas) or 'nenhuma'}")
+    partes = _medir_imports(IMPORTS_HEADLESS)
+    importado = sum(mb for _, mb in partes)
+    print(f"    piso do --headless por import: python {partes[0][1]:.1f}, "
+          + ", ".join(f"{nome} {mb:+.1f}" for nome, mb in partes[1:])
+          + f" = {importado:.1f} MB; o resto ({rss_headless - importado:.1f} MB) é das threads e dos dados em uso")
+
+
+def benchmark_servico(n=500):
+    """Janela como cliente do serviço: tempo até conectar e receber o estado, e custo de cada chamada"""
+    import subprocess
+    from servico import CoreRemoto, comando_app
+    
+    with diretorio_temporario() as pasta:
+        servico = subprocess.Popen(comando_app("--headless", "--pasta-dados", pasta), stdout=subprocess.DEVNULL)
+        try:
+            CoreRemoto.conectar(pasta, 10).parar()  # espera o serviço subir
+            inicio = time.perf_counter()
+            cliente = CoreRemoto.conectar(pasta)
+            conexao = time.perf_counter() - inicio
+            horario = cliente.rotina_do_dia().keys()[0]
+            
+            inicio = time.perf_counter()
+            for _ in range(n):
+                cliente.proximo_alerta()
+            leitura = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            for i in range(n):
+                cliente.definir_conclusao(horario, i % 2 == 0)  # responde depois de mandar o estado novo
+            escrita = time.perf_counter() - inicio
+            cliente.parar()
+        finally:
+            servico.terminate()
+            servico.wait()
+    print(f"servico: conexão + estado em {conexao * 1000:.1f} ms; chamada de leitura {leitura * 1e6 / n:.0f} µs, "
+          f"alteração com estado novo {escrita * 1e6 / n:.0f} µs")
+
+
+def benchmark_instancia(n=10, repasses=200):
+    """Segunda execução do app com uma instância rodando: tempo até repassar o pedido e sair"""
+    import subprocess
+    from instancia import repassar_evento
+    from servico import CoreRemoto, comando_app
+    
+    with diretorio_temporario() as pasta:
+        instancia = subprocess.Popen(comando_app("--headless", "--pasta-dados", pasta), stdout=subprocess.DEVNULL)
+        try:
+            CoreRemoto.conectar(pasta, 10).parar()  # espera a instância subir
+            inicio = time.perf_counter()
+            for _ in range(n):
+                subprocess.run([sys.executable, "-c", "pass"], check=True)
+            interpretador = (time.perf_counter() - inicio) / n
+            inicio = time.perf_counter()
+            for _ in range(n):
+                subprocess.run(comando_app("--pasta-dados", pasta, "--resetar-alertas"), check=True)
+            segunda = (time.perf_counter() - inicio) / n
+            inicio = time.perf_counter()
+            for _ in range(repasses):
+                repassar_evento(pasta, "resetar_alertas")
+            repasse = (time.perf_counter() - inicio) / repasses
+        finally:
+            instancia.terminate()
+            instancia.wait()
+    print(f"instancia: segunda execução repassa e sai em {segunda * 1000:.0f} ms "
+          f"(só o interpretador: {interpretador * 1000:.0f} ms); repasse pelo socket {repasse * 1e6:.0f} µs")
+
+
+BENCHMARKS = {
+    "alertas": benchmark_alertas,
+    "armazenamento": benchmark_armazenamento,
+    "historico": benchmark_historico,
+    "estatisticas": benchmark_estatisticas,
+    "eventos": benchmark_eventos,
+    "intervalos": benchmark_intervalos,
+    "importacao": benchmark_importacao,
+    "api": benchmark_api,
+    "memoria": benchmark_memoria,
+    "servico": benchmark_servico,
+    "instancia": benchmark_instancia,
+    "estilos": benchmark_estilos
+}
+
+
+def main():
+    nomes = sys.argv[1:] or list(BENCHMARKS)
+    for nome in nomes:
+        BENCHMARKS[nome]()
+
+
+if __name__ == "__main__":
+    main()
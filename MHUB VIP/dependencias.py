@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Dependências carregadas sob demanda
+pygame, pystray, PIL, winsound e NumPy só são importados (e inicializados) no
+primeiro uso ou pelo aquecimento em segundo plano, e depois reaproveitados
+"""
+
+import importlib
+import threading
+import time
+
+
+class DependenciaPreguicosa:
+    """Importa e inicializa um módulo pesado uma única vez, no primeiro obter()"""
+    
+    def __init__(self, nome, carregar):
+        self.nome = nome
+        self._carregar = carregar
+        self._trava = threading.Lock()
+        self._valor = None
+        self._carregado = False
+        self.erro = None
+        self.tempo_ms = None
+    
+    def obter(self):
+        """Retorna o módulo carregado, ou None se não estiver disponível"""
+        if self._carregado:
+            return self._valor
+        with self._trava:
+            if not self._carregado:
+                inicio = time.perf_counter()
+                try:
+                    self._valor = self._carregar()
+                except Exception as e:
+                    self.erro = e
+                    print(f"{self.nome} indisponível: {e}")
+                self.tempo_ms = (time.perf_counter() - inicio) * 1000
+                self._carregado = True
+        return self._valor
+    
+    @property
+    def carregado(self):
+        return self._carregado
+
+
+def _carregar_pygame():
+    pygame = importlib.import_module("pygame")
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return pygame
+
+
+def _carregar_pil():
+    importlib.import_module("PIL.Image")
+    importlib.import_module("PIL.ImageDraw")
+    return importlib.import_module("PIL")
+
+
+pygame = DependenciaPreguicosa("pygame", _carregar_pygame)
+pil = DependenciaPreguicosa("PIL", _carregar_pil)
+pystray = DependenciaPreguicosa("pystray", lambda: importlib.import_module("pystray"))
+winsound = DependenciaPreguicosa("winsound", lambda: importlib.import_module("winsound"))
+# Estatísticas (NumPy + PIL.ImageTk): só carregadas ao abrir a aba
+estatisticas = DependenciaPreguicosa("estatisticas", lambda: importlib.import_module("estatisticas"))
+
+
+def aquecer_em_background(*dependencias):
+    """Carrega as dependências numa thread daemon, na ordem dada, sem travar a interface"""
+    def _aquecer():
+        for dependencia in dependencias:
+            dependencia.obter()
+    
+    thread = threading.Thread(target=_aquecer, daemon=True)
+    thread.start()
+    return thread
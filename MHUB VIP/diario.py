@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Diário de eventos
+Conclusões e alertas (disparados e confirmados) viram uma linha JSON anexada
+ao fim de um arquivo; o estado é refeito a partir do último snapshot mais as
+linhas seguintes, e o diário é compactado num novo snapshot em segundo plano
+"""
+
+import json
+import os
+import threading
+
+from persistencia import gravar_json_atomico
+
+ARQUIVO_DIARIO = "eventos.jsonl"
+ARQUIVO_SNAPSHOT = "eventos_snapshot.json"
+EVENTOS_POR_COMPACTACAO = 500  # eventos anexados desde o último snapshot que disparam a compactação
+
+
+def dia_vazio():
+    return {"conclusoes": {}, "alertas": [], "confirmados": {}}
+
+
+def aplicar_evento(dias, evento):
+    """Aplica um evento ao estado {data: dia}; reaplicar o mesmo evento não muda o resultado"""
+    tipo = evento["tipo"]
+    dia = dias.setdefault(evento["data"], dia_vazio())
+    if tipo == "conclusao":
+        dia["conclusoes"][evento["horario"]] = evento["concluida"]
+    elif tipo == "limpar_conclusoes":
+        dia["conclusoes"].clear()
+    elif tipo == "alerta":
+        if evento["horario"] not in dia["alertas"]:
+            dia["alertas"].append(evento["horario"])
+    elif tipo == "limpar_alertas":
+        dia["alertas"].clear()
+    elif tipo == "confirmacao":
+        dia["confirmados"][evento["horario"]] = evento["hora"]
+
+
+class DiarioEventos:
+    """Diário só de acréscimo (JSONL) com snapshots; cada registrar() é um append de uma linha
+    
+    Cada evento leva um número de sequência; o snapshot guarda o último que ele
+    já contém, e a reexecução pula os anteriores.
+    """
+    
+    def __init__(self, pasta, eventos_por_compactacao=EVENTOS_POR_COMPACTACAO):
+        self.arquivo = os.path.join(pasta, ARQUIVO_DIARIO)
+        self.arquivo_snapshot = os.path.join(pasta, ARQUIVO_SNAPSHOT)
+        self.eventos_por_compactacao = eventos_por_compactacao
+        self._trava = threading.Lock()
+        self._compactando = None
+        self._saida = None
+        self.dias = {}
+        self.sequencia = 0
+        self.eventos_desde_snapshot = 0
+        self.abrir()
+    
+    @property
+    def _segmento_antigo(self):
+        """Diário sendo compactado (renomeado antes de o snapshot ser gravado)"""
+        return self.arquivo + ".1"
+    
+    def abrir(self):
+        """Carrega o snapshot e reaplica os eventos posteriores a ele"""
+        snapshot = {}
+        try:
+            if os.path.exists(self.arquivo_snapshot):
+                with open(self.arquivo_snapshot, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+        except Exception as e:
+            print(f"Erro ao carregar {self.arquivo_snapshot}: {e}")
+        self.dias = snapshot.get("dias", {})
+        self.sequencia = snapshot.get("sequencia", 0)
+        
+        self.eventos_desde_snapshot = 0
+        for arquivo in (self._segmento_antigo, self.arquivo):
+            self.eventos_desde_snapshot += self._reaplicar(arquivo)
+        
+        if os.path.exists(self._segmento_antigo):
+            # Caiu no meio de uma compactação: o estado já reaplicado cobre os dois arquivos
+            gravar_json_atomico(self.arquivo_snapshot, {"sequencia": self.sequencia, "dias": self.dias})
+            open(self.arquivo, "w", encoding="utf-8").close()
+            os.remove(self._segmento_antigo)
+            self.eventos_desde_snapshot = 0
+    
+    def _reaplicar(self, arquivo):
+        if not os.path.exists(arquivo):
+            return 0
+        reaplicados = 0
+        valido = 0  # bytes até o fim da última linha inteira
+        with open(arquivo, "r+b") as f:
+            for numero, linha in enumerate(f, 1):
+                try:
+                    evento = json.loads(linha.decode("utf-8"))
+                except ValueError:
+                    # Linha cortada por uma queda no meio do append: descarta dela em diante
+                    print(f"Linha {numero} inválida em {arquivo}, descartando o restante")
+                    f.truncate(valido)
+                    break
+                valido += len(linha)
+                if evento["seq"] <= self.sequencia:
+                    continue
+                aplicar_evento(self.dias, evento)
+                self.sequencia = evento["seq"]
+                reaplicados += 1
+        return reaplicados
+    
+    def registrar(self, tipo, data, **dados):
+        """Anexa o evento ao diário e aplica ao estado em memória"""
+        with self._trava:
+            self.sequencia += 1
+            evento = {"seq": self.sequencia, "tipo": tipo, "data": data, **dados}
+            aplicar_evento(self.dias, evento)
+            if self._saida is None:
+                # Aberto só no primeiro evento: sem eventos, nenhum arquivo é criado
+                self._saida = open(self.arquivo, "a", encoding="utf-8")
+            self._saida.write(json.dumps(evento, ensure_ascii=False) + "\n")
+            self._saida.flush()
+            self.eventos_desde_snapshot += 1
+            compactar = self.eventos_desde_snapshot >= self.eventos_por_compactacao
+        if compactar:
+            self.compactar_em_background()
+    
+    def dia(self, data):
+        """Cópia do estado de um dia"""
+        with self._trava:
+            dia = self.dias.get(data) or dia_vazio()
+            return {
+                "conclusoes": dict(dia["conclusoes"]),
+                "alertas": list(dia["alertas"]),
+                "confirmados": dict(dia["confirmados"])
+            }
+    
+    def historico(self):
+        """Cópia de todos os dias registrados"""
+        with self._trava:
+            return json.loads(json.dumps(self.dias))
+    
+    # ----- Compactação -----
+    
+    def compactar_em_background(self):
+        with self._trava:
+            if self._compactando is not None and self._compactando.is_alive():
+                return
+            self._compactando = threading.Thread(target=self.compactar, daemon=True)
+            self._compactando.start()
+    
+    def compactar(self):
+        """Grava um snapshot com todo o estado e descarta o diário que ele cobre
+        
+        O diário atual é renomeado e um novo começa antes de o snapshot ser
+        gravado, então os appends não esperam pela gravação.
+        """
+        with self._trava:
+            if self._saida is None or os.path.exists(self._segmento_antigo):
+                return
+            self._saida.close()
+            os.replace(self.arquivo, self._segmento_antigo)
+            self._saida = open(self.arquivo, "a", encoding="utf-8")
+            snapshot = {"sequencia": self.sequencia, "dias": json.loads(json.dumps(self.dias))}
+            self.eventos_desde_snapshot = 0
+        
+        try:
+            gravar_json_atomico(self.arquivo_snapshot, snapshot)
+            os.remove(self._segmento_antigo)
+        except Exception as e:
+            print(f"Erro ao compactar {self.arquivo}: {e}")
+    
+    def parar(self):
+        if self._compactando is not None:
+            self._compactando.join(timeout=5)
+        with self._trava:
+            if self._saida is not None:
+                self._saida.close()
+                self._saida = None
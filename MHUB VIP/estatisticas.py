@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Estatísticas da rotina
+Sequências, aderência por horário, mapa dia da semana x horário e os horários
+mais perdidos/atrasados, calculados com NumPy sobre a matriz dias x horários
+do histórico em bitsets e desenhados numa única imagem
+"""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageTk
+
+from estilos import COR_FUNDO_CARD, COR_FUNDO_LISTA, COR_DESTAQUE, COR_SUCESSO, COR_PERIGO, cor_periodo
+
+DIAS_SEMANA = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+MINUTOS_ATRASO = 15  # confirmação do alerta depois disso conta como atrasada
+TOP_HORARIOS = 5
+
+
+def _recorte(copia, horarios, inicio=None, fim=None):
+    """(datas, linhas[D, bytes], colunas, presentes) da cópia do histórico, só com os dias do período"""
+    primeiro_dia, dias, capacidade, colunas, linhas = copia
+    if primeiro_dia is None or not dias:
+        return None
+    linhas = np.frombuffer(linhas, dtype=np.uint8).reshape(dias, -1)
+    datas = np.datetime64(primeiro_dia, "D") + np.arange(dias)
+    
+    selecao = np.ones(dias, dtype=bool)
+    if inicio is not None:
+        selecao &= datas >= np.datetime64(inicio, "D")
+    if fim is not None:
+        selecao &= datas <= np.datetime64(fim, "D")
+    
+    indice = {h: i for i, h in enumerate(colunas)}
+    presentes = np.array([h in indice for h in horarios], dtype=bool)
+    origem = np.array([indice.get(h, 0) for h in horarios], dtype=np.intp)
+    return datas[selecao], linhas[selecao], origem, presentes
+
+
+def matriz_conclusoes(copia, horarios, inicio=None, fim=None):
+    """Recorta a cópia do histórico em (datas, concluidos[D, S], agendados[D, S]) para os horários dados
+    
+    Horários que o histórico não conhece viram colunas vazias.
+    """
+    recorte = _recorte(copia, horarios, inicio, fim)
+    if recorte is None:
+        vazio = np.zeros((0, len(horarios)), dtype=bool)
+        return np.array([], dtype="datetime64[D]"), vazio, vazio
+    datas, linhas, origem, presentes = recorte
+    n = copia[2] // 8
+    bits = np.unpackbits(linhas[:, :2 * n].reshape(len(datas), 2, n), axis=2, bitorder="little").astype(bool)
+    concluidos = bits[:, 0][:, origem] & presentes
+    agendados = bits[:, 1][:, origem] & presentes
+    return datas, concluidos, agendados
+
+
+def matriz_atrasos(copia, horarios, inicio=None, fim=None):
+    """Minutos de atraso da confirmação de cada alerta [D, S]; NaN onde não houve confirmação"""
+    recorte = _recorte(copia, horarios, inicio, fim)
+    if recorte is None:
+        return np.zeros((0, len(horarios)))
+    datas, linhas, origem, presentes = recorte
+    bytes_atraso = linhas[:, 2 * (copia[2] // 8):][:, origem]
+    return np.where((bytes_atraso > 0) & presentes, bytes_atraso.astype(float) - 1, np.nan)
+
+
+def maior_sequencia(dias_ok):
+    """(atual, recorde) de dias seguidos True; o último dia só quebra a atual se já tiver falhado"""
+    if not len(dias_ok):
+        return 0, 0
+    bordas = np.diff(np.concatenate(([0], dias_ok.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1)
+    fins = np.flatnonzero(bordas == -1)
+    recorde = int((fins - inicios).max()) if len(inicios) else 0
+    atual = int(fins[-1] - inicios[-1]) if len(fins) and fins[-1] == len(dias_ok) else 0
+    return atual, recorde
+
+
+def calcular(copia, rotina, periodos, dias=None, hoje=None):
+    """Todas as estatísticas do período (últimos `dias`, ou tudo) para os horários da rotina atual
+    
+    Os horários seguem a ordem da aba Rotina: agrupados por período e depois pela hora.
+    """
+    hoje = hoje or date.today()
+    ordem_periodo = {p: i for i, p in enumerate(periodos)}
+    horarios = sorted(rotina, key=lambda h: (ordem_periodo.get(rotina[h].periodo, len(periodos)), h))
+    inicio = hoje - timedelta(days=dias - 1) if dias else None
+    
+    datas, concluidos, agendados = matriz_conclusoes(copia, horarios, inicio, hoje)
+    feitos = concluidos & agendados
+    por_horario_agendado = agendados.sum(axis=0)
+    por_horario_feito = feitos.sum(axis=0)
+    aderencia = np.divide(por_horario_feito, por_horario_agendado,
+                          out=np.full(len(horarios), np.nan), where=por_horario_agendado > 0)
+    
+    # Dia completo: tinha algo agendado e nada agendado ficou sem concluir
+    tem_agenda = agendados.any(axis=1)
+    completos = tem_agenda & ~(agendados & ~concluidos).any(axis=1)
+    # Hoje ainda pode ser concluído: só entra na sequência se já estiver completo
+    contaveis = completos
+    if len(datas) and datas[-1] == np.datetime64(hoje, "D") and not completos[-1]:
+        contaveis = completos[:-1]
+    dias_ok = contaveis[tem_agenda[:len(contaveis)]]
+    sequencia_atual, sequencia_recorde = maior_sequencia(dias_ok)
+    
+    # Mapa dia da semana x horário: somas por dia da semana via one-hot (7 x D) @ (D x S)
+    dia_semana = ((datas.astype("datetime64[D]").astype(np.int64) + 3) % 7) if len(datas) else np.array([], dtype=np.int64)
+    um_quente = (dia_semana[None, :] == np.arange(7)[:, None]).astype(np.int32)
+    mapa_agendado = um_quente @ agendados.astype(np.int32)
+    mapa_feito = um_quente @ feitos.astype(np.int32)
+    mapa = np.divide(mapa_feito, mapa_agendado, out=np.full(mapa_agendado.shape, np.nan), where=mapa_agendado > 0)
+    
+    perdidos = por_horario_agendado - por_horario_feito
+    taxa_perda = np.divide(perdidos, por_horario_agendado, out=np.zeros(len(horarios)), where=por_horario_agendado > 0)
+    ordem_perdidos = [i for i in np.argsort(-taxa_perda, kind="stable") if perdidos[i] > 0][:TOP_HORARIOS]
+    
+    # Atrasos das confirmações, também do arquivo do histórico (sem ler o armazenamento)
+    minutos = matriz_atrasos(copia, horarios, inicio, hoje)
+    confirmados = (~np.isnan(minutos)).sum(axis=0)
+    atrasados = (minutos > MINUTOS_ATRASO).sum(axis=0)
+    soma_minutos = np.nansum(minutos, axis=0)
+    media_atraso = np.divide(soma_minutos, confirmados, out=np.zeros(len(horarios)), where=confirmados > 0)
+    ordem_atrasados = [i for i in np.argsort(-atrasados, kind="stable") if atrasados[i] > 0][:TOP_HORARIOS]
+    
+    return {
+        "horarios": horarios,
+        "periodos": [rotina[h].periodo for h in horarios],
+        "dias": int(tem_agenda.sum()),
+        "dias_completos": int(completos.sum()),
+        "sequencia_atual": sequencia_atual,
+        "sequencia_recorde": sequencia_recorde,
+        "aderencia": aderencia,
+        "mapa": mapa,
+        "perdidos": [(horarios[i], int(perdidos[i]), int(por_horario_agendado[i])) for i in ordem_perdidos],
+        "atrasados": [(horarios[i], int(atrasados[i]), float(media_atraso[i])) for i in ordem_atrasados],
+        "calculado_em": datetime.now()
+    }
+
+
+# ----- Desenho -----
+
+# Fontes com acentos: Segoe UI no Windows, DejaVu/Liberation no Linux; a embutida do PIL por último
+FONTES_IMAGEM = ["segoeui.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf", "arial.ttf"]
+
+
+def _fonte(tamanho):
+    for nome in FONTES_IMAGEM:
+        try:
+            return ImageFont.truetype(nome, tamanho)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=tamanho)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _cor_taxa(taxa):
+    """Vermelho (0%) -> amarelo -> verde (100%); cinza sem dados"""
+    if np.isnan(taxa):
+        return (60, 60, 70)
+    if taxa < 0.5:
+        return (230, int(57 + (209 - 57) * taxa * 2), 70)
+    return (int(230 - (230 - 0) * (taxa - 0.5) * 2), int(209 + (255 - 209) * (taxa - 0.5) * 2), int(70 + (136 - 70) * (taxa - 0.5) * 2))
+
+
+def _rgb(cor):
+    cor = cor.lstrip("#")
+    if len(cor) == 3:
+        cor = "".join(c * 2 for c in cor)
+    return tuple(int(cor[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def desenhar(estatisticas, largura=1000):
+    """Desenha tudo numa imagem PIL: resumo, aderência por horário, mapa semanal e rankings"""
+    horarios = estatisticas["horarios"]
+    n = len(horarios)
+    margem = 20
+    fonte_titulo, fonte, fonte_pequena = _fonte(20), _fonte(15), _fonte(12)
+    
+    altura_barra = 22
+    celula = max(min((largura - 2 * margem - 50) // max(n, 1), 60), 14)
+    altura = (margem + 70                     # resumo
+              + 40 + n * altura_barra + 20    # aderência
+              + 40 + 7 * 24 + 60              # mapa (+ rótulos dos horários)
+              + 40 + TOP_HORARIOS * 22 + margem)
+    imagem = Image.new("RGB", (largura, altura), _rgb(COR_FUNDO_LISTA))
+    d = ImageDraw.Draw(imagem)
+    y = margem
+    
+    # Resumo
+    d.rounded_rectangle((margem, y, largura - margem, y + 60), 12, fill=_rgb(COR_FUNDO_CARD))
+    # (as fontes da imagem não têm emoji: os textos ficam sem eles)
+    resumo = [
+        f"Sequência atual: {estatisticas['sequencia_atual']} dias",
+        f"Recorde: {estatisticas['sequencia_recorde']} dias",
+        f"Dias 100%: {estatisticas['dias_completos']} de {estatisticas['dias']}"
+    ]
+    x = margem + 15
+    for texto in resumo:
+        d.text((x, y + 20), texto, font=fonte_titulo, fill=_rgb(COR_SUCESSO))
+        x += (largura - 2 * margem) // len(resumo)
+    y += 80
+    
+    # Aderência por horário
+    d.text((margem, y), "Aderência por horário", font=fonte_titulo, fill=_rgb(COR_DESTAQUE))
+    y += 35
+    inicio_barra = margem + 70
+    fim_barra = largura - margem - 60
+    for horario, periodo, taxa in zip(horarios, estatisticas["periodos"], estatisticas["aderencia"]):
+        d.rectangle((margem, y + 3, margem + 5, y + altura_barra - 5), fill=_rgb(cor_periodo(periodo)))
+        d.text((margem + 12, y + 3), horario, font=fonte, fill=(230, 230, 230))
+        d.rectangle((inicio_barra, y + 4, fim_barra, y + altura_barra - 4), fill=(45, 45, 60))
+        if not np.isnan(taxa):
+            d.rectangle((inicio_barra, y + 4, inicio_barra + int((fim_barra - inicio_barra) * taxa), y + altura_barra - 4),
+                        fill=_cor_taxa(taxa))
+            d.text((fim_barra + 8, y + 3), f"{taxa * 100:.0f}%", font=fonte, fill=(230, 230, 230))
+        else:
+            d.text((fim_barra + 8, y + 3), "-", font=fonte, fill=(136, 136, 136))
+        y += altura_barra
+    y += 20
+    
+    # Mapa dia da semana x horário
+    d.text((margem, y), "Dia da semana x horário", font=fonte_titulo, fill=_rgb(COR_DESTAQUE))
+    y += 35
+    x0 = margem + 45
+    for i, nome in enumerate(DIAS_SEMANA):
+        d.text((margem, y + i * 24 + 4), nome, font=fonte_pequena, fill=(200, 200, 200))
+        for j in range(n):
+            x = x0 + j * celula
+            d.rectangle((x + 1, y + i * 24 + 1, x + celula - 1, y + (i + 1) * 24 - 1), fill=_cor_taxa(estatisticas["mapa"][i, j]))
+    y += 7 * 24 + 4
+    passo = max(1, 40 // celula)  # não encavala os rótulos quando há muitos horários
+    for j in range(0, n, passo):
+        x = x0 + j * celula
+        d.rectangle((x + 1, y, x + celula - 1, y + 4), fill=_rgb(cor_periodo(estatisticas["periodos"][j])))
+        d.text((x, y + 8), horarios[j], font=fonte_pequena, fill=(200, 200, 200))
+    y += 56
+    
+    # Rankings
+    metade = (largura - 2 * margem) // 2
+    d.text((margem, y), "Mais perdidos", font=fonte_titulo, fill=_rgb(COR_PERIGO))
+    d.text((margem + metade, y), "Mais atrasados", font=fonte_titulo, fill=(255, 165, 0))
+    y += 35
+    for i, (horario, perdidos, agendados) in enumerate(estatisticas["perdidos"]):
+        d.text((margem, y + i * 22), f"{horario}  {perdidos} de {agendados} dias", font=fonte, fill=(230, 230, 230))
+    if not estatisticas["perdidos"]:
+        d.text((margem, y), "Nenhum horário perdido", font=fonte, fill=(136, 136, 136))
+    for i, (horario, vezes, media) in enumerate(estatisticas["atrasados"]):
+        d.text((margem + metade, y + i * 22), f"{horario}  {vezes}x (média {media:.0f} min)", font=fonte, fill=(230, 230, 230))
+    if not estatisticas["atrasados"]:
+        d.text((margem + metade, y), f"Nenhum alerta confirmado com mais de {MINUTOS_ATRASO} min",
+               font=fonte, fill=(136, 136, 136))
+    return imagem
+
+
+def foto_tk(imagem):
+    """PhotoImage para mostrar a imagem num tk.Canvas (guarde a referência enquanto ela aparecer)"""
+    return ImageTk.PhotoImage(imagem)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Registro de estilos
+Fontes, cores e estilos de card compartilhados por todos os widgets. Cada
+fonte é criada uma única vez (um só registro no Tk) e reaproveitada
+"""
+
+import customtkinter as ctk
+
+FAMILIA_TEXTO = "Segoe UI"
+FAMILIA_MONO = "Consolas"
+
+# Cores base
+COR_FUNDO_CARD = "#1a1a2e"
+COR_FUNDO_LISTA = "#16213e"
+COR_DESTAQUE = "#00d4ff"
+COR_SUCESSO = "#00ff88"
+COR_PERIGO = "#E63946"
+
+CORES_PERIODO = {
+    "MANHÃ": "#FF6B35",
+    "PREPARAÇÃO": "#F77F00",
+    "TREINO": "#00B894",
+    "PÓS-TREINO": "#4ECDC4",
+    "TRANSIÇÃO": "#6B705C",
+    "TARDE": "#FFD166",
+    "NOITE": "#7B2CBF"
+}
+COR_PERIODO_PADRAO = "#333"
+
+CORES_CATEGORIA = {
+    "🥬 MERCADO / FEIRA": "#00ff88",
+    "💊 SUPLEMENTOS (O Kit)": "#00d4ff",
+    "🚿 HIGIENE & BANHO": "#4ECDC4",
+    "🧴 ESTÉTICA & BANCADA": "#7B2CBF"
+}
+COR_CATEGORIA_PADRAO = "#7B2CBF"
+
+# Estilos de frame, para usar como ctk.CTkFrame(parent, **ESTILO_CARD)
+ESTILO_CARD = {"fg_color": COR_FUNDO_CARD, "corner_radius": 12}
+ESTILO_CARD_TAREFA = {"corner_radius": 12, "border_width": 2}
+
+_fontes = {}
+
+
+def fonte(tamanho, peso="normal", familia=None):
+    """CTkFont compartilhada para (tamanho, peso, família); criada no primeiro uso
+    
+    As fontes são as mesmas em todos os widgets: não chame configure() nelas.
+    """
+    chave = (tamanho, peso, familia)
+    instancia = _fontes.get(chave)
+    if instancia is None:
+        instancia = _fontes[chave] = ctk.CTkFont(family=familia, size=tamanho, weight=peso)
+    return instancia
+
+
+def cor_periodo(periodo):
+    return CORES_PERIODO.get(periodo, COR_PERIODO_PADRAO)
+
+
+def cor_categoria(categoria):
+    return CORES_CATEGORIA.get(categoria, COR_CATEGORIA_PADRAO)
+
+
+def fontes_criadas():
+    """Quantas fontes o registro já criou"""
+    return len(_fontes)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Barramento de eventos
+As threads de trabalho (agendador, observador de arquivos, bandeja) só
+publicam eventos; uma única thread, a dona do estado (a do Tk, ou a principal
+sem interface), drena a fila em lotes e chama os tratadores
+"""
+
+import time
+from collections import deque
+
+LOTE_EVENTOS = 256  # eventos tratados por drenagem; o resto fica para a próxima
+
+
+class BarramentoEventos:
+    """Fila sem trava entre threads: deque.append e deque.popleft são atômicos
+    
+    publicar() pode ser chamado de qualquer thread e nunca bloqueia; drenar()
+    só deve ser chamado pela thread dona, que é onde os tratadores rodam.
+    despertar, se definido, é chamado quando há o que drenar (por exemplo,
+    threading.Event.set para quem espera sem interface), uma vez por lote: só
+    volta a ser chamado depois que a próxima drenagem começar.
+    """
+    
+    def __init__(self):
+        self._fila = deque()
+        self._tratadores = {}
+        self.despertar = None
+        self._despertado = False
+        self.tratados = 0
+        self.maior_lote = 0
+    
+    def assinar(self, tipo, tratador):
+        """Registra tratador(*args) para o tipo (na thread dona, antes de publicar)"""
+        self._tratadores.setdefault(tipo, []).append(tratador)
+    
+    def publicar(self, tipo, *args):
+        """Enfileira o evento; seguro em qualquer thread"""
+        self._fila.append((tipo, args))
+        # Enfileirar antes de olhar a marca: com ela ligada, uma drenagem ainda vai começar e ver o evento
+        if self.despertar is not None and not self._despertado:
+            self._despertado = True
+            self.despertar()
+    
+    @property
+    def pendentes(self):
+        return len(self._fila)
+    
+    def drenar(self, maximo=LOTE_EVENTOS):
+        """Trata até maximo eventos, na ordem em que foram publicados; retorna quantos"""
+        self._despertado = False
+        tratados = 0
+        while tratados < maximo:
+            try:
+                tipo, args = self._fila.popleft()
+            except IndexError:
+                break
+            tratados += 1
+            for tratador in self._tratadores.get(tipo, ()):
+                try:
+                    tratador(*args)
+                except Exception as e:
+                    print(f"Erro ao tratar o evento {tipo}: {e}")
+        self.tratados += tratados
+        self.maior_lote = max(self.maior_lote, tratados)
+        return tratados
+    
+    def drenar_tudo(self, limite_segundos=None):
+        """Drena até esvaziar (ou até o limite de tempo); retorna quantos foram tratados"""
+        prazo = None if limite_segundos is None else time.monotonic() + limite_segundos
+        self._despertado = False  # mesmo com a fila já vazia (drenada no lote anterior), o aviso foi atendido
+        total = 0
+        while self._fila and (prazo is None or time.monotonic() < prazo):
+            total += self.drenar()
+        return total
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Histórico de conclusões
+Um arquivo binário com uma linha por dia e um bit por horário (concluído e
+agendado), mais um byte por horário com o atraso da confirmação do alerta;
+as colunas são identificadas pelo nome do horário e nunca são
+reaproveitadas, então editar a rotina não embaralha o passado
+"""
+
+import os
+import struct
+import threading
+from datetime import date, timedelta
+
+from persistencia import GravadorAdiado
+
+ARQUIVO_HISTORICO = "historico_conclusoes.bin"
+
+# Cabeçalho: assinatura, versão, capacidade (colunas), primeiro dia (ordinal), número de dias
+CABECALHO = struct.Struct("<4sHHII")
+ASSINATURA = b"AGHC"
+VERSAO = 2  # a 1 não tinha os bytes de atraso
+TAMANHO_NOME = 5  # "HH:MM" em ASCII
+CAPACIDADE_INICIAL = 32  # colunas; dobra quando acabam
+ATRASO_MAXIMO = 254  # minutos; o byte guarda atraso + 1 (0 = alerta não confirmado)
+
+
+def para_data(valor):
+    return valor if isinstance(valor, date) else date.fromisoformat(valor)
+
+
+def minutos_atraso(horario, hora):
+    """Minutos entre o horário ("HH:MM") e a confirmação ("HH:MM:SS"), nunca negativos"""
+    confirmado = int(hora[:2]) * 60 + int(hora[3:5]) + int(hora[6:8] or 0) / 60
+    return max(confirmado - (int(horario[:2]) * 60 + int(horario[3:5])), 0)
+
+
+class HistoricoConclusoes:
+    """Conclusões de todos os dias como bitsets: linhas por dia no arquivo, colunas em memória
+    
+    Layout do arquivo (pode ser aberto com numpy.memmap a partir de deslocamento_linhas):
+    cabeçalho, capacidade x 5 bytes com os nomes das colunas e, para cada dia,
+    capacidade/8 bytes de concluídos, capacidade/8 bytes de agendados e
+    capacidade bytes de atraso da confirmação (minutos + 1, 0 = sem confirmação).
+    Em memória cada coluna vira dois inteiros com um bit por dia, então taxas
+    e filtros sobre anos inteiros são poucas operações de inteiro grande.
+    
+    As alterações só marcam as linhas sujas; a gravação (com fsync) fica com
+    a thread de um GravadorAdiado, fora da thread de quem marcou.
+    """
+    
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self._trava = threading.RLock()  # depois de parar(), marcar grava na hora, ainda com ela
+        self.gravador = GravadorAdiado(gravar=lambda arquivo, dados, indent: self._gravar_pendentes())
+        self._linhas_sujas = set()  # dias alterados e ainda não gravados
+        self._cabecalho_sujo = False
+        self._regravar_tudo = False
+        self.capacidade = CAPACIDADE_INICIAL
+        self.inicio = None
+        self.dias = 0
+        self.horarios = []
+        self.colunas = {}
+        self._concluidos = []
+        self._agendados = []
+        self._linhas = bytearray()
+        # Arquivo da versão 1: os atrasos das confirmações ainda precisam ser importados
+        self.sem_confirmacoes = False
+        self.carregar()
+    
+    # ----- Arquivo -----
+    
+    @property
+    def bytes_por_bitset(self):
+        return self.capacidade // 8
+    
+    @property
+    def bytes_por_linha(self):
+        return 2 * self.bytes_por_bitset + self.capacidade
+    
+    @property
+    def deslocamento_linhas(self):
+        return CABECALHO.size + self.capacidade * TAMANHO_NOME
+    
+    def carregar(self):
+        if not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, "rb") as f:
+                conteudo = f.read()
+            assinatura, versao, capacidade, inicio, dias = CABECALHO.unpack_from(conteudo)
+            if assinatura != ASSINATURA or versao not in (1, VERSAO):
+                raise ValueError("formato desconhecido")
+        except Exception as e:
+            print(f"Erro ao carregar {self.arquivo}: {e}")
+            return
+        
+        self.capacidade = capacidade
+        self.inicio = date.fromordinal(inicio) if dias else None
+        nomes = conteudo[CABECALHO.size:self.deslocamento_linhas]
+        self.horarios = []
+        for i in range(capacidade):
+            nome = nomes[i * TAMANHO_NOME:(i + 1) * TAMANHO_NOME].decode("ascii")
+            if not nome.strip("\0"):
+                break
+            self.horarios.append(nome)
+        self.colunas = {horario: i for i, horario in enumerate(self.horarios)}
+        
+        # Linhas incompletas no fim (queda durante o append) são descartadas
+        linhas = conteudo[self.deslocamento_linhas:]
+        tamanho = self.bytes_por_linha if versao == VERSAO else 2 * self.bytes_por_bitset
+        self.dias = min(dias, len(linhas) // tamanho)
+        if versao == VERSAO:
+            self._linhas = bytearray(linhas[:self.dias * tamanho])
+        else:
+            # Versão 1: cada linha ganha os bytes de atraso zerados e o arquivo é regravado
+            vazios = bytes(self.capacidade)
+            self._linhas = bytearray(b"".join(
+                linhas[dia * tamanho:(dia + 1) * tamanho] + vazios for dia in range(self.dias)
+            ))
+            self.sem_confirmacoes = True
+            self._marcar_sujo(tudo=True)
+        self._transpor()
+    
+    def _transpor(self):
+        """Monta os bitsets por coluna (um bit por dia) a partir das linhas"""
+        n = self.bytes_por_bitset
+        self._concluidos = [0] * len(self.horarios)
+        self._agendados = [0] * len(self.horarios)
+        for dia in range(self.dias):
+            base = dia * self.bytes_por_linha
+            concluidos = int.from_bytes(self._linhas[base:base + n], "little")
+            agendados = int.from_bytes(self._linhas[base + n:base + 2 * n], "little")
+            bit_dia = 1 << dia
+            while concluidos:
+                menor = concluidos & -concluidos
+                self._concluidos[menor.bit_length() - 1] |= bit_dia
+                concluidos ^= menor
+            while agendados:
+                menor = agendados & -agendados
+                self._agendados[menor.bit_length() - 1] |= bit_dia
+                agendados ^= menor
+    
+    def _cabecalho(self):
+        nomes = b"".join(h.encode("ascii").ljust(TAMANHO_NOME, b"\0") for h in self.horarios)
+        nomes = nomes.ljust(self.capacidade * TAMANHO_NOME, b"\0")
+        inicio = self.inicio.toordinal() if self.inicio else 0
+        return CABECALHO.pack(ASSINATURA, VERSAO, self.capacidade, inicio, self.dias) + nomes
+    
+    def _regravar(self, cabecalho, linhas):
+        """Regrava o arquivo inteiro (só quando muda a capacidade ou o primeiro dia)"""
+        temporario = self.arquivo + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(cabecalho)
+            f.write(linhas)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, self.arquivo)
+    
+    def _gravar_trechos(self, cabecalho, deslocamento, trechos):
+        """Grava só as linhas alteradas e depois o cabeçalho, cada um com fsync
+        
+        O cabeçalho vai por último: se o processo cair antes, as linhas novas
+        no fim ficam fora da contagem de dias e são descartadas ao carregar.
+        """
+        with open(self.arquivo, "r+b") as f:
+            for inicio, dados in trechos:
+                f.seek(deslocamento + inicio)
+                f.write(dados)
+            f.flush()
+            os.fsync(f.fileno())
+            if cabecalho is not None:
+                f.seek(0)
+                f.write(cabecalho)
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _marcar_sujo(self, linhas=(), cabecalho=False, tudo=False):
+        self._linhas_sujas.update(linhas)
+        self._cabecalho_sujo = self._cabecalho_sujo or cabecalho
+        self._regravar_tudo = self._regravar_tudo or tudo
+        self.gravador.marcar(self.arquivo, None)
+    
+    def _gravar_pendentes(self):
+        """Thread do gravador: copia o que está sujo sob a trava e grava fora dela"""
+        with self._trava:
+            tudo = self._regravar_tudo or not os.path.exists(self.arquivo)
+            cabecalho = self._cabecalho() if tudo or self._cabecalho_sujo else None
+            if tudo:
+                linhas = bytes(self._linhas)
+            else:
+                tamanho = self.bytes_por_linha
+                trechos = [(dia * tamanho, bytes(self._linhas[dia * tamanho:(dia + 1) * tamanho]))
+                           for dia in sorted(self._linhas_sujas)]
+                deslocamento = self.deslocamento_linhas
+            sujas = self._linhas_sujas
+            self._linhas_sujas = set()
+            self._cabecalho_sujo = self._regravar_tudo = False
+        try:
+            if tudo:
+                self._regravar(cabecalho, linhas)
+            else:
+                self._gravar_trechos(cabecalho, deslocamento, trechos)
+        except BaseException:
+            # Falhou: continua sujo para a próxima gravação
+            with self._trava:
+                self._linhas_sujas |= sujas
+                self._cabecalho_sujo = self._cabecalho_sujo or cabecalho is not None
+                self._regravar_tudo = self._regravar_tudo or tudo
+            raise
+    
+    def descarregar(self):
+        """Grava agora o que estiver pendente"""
+        self.gravador.descarregar()
+    
+    def parar(self):
+        """Encerra a thread de gravação e grava o que faltar"""
+        self.gravador.parar()
+    
+    # ----- Estrutura -----
+    
+    def _coluna(self, horario):
+        """Índice da coluna do horário, criando-a (e crescendo o arquivo) se preciso"""
+        coluna = self.colunas.get(horario)
+        if coluna is not None:
+            return coluna
+        coluna = len(self.horarios)
+        if coluna >= self.capacidade:
+            self._crescer_capacidade(self.capacidade * 2)
+        self.horarios.append(horario)
+        self.colunas[horario] = coluna
+        self._concluidos.append(0)
+        self._agendados.append(0)
+        return coluna
+    
+    def _crescer_capacidade(self, capacidade):
+        antigo, capacidade_antiga, tamanho_antigo = self.bytes_por_bitset, self.capacidade, self.bytes_por_linha
+        self.capacidade = capacidade
+        novo = self.bytes_por_bitset
+        linhas = bytearray()
+        for dia in range(self.dias):
+            base = dia * tamanho_antigo
+            linhas += self._linhas[base:base + antigo].ljust(novo, b"\0")
+            linhas += self._linhas[base + antigo:base + 2 * antigo].ljust(novo, b"\0")
+            linhas += self._linhas[base + 2 * antigo:base + 2 * antigo + capacidade_antiga].ljust(capacidade, b"\0")
+        self._linhas = linhas
+        self._marcar_sujo(tudo=True)
+    
+    def _indice_dia(self, data):
+        """Índice da linha do dia, criando as linhas que faltarem; retorna (indice, regravou)"""
+        if self.inicio is None:
+            self.inicio = data
+        deslocamento = (data - self.inicio).days
+        if deslocamento < 0:
+            # Dia anterior ao primeiro: insere linhas vazias no começo
+            self._linhas = bytearray(-deslocamento * self.bytes_por_linha) + self._linhas
+            self._concluidos = [valor << -deslocamento for valor in self._concluidos]
+            self._agendados = [valor << -deslocamento for valor in self._agendados]
+            self.dias += -deslocamento
+            self.inicio = data
+            self._marcar_sujo(tudo=True)
+            return 0, True
+        if deslocamento >= self.dias:
+            self._linhas += bytearray((deslocamento + 1 - self.dias) * self.bytes_por_linha)
+            self.dias = deslocamento + 1
+        return deslocamento, False
+    
+    def _alterar_bits(self, data, horarios, concluido=None, agendado=None, substituir_agenda=False, atraso=None):
+        """Liga/desliga os bits dos horários no dia e marca para gravar só a linha do dia"""
+        data = para_data(data)
+        dias_antes = self.dias
+        colunas_antes = len(self.horarios)
+        capacidade_antes = self.capacidade
+        
+        colunas = [self._coluna(h) for h in horarios]
+        dia, regravou = self._indice_dia(data)
+        regravou = regravou or self.capacidade != capacidade_antes
+        bit_dia = 1 << dia
+        n = self.bytes_por_bitset
+        base = dia * self.bytes_por_linha
+        
+        if substituir_agenda:
+            for coluna in range(len(self.horarios)):
+                self._agendados[coluna] &= ~bit_dia
+            self._linhas[base + n:base + 2 * n] = bytes(n)
+        for coluna in colunas:
+            byte, bit = divmod(coluna, 8)
+            if concluido is not None:
+                if concluido:
+                    self._concluidos[coluna] |= bit_dia
+                    self._linhas[base + byte] |= 1 << bit
+                else:
+                    self._concluidos[coluna] &= ~bit_dia
+                    self._linhas[base + byte] &= ~(1 << bit) & 0xFF
+            if agendado:
+                self._agendados[coluna] |= bit_dia
+                self._linhas[base + n + byte] |= 1 << bit
+            if atraso is not None:
+                self._linhas[base + 2 * n + coluna] = min(round(atraso), ATRASO_MAXIMO) + 1
+        
+        if regravou:
+            self._marcar_sujo(tudo=True)
+        elif self.dias != dias_antes:
+            # Dias novos entram no fim do arquivo (as linhas vazias intermediárias também)
+            self._marcar_sujo(range(dias_antes, self.dias), cabecalho=True)
+        else:
+            self._marcar_sujo([dia], cabecalho=len(self.horarios) != colunas_antes)
+    
+    # ----- Atualização -----
+    
+    def definir(self, data, horario, concluido):
+        """Marca/desmarca a conclusão do horário no dia (o horário passa a contar como agendado)"""
+        with self._trava:
+            self._alterar_bits(data, [horario], concluido=concluido, agendado=True)
+    
+    def definir_agenda(self, data, horarios):
+        """Define quais horários existiam na rotina do dia (denominador das taxas)"""
+        with self._trava:
+            self._alterar_bits(data, list(horarios), agendado=True, substituir_agenda=True)
+    
+    def limpar_dia(self, data, horarios=None):
+        """Desmarca as conclusões do dia (de todos os horários, ou só dos dados)"""
+        with self._trava:
+            if self.inicio is None:
+                return
+            self._alterar_bits(data, list(horarios if horarios is not None else self.horarios), concluido=False)
+    
+    def confirmar(self, data, horario, minutos):
+        """Guarda quantos minutos depois do horário o alerta foi confirmado no dia"""
+        with self._trava:
+            self._alterar_bits(data, [horario], atraso=minutos)
+    
+    def importar_confirmacoes(self, historico):
+        """Só os atrasos de {data: {"confirmados": {horario: "HH:MM:SS"}}} (arquivos da versão 1)"""
+        with self._trava:
+            for data in sorted(historico):
+                for horario, hora in historico[data].get("confirmados", {}).items():
+                    self._alterar_bits(data, [horario], atraso=minutos_atraso(horario, hora))
+            self.sem_confirmacoes = False
+    
+    def importar(self, historico, agenda=()):
+        """Carrega {data: {"conclusoes": {horario: bool}, "confirmados": {...}}} (carregar_historico do armazenamento)
+        
+        Os dias importados contam como agendados os horários de agenda mais os que aparecem no dia.
+        """
+        with self._trava:
+            datas = sorted(historico)
+            if datas:
+                # Cria o primeiro dia antes, para não regravar o arquivo a cada dia mais antigo
+                self._indice_dia(para_data(datas[0]))
+            for data in datas:
+                conclusoes = historico[data].get("conclusoes", {})
+                horarios = sorted(set(agenda) | set(conclusoes))
+                self._alterar_bits(data, horarios, agendado=True)
+                feitos = [h for h, concluida in conclusoes.items() if concluida]
+                if feitos:
+                    self._alterar_bits(data, feitos, concluido=True)
+            self.importar_confirmacoes(historico)
+    
+    # ----- Consultas -----
+    
+    def copiar(self):
+        """Cópia crua para análise em lote: (inicio, dias, capacidade, horarios, linhas em bytes)"""
+        with self._trava:
+            return self.inicio, self.dias, self.capacidade, list(self.horarios), bytes(self._linhas)
+    
+    def _mascara(self, inicio=None, fim=None):
+        """Bits dos dias em [inicio, fim] (datas inclusivas; None = sem limite)"""
+        if self.inicio is None:
+            return 0
+        primeiro = 0 if inicio is None else max((para_data(inicio) - self.inicio).days, 0)
+        ultimo = self.dias - 1 if fim is None else min((para_data(fim) - self.inicio).days, self.dias - 1)
+        if ultimo < primeiro:
+            return 0
+        return ((1 << (ultimo - primeiro + 1)) - 1) << primeiro
+    
+    def taxa(self, horario, inicio=None, fim=None):
+        """(dias concluídos, dias agendados) do horário no período"""
+        with self._trava:
+            coluna = self.colunas.get(horario)
+            if coluna is None:
+                return 0, 0
+            agendados = self._agendados[coluna] & self._mascara(inicio, fim)
+            return int.bit_count(self._concluidos[coluna] & agendados), int.bit_count(agendados)
+    
+    def _bits_dias_completos(self, mascara):
+        pendentes = 0
+        agendados = 0
+        for concluidos, agenda in zip(self._concluidos, self._agendados):
+            pendentes |= agenda & ~concluidos
+            agendados |= agenda
+        return agendados & ~pendentes & mascara
+    
+    def dias_completos(self, inicio=None, fim=None):
+        """Dias em que todos os horários agendados foram concluídos"""
+        with self._trava:
+            bits = self._bits_dias_completos(self._mascara(inicio, fim))
+            dias = []
+            while bits:
+                menor = bits & -bits
+                dias.append(self.inicio + timedelta(days=menor.bit_length() - 1))
+                bits ^= menor
+            return dias
+    
+    def contar_dias_completos(self, inicio=None, fim=None):
+        with self._trava:
+            return int.bit_count(self._bits_dias_completos(self._mascara(inicio, fim)))
+    
+    def dia(self, data):
+        """{horario: (agendado, concluido)} dos horários agendados no dia"""
+        with self._trava:
+            if self.inicio is None:
+                return {}
+            indice = (para_data(data) - self.inicio).days
+            if not 0 <= indice < self.dias:
+                return {}
+            bit = 1 << indice
+            return {
+                horario: (True, bool(self._concluidos[coluna] & bit))
+                for coluna, horario in enumerate(self.horarios)
+                if self._agendados[coluna] & bit
+            }
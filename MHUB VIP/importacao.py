@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Importação de rotina
+Lê calendários iCalendar (.ics) e planilhas CSV linha a linha, sem carregar
+o arquivo inteiro: cada evento vira um Horario assim que termina de ser lido
+e só o primeiro de cada minuto do dia fica em memória (no máximo 1440), então um
+calendário com milhares de eventos repetidos cabe do mesmo jeito.
+
+CSV: uma linha por horário, com cabeçalho; colunas reconhecidas (sem
+diferenciar maiúsculas): horario, fim, duracao, titulo, periodo, cor e
+tarefas (itens separados por "|" ou por quebra de linha). O separador
+("," ou ";") é detectado na primeira linha.
+"""
+
+import csv
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from rotina import Horario, para_minutos, duracao_ate, validar_duracao, MINUTOS_DIA
+
+FORMATOS_IMPORTACAO = {".ics": "iCalendar", ".ical": "iCalendar", ".csv": "CSV"}
+COR_PADRAO = "#FF6B35"
+
+_DURACAO_ICS = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_COR_HEX = re.compile(r"#[0-9A-Fa-f]{6}$")
+
+
+def periodo_do_horario(minutos, periodos):
+    """Período padrão pela hora, quando o arquivo não diz qual é"""
+    nome = "MANHÃ" if minutos < 12 * 60 else "TARDE" if minutos < 18 * 60 else "NOITE"
+    return nome if nome in periodos else periodos[0]
+
+
+def _periodo(texto, minutos, periodos):
+    for candidato in (texto or "").split(","):
+        candidato = candidato.strip().upper()
+        if candidato in periodos:
+            return candidato
+    return periodo_do_horario(minutos, periodos)
+
+
+def _cor(texto, cores):
+    """Cor em "#RRGGBB" ou pelo nome da lista de cores (com ou sem o emoji)"""
+    texto = (texto or "").strip()
+    if _COR_HEX.match(texto):
+        return texto
+    for nome, cor in cores.items():
+        if texto and (texto == nome or texto.lower() == nome.split(" ", 1)[-1].lower()):
+            return cor
+    return COR_PADRAO
+
+
+# ----- iCalendar -----
+
+def _desdobrar(linhas):
+    """Junta as linhas dobradas do iCalendar (continuação começa com espaço ou tab)"""
+    atual = None
+    for linha in linhas:
+        linha = linha.rstrip("\r\n")
+        if linha[:1] in (" ", "\t") and atual is not None:
+            atual += linha[1:]
+            continue
+        if atual is not None:
+            yield atual
+        atual = linha
+    if atual is not None:
+        yield atual
+
+
+def _propriedade(linha):
+    """"NOME;PARAM=X:valor" -> (NOME, {PARAM: X}, valor)"""
+    cabeca, _, valor = linha.partition(":")
+    nome, *parametros = cabeca.split(";")
+    params = {}
+    for parametro in parametros:
+        chave, _, texto = parametro.partition("=")
+        params[chave.upper()] = texto.strip('"')
+    return nome.upper(), params, valor
+
+
+def _texto_ics(valor):
+    return (valor.replace("\\n", "\n").replace("\\N", "\n")
+            .replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\"))
+
+
+def eventos_ics(linhas):
+    """Gera um dicionário {NOME: (params, valor)} por VEVENT, lendo as linhas sob demanda"""
+    evento = None
+    profundidade = 0  # VALARM e outros componentes dentro do evento são ignorados
+    for linha in _desdobrar(linhas):
+        nome, params, valor = _propriedade(linha)
+        if nome == "BEGIN":
+            if valor.upper() == "VEVENT":
+                evento, profundidade = {}, 0
+            elif evento is not None:
+                profundidade += 1
+        elif nome == "END":
+            if valor.upper() == "VEVENT" and evento is not None:
+                yield evento
+                evento = None
+            elif evento is not None:
+                profundidade -= 1
+        elif evento is not None and profundidade == 0 and nome not in evento:
+            evento[nome] = (params, valor)
+
+
+def _data_hora_ics(params, valor):
+    """datetime local de um DTSTART/DTEND, ou None se for dia inteiro"""
+    if params.get("VALUE") == "DATE" or "T" not in valor:
+        return None
+    # Fatiar é bem mais rápido que strptime, e são milhares de eventos
+    momento = datetime(int(valor[0:4]), int(valor[4:6]), int(valor[6:8]),
+                       int(valor[9:11]), int(valor[11:13]), int(valor[13:15] or 0))
+    if valor.endswith("Z"):
+        # UTC: converte para o fuso do computador (TZID é tomado como hora local)
+        momento = momento.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return momento
+
+
+def _duracao_ics(valor):
+    encontrado = _DURACAO_ICS.match(valor.strip())
+    if not encontrado:
+        raise ValueError(f"DURATION inválida: {valor!r}")
+    sinal, semanas, dias, horas, minutos, segundos = encontrado.groups()
+    duracao = timedelta(weeks=int(semanas or 0), days=int(dias or 0), hours=int(horas or 0),
+                        minutes=int(minutos or 0), seconds=int(segundos or 0))
+    return -duracao if sinal == "-" else duracao
+
+
+def horario_de_evento(evento, periodos, cores):
+    """Horario de um VEVENT (hora de DTSTART, duração de DTEND/DURATION), ou None se for de dia inteiro"""
+    if "DTSTART" not in evento:
+        raise ValueError("evento sem DTSTART")
+    inicio = _data_hora_ics(*evento["DTSTART"])
+    if inicio is None:
+        return None
+    duracao = 0
+    if "DTEND" in evento:
+        fim = _data_hora_ics(*evento["DTEND"])
+        if fim is not None:
+            duracao = int((fim - inicio).total_seconds() // 60)
+    elif "DURATION" in evento:
+        duracao = int(_duracao_ics(evento["DURATION"][1]).total_seconds() // 60)
+    minutos = inicio.hour * 60 + inicio.minute
+    descricao = _texto_ics(evento.get("DESCRIPTION", ({}, ""))[1])
+    cor = evento.get("COLOR") or evento.get("X-APPLE-CALENDAR-COLOR")
+    return Horario(
+        minutos,
+        _texto_ics(evento.get("SUMMARY", ({}, ""))[1]).strip() or "Tarefa importada",
+        _periodo(_texto_ics(evento.get("CATEGORIES", ({}, ""))[1]), minutos, periodos),
+        _cor(cor[1] if cor else None, cores),
+        [linha.strip() for linha in descricao.splitlines() if linha.strip()],
+        duracao=duracao if 0 < duracao < MINUTOS_DIA else 0
+    )
+
+
+def horarios_ics(arquivo, periodos, cores):
+    with open(arquivo, encoding="utf-8-sig", errors="replace") as f:
+        for evento in eventos_ics(f):
+            try:
+                yield horario_de_evento(evento, periodos, cores)
+            except (ValueError, KeyError) as e:
+                yield ValueError(f"{evento.get('SUMMARY', ({}, '?'))[1]}: {e}")
+
+
+# ----- CSV -----
+
+def _normalizar_coluna(nome):
+    nome = (nome or "").strip().lower()
+    return {"horário": "horario", "hora": "horario", "início": "horario", "inicio": "horario",
+            "título": "titulo", "duração": "duracao", "período": "periodo", "itens": "tarefas"}.get(nome, nome)
+
+
+def horario_de_linha(linha, periodos, cores):
+    """Horario de uma linha do CSV (dicionário com as colunas já normalizadas)"""
+    minutos = para_minutos((linha.get("horario") or "").strip())
+    if (linha.get("fim") or "").strip():
+        duracao = duracao_ate(minutos, linha["fim"].strip())
+    else:
+        duracao = validar_duracao((linha.get("duracao") or "").strip() or 0)
+    tarefas = re.split(r"\s*(?:\||\r?\n)\s*", linha.get("tarefas") or "")
+    return Horario(
+        minutos,
+        (linha.get("titulo") or "").strip() or "Tarefa importada",
+        _periodo(linha.get("periodo"), minutos, periodos),
+        _cor(linha.get("cor"), cores),
+        [tarefa for tarefa in tarefas if tarefa],
+        duracao=duracao
+    )
+
+
+def horarios_csv(arquivo, periodos, cores):
+    with open(arquivo, newline="", encoding="utf-8-sig", errors="replace") as f:
+        primeira = f.readline()
+        f.seek(0)
+        separador = ";" if primeira.count(";") > primeira.count(",") else ","
+        leitor = csv.DictReader(f, delimiter=separador)
+        for linha in leitor:
+            linha = {_normalizar_coluna(coluna): valor for coluna, valor in linha.items() if coluna}
+            try:
+                yield horario_de_linha(linha, periodos, cores)
+            except ValueError as e:
+                yield ValueError(f"linha {leitor.line_num}: {e}")
+
+
+# ----- Leitura com deduplicação -----
+
+def ler_importacao(arquivo, periodos, cores):
+    """Lê o arquivo e junta os eventos por minuto do dia
+    
+    Retorna {"horarios": {minutos: Horario}, "eventos", "repetidos",
+    "dia_inteiro", "invalidos", "erros"}: eventos iguais no mesmo minuto
+    (o mesmo compromisso em vários dias) contam como repetidos; se forem
+    diferentes, fica o primeiro e os outros também contam como repetidos.
+    """
+    extensao = os.path.splitext(arquivo)[1].lower()
+    if extensao not in FORMATOS_IMPORTACAO:
+        raise ValueError(f"Formato não suportado: {extensao or arquivo} (use .ics ou .csv)")
+    leitor = horarios_csv if extensao == ".csv" else horarios_ics
+    
+    resultado = {"horarios": {}, "eventos": 0, "repetidos": 0, "dia_inteiro": 0, "invalidos": 0, "erros": []}
+    horarios = resultado["horarios"]
+    for horario in leitor(arquivo, periodos, cores):
+        resultado["eventos"] += 1
+        if isinstance(horario, ValueError):
+            resultado["invalidos"] += 1
+            if len(resultado["erros"]) < 10:
+                resultado["erros"].append(str(horario))
+        elif horario is None:
+            resultado["dia_inteiro"] += 1
+        elif horario.minutos in horarios:
+            resultado["repetidos"] += 1
+        else:
+            horarios[horario.minutos] = horario
+    return resultado
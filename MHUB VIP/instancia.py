@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Instância única
+Um processo por pasta de dados é o dono do estado (a janela ou o --headless):
+ele segura a trava do agenda.lock (flock/msvcrt, que o sistema solta sozinho
+se o processo morrer) e atende no socket local do serviço (servico.py).
+Abrir o app de novo não sobe outro agendador nem outra bandeja: a segunda
+execução só repassa o pedido ("mostrar", "testar_alerta", "resetar_alertas")
+à que está rodando e sai. Roda antes de carregar a interface, por isso este
+módulo só importa o necessário para a conversa pelo socket.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+from armazenamento import pasta_aplicativo
+
+ARQUIVO_TRAVA = "agenda.lock"
+ARQUIVO_CHAVE_SERVICO = "servico.chave"
+TEMPO_SUBIDA_SERVICO = 10.0  # segundos esperando um serviço recém-aberto aceitar a conexão
+
+# Pedidos que outra execução pode repassar, com os nomes dos eventos da bandeja
+EVENTOS_REPASSADOS = ("mostrar", "testar_alerta", "resetar_alertas")
+
+_trava = None  # arquivo aberto com a trava, enquanto este processo for a instância
+
+
+def endereco_servico(pasta):
+    """(endereço, família) do serviço da pasta de dados: um serviço por pasta, como os dados"""
+    codigo = f"{zlib.crc32(os.fsencode(os.path.normcase(os.path.abspath(pasta)))):08x}"
+    if sys.platform == "win32":
+        return rf"\\.\pipe\agenda_pessoal_{codigo}", "AF_PIPE"
+    # Numa pasta do usuário no diretório temporário: o caminho de um socket Unix tem ~100 bytes no máximo
+    return os.path.join(tempfile.gettempdir(), f"agenda_pessoal_{os.getuid()}", f"{codigo}.sock"), "AF_UNIX"
+
+
+def conferir_pasta_socket(pasta, criar=False):
+    """A pasta do socket tem que ser só do usuário: é a permissão dela que barra os outros usuários"""
+    if criar:
+        os.makedirs(pasta, mode=0o700, exist_ok=True)
+    info = os.stat(pasta)
+    if info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{pasta} não é só do usuário atual")
+
+
+def chave_servico(pasta, criar=True):
+    """Chave das conexões (autenticação HMAC do multiprocessing), só no Windows, onde o named pipe não tem dono
+    
+    Só o serviço a cria, legível só pelo usuário. Nos outros sistemas é None:
+    basta a permissão da pasta do socket (e o hmac carregaria o OpenSSL, ~3 MB).
+    """
+    if sys.platform != "win32":
+        return None
+    arquivo = os.path.join(pasta, ARQUIVO_CHAVE_SERVICO)
+    try:
+        with open(arquivo, "rb") as f:
+            chave = f.read()
+        if chave or not criar:
+            return chave or None
+    except FileNotFoundError:
+        if not criar:
+            return None
+    chave = os.urandom(32)
+    with os.fdopen(os.open(arquivo, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+        f.write(chave)
+    return chave
+
+
+def conectar_servico(pasta):
+    """Connection com o serviço da pasta (OSError, EOFError ou AuthenticationError se não houver)"""
+    endereco, familia = endereco_servico(pasta)
+    if familia == "AF_UNIX":
+        conferir_pasta_socket(os.path.dirname(endereco))
+    return Client(endereco, familia, authkey=chave_servico(pasta, criar=False))
+
+
+def travar_instancia(pasta):
+    """Fica com a trava da pasta de dados até o processo sair; False se outro processo já a tem"""
+    global _trava
+    if _trava is not None:
+        return True
+    os.makedirs(pasta, exist_ok=True)
+    arquivo = open(os.path.join(pasta, ARQUIVO_TRAVA), "a+")
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return False
+    # O PID é só para quem abrir o arquivo: a trava é a do sistema, não o conteúdo
+    arquivo.seek(0)
+    arquivo.truncate()
+    arquivo.write(f"{os.getpid()}\n")
+    arquivo.flush()
+    _trava = arquivo
+    return True
+
+
+def liberar_instancia():
+    global _trava
+    if _trava is not None:
+        _trava.close()
+        _trava = None
+
+
+def instancia_rodando(pasta):
+    """Outro processo tem a trava da pasta? (sem ficar com ela)"""
+    if _trava is not None:
+        return False
+    if travar_instancia(pasta):
+        liberar_instancia()
+        return False
+    return True
+
+
+def repassar_evento(pasta, evento, espera=0):
+    """Manda um dos EVENTOS_REPASSADOS à instância da pasta; False se ela não atendeu em espera segundos
+    
+    Espera porque a trava vem antes do socket: a instância pode estar subindo.
+    """
+    prazo = time.monotonic() + espera
+    while True:
+        try:
+            with conectar_servico(pasta) as conexao:
+                conexao.send(("evento", evento, ()))
+            return True
+        except (OSError, EOFError, AuthenticationError):
+            if time.monotonic() >= prazo:
+                return False
+            time.sleep(0.05)
+
+
+def adicionar_opcoes_repasse(parser):
+    """Opções do pedido repassado; na primeira execução, o pedido é feito a ela mesma"""
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--testar-alerta", dest="evento", action="store_const", const="testar_alerta",
+                       default="mostrar", help="mostra um alerta de teste (na agenda que estiver rodando)")
+    grupo.add_argument("--resetar-alertas", dest="evento", action="store_const", const="resetar_alertas",
+                       help="libera os alertas já disparados hoje (na agenda que estiver rodando)")
+    return parser
+
+
+def repassar_a_instancia(argv):
+    """Se a pasta de dados já tem instância, repassa o pedido da linha de comando a ela
+    
+    Retorna o código de saída deste processo, ou None se ele é a instância
+    (ficou com a trava) e deve seguir. A janela do --servico não pega a trava,
+    que é do serviço: só repassa se ele já estiver rodando.
+    """
+    parser = adicionar_opcoes_repasse(argparse.ArgumentParser(add_help=False))
+    parser.add_argument("--pasta-dados")
+    parser.add_argument("--servico", action="store_true")
+    args, _ = parser.parse_known_args(argv)
+    pasta = args.pasta_dados or pasta_aplicativo()
+    if args.servico:
+        if not instancia_rodando(pasta):
+            return None
+    elif travar_instancia(pasta):
+        return None
+    if repassar_evento(pasta, args.evento, TEMPO_SUBIDA_SERVICO):
+        return 0
+    print("A agenda já está rodando para esta pasta de dados, mas não respondeu.", flush=True)
+    return 1
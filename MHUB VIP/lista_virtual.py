@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Lista virtualizada
+Só materializa widgets para as linhas visíveis (mais uma margem), recicla os
+widgets que saem da tela e mantém o cabeçalho da seção atual fixo no topo
+"""
+
+import bisect
+import tkinter as tk
+
+import customtkinter as ctk
+
+from estilos import COR_FUNDO_LISTA, COR_DESTAQUE
+
+MARGEM_RENDERIZACAO = 400  # px além da área visível que também são materializados
+INCREMENTO_ROLAGEM = 20  # px por "unidade" da roda do mouse
+
+
+class ListaVirtual(ctk.CTkFrame):
+    """Lista rolável de linhas (chave, tipo, altura_estimada) com widgets reciclados por tipo
+    
+    criar_widget(tipo, parent) cria um widget vazio do tipo;
+    vincular(widget, chave) preenche o widget com os dados da chave.
+    Linhas do tipo_cabecalho abrem seções; o cabeçalho da seção do topo fica fixo.
+    """
+    
+    def __init__(self, parent, criar_widget, vincular, tipo_cabecalho=None, margens=None,
+                 cor_fundo=COR_FUNDO_LISTA, cor_scrollbar=COR_DESTAQUE, padx=5):
+        super().__init__(parent, fg_color="transparent")
+        
+        self.criar_widget = criar_widget
+        self.vincular = vincular
+        self.tipo_cabecalho = tipo_cabecalho
+        self.margens = margens or {}
+        self.padx = padx
+        
+        self._linhas = []
+        self._indices = {}
+        self._y = []
+        self._secoes = []
+        self._alturas_medidas = {}
+        self._vinculados = {}
+        self._janelas = {}
+        self._pool = {}
+        self._medicao_agendada = False
+        self._cabecalho_fixo = None
+        self._chave_fixa = None
+        self.widgets_criados = 0
+        
+        self.canvas = tk.Canvas(self, bg=cor_fundo, highlightthickness=0, bd=0,
+                                yscrollincrement=INCREMENTO_ROLAGEM)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._rolar_scrollbar,
+                                          button_color=cor_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.configure(yscrollcommand=self._ao_rolar)
+        self.canvas.bind("<Configure>", self._ao_redimensionar)
+        
+        self.bind_all("<MouseWheel>", self._roda_mouse, add="+")
+        self.bind_all("<Button-4>", self._roda_mouse, add="+")
+        self.bind_all("<Button-5>", self._roda_mouse, add="+")
+    
+    # ----- API -----
+    
+    def definir_linhas(self, linhas):
+        """Troca as linhas; widgets de chaves que continuam visíveis são só revinculados"""
+        self._linhas = list(linhas)
+        self._indices = {chave: i for i, (chave, _, _) in enumerate(self._linhas)}
+        
+        for chave in [c for c in self._alturas_medidas if c not in self._indices]:
+            del self._alturas_medidas[chave]
+        for chave in [c for c in self._vinculados if c not in self._indices]:
+            self._liberar(chave)
+        for chave, widget in self._vinculados.items():
+            self.vincular(widget, chave)
+        
+        self._calcular_layout()
+        self._renderizar()
+    
+    def atualizar_linha(self, chave):
+        """Revincula uma única linha (se estiver materializada) e remede sua altura"""
+        widget = self._vinculados.get(chave)
+        if widget is not None:
+            self.vincular(widget, chave)
+            self._agendar_medicao()
+        if self._chave_fixa == chave and self._cabecalho_fixo is not None:
+            self.vincular(self._cabecalho_fixo, chave)
+    
+    def widget(self, chave):
+        """Widget materializado da chave, ou None se ela estiver fora da tela"""
+        return self._vinculados.get(chave)
+    
+    def rolar_para(self, chave):
+        """Rola até a linha da chave"""
+        if chave in self._indices and self._total > 0:
+            self.canvas.yview_moveto(self._y[self._indices[chave]] / self._total)
+            self._renderizar()
+    
+    # ----- Layout -----
+    
+    def _altura(self, indice):
+        chave, _, estimada = self._linhas[indice]
+        return self._alturas_medidas.get(chave, estimada)
+    
+    def _calcular_layout(self):
+        """Posição de cada linha por soma acumulada das alturas (medidas ou estimadas)"""
+        self._y = []
+        self._secoes = []
+        y = 0
+        secao = None
+        for i, (chave, tipo, _) in enumerate(self._linhas):
+            antes, depois = self.margens.get(tipo, (0, 0))
+            if tipo == self.tipo_cabecalho:
+                secao = i
+            y += antes
+            self._y.append(y)
+            self._secoes.append(secao)
+            y += self._altura(i) + depois
+        self._total = y
+        
+        altura_visivel = max(self.canvas.winfo_height(), 1)
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), max(y, altura_visivel)))
+        
+        for chave, widget in self._vinculados.items():
+            self.canvas.coords(self._janelas[widget], self.padx, self._y[self._indices[chave]])
+    
+    def _faixa_visivel(self):
+        topo = self.canvas.canvasy(0)
+        base = topo + self.canvas.winfo_height()
+        inicio = max(bisect.bisect_right(self._y, topo - MARGEM_RENDERIZACAO) - 1, 0)
+        fim = bisect.bisect_left(self._y, base + MARGEM_RENDERIZACAO)
+        return topo, inicio, fim
+    
+    def _renderizar(self):
+        if not self._linhas:
+            for chave in list(self._vinculados):
+                self._liberar(chave)
+            self._atualizar_cabecalho_fixo(0)
+            return
+        
+        topo, inicio, fim = self._faixa_visivel()
+        visiveis = {self._linhas[i][0] for i in range(inicio, fim)}
+        
+        for chave in [c for c in self._vinculados if c not in visiveis]:
+            self._liberar(chave)
+        
+        largura = max(self.canvas.winfo_width() - 2 * self.padx, 1)
+        for i in range(inicio, fim):
+            chave, tipo, _ = self._linhas[i]
+            if chave in self._vinculados:
+                continue
+            widget = self._obter_widget(tipo)
+            self.vincular(widget, chave)
+            self._vinculados[chave] = widget
+            janela = self._janelas[widget]
+            self.canvas.coords(janela, self.padx, self._y[i])
+            self.canvas.itemconfigure(janela, state="normal", width=largura)
+        
+        self._atualizar_cabecalho_fixo(topo)
+        self._agendar_medicao()
+    
+    def _obter_widget(self, tipo):
+        """Reaproveita um widget livre do tipo ou cria um novo"""
+        livres = self._pool.setdefault(tipo, [])
+        if livres:
+            return livres.pop()
+        widget = self.criar_widget(tipo, self.canvas)
+        widget.tipo_linha = tipo
+        self.widgets_criados += 1
+        self._janelas[widget] = self.canvas.create_window(self.padx, 0, window=widget, anchor="nw", state="hidden")
+        return widget
+    
+    def _liberar(self, chave):
+        widget = self._vinculados.pop(chave)
+        self.canvas.itemconfigure(self._janelas[widget], state="hidden")
+        self._pool.setdefault(widget.tipo_linha, []).append(widget)
+    
+    def _agendar_medicao(self):
+        if not self._medicao_agendada:
+            self._medicao_agendada = True
+            self.after_idle(self._medir)
+    
+    def _medir(self):
+        """Troca as alturas estimadas pelas reais dos widgets materializados"""
+        self._medicao_agendada = False
+        if not self._vinculados:
+            return
+        self.update_idletasks()  # garante a geometria dos widgets recém-vinculados
+        mudou = False
+        for chave, widget in self._vinculados.items():
+            altura = widget.winfo_reqheight()
+            if altura > 1 and self._alturas_medidas.get(chave) != altura:
+                self._alturas_medidas[chave] = altura
+                mudou = True
+        if mudou:
+            self._calcular_layout()
+            self._renderizar()
+    
+    # ----- Cabeçalho fixo -----
+    
+    def _atualizar_cabecalho_fixo(self, topo):
+        if self.tipo_cabecalho is None:
+            return
+        indice_topo = max(bisect.bisect_right(self._y, topo) - 1, 0)
+        secao = self._secoes[indice_topo] if self._secoes else None
+        
+        # Só aparece quando o cabeçalho real da seção já saiu pelo topo
+        if secao is None or self._y[secao] >= topo:
+            if self._cabecalho_fixo is not None:
+                self._cabecalho_fixo.place_forget()
+            self._chave_fixa = None
+            return
+        
+        if self._cabecalho_fixo is None:
+            self._cabecalho_fixo = self.criar_widget(self.tipo_cabecalho, self)
+        chave = self._linhas[secao][0]
+        if chave != self._chave_fixa:
+            self.vincular(self._cabecalho_fixo, chave)
+            self._chave_fixa = chave
+        self._cabecalho_fixo.place(x=self.padx, y=0, width=max(self.canvas.winfo_width() - 2 * self.padx, 1))
+        self._cabecalho_fixo.lift()
+    
+    # ----- Rolagem -----
+    
+    def _ao_rolar(self, primeiro, ultimo):
+        self.scrollbar.set(primeiro, ultimo)
+        self._renderizar()
+    
+    def _rolar_scrollbar(self, *args):
+        self.canvas.yview(*args)
+    
+    def _ao_redimensionar(self, event):
+        largura = max(event.width - 2 * self.padx, 1)
+        for widget in self._vinculados.values():
+            self.canvas.itemconfigure(self._janelas[widget], width=largura)
+        self._calcular_layout()
+        self._renderizar()
+    
+    def _contem(self, widget):
+        while widget is not None:
+            if widget is self:
+                return True
+            widget = getattr(widget, "master", None)
+        return False
+    
+    def _roda_mouse(self, event):
+        if not self.winfo_ismapped() or not self._contem(event.widget):
+            return
+        if event.num == 4:
+            passos = -1
+        elif event.num == 5:
+            passos = 1
+        else:
+            passos = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        self.canvas.yview_scroll(passos * 3, "units")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Backends de notificação
+Som, alerta visual e aviso na bandeja atrás de uma interface única, com
+implementações para Windows, Linux e uma em memória para testes/benchmarks
+"""
+
+import collections
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import dependencias
+from audio import MotorAudio
+
+
+class BackendNotificacao:
+    """Interface dos backends: som, alerta visual e aviso na bandeja"""
+    
+    nome = "base"
+    
+    def __init__(self, abrir_janela=None, obter_bandeja=None):
+        # abrir_janela(titulo, tarefas, cor, marcacao) abre o alerta da interface, se houver uma
+        self.abrir_janela = abrir_janela
+        # obter_bandeja() retorna o pystray.Icon ativo ou None
+        self.obter_bandeja = obter_bandeja
+    
+    def tocar_som(self, ao_tocar=None):
+        raise NotImplementedError
+    
+    def alerta_visual(self, titulo, tarefas, cor, marcacao=None):
+        raise NotImplementedError
+    
+    def aviso_bandeja(self, titulo, mensagem):
+        raise NotImplementedError
+    
+    def iniciar(self):
+        """Prepara recursos caros (ex.: decodificar o áudio) antes do primeiro alerta"""
+    
+    def parar(self):
+        pass
+    
+    def _notificar_bandeja(self, titulo, mensagem):
+        """Mostra o aviso pelo ícone da bandeja; retorna False se não houver ícone"""
+        icone = self.obter_bandeja() if self.obter_bandeja else None
+        if icone is None:
+            return False
+        try:
+            icone.notify(mensagem, titulo)
+            return True
+        except Exception as e:
+            print(f"Erro ao notificar na bandeja: {e}")
+            return False
+
+
+class BackendWindows(BackendNotificacao):
+    """pygame para o som (winsound.MessageBeep assíncrono como fallback) e pystray para avisos"""
+    
+    nome = "windows"
+    
+    def __init__(self, abrir_janela=None, obter_bandeja=None, motor_audio=None):
+        super().__init__(abrir_janela, obter_bandeja)
+        self.motor_audio = motor_audio or MotorAudio(fallback=self._beep)
+    
+    @staticmethod
+    def _beep():
+        winsound = dependencias.winsound.obter()
+        if winsound is not None:
+            try:
+                # Ao contrário de Beep(800, 500), não bloqueia a thread
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+            except Exception:
+                pass
+    
+    def tocar_som(self, ao_tocar=None):
+        self.motor_audio.tocar(ao_tocar)
+    
+    def alerta_visual(self, titulo, tarefas, cor, marcacao=None):
+        if self.abrir_janela:
+            self.abrir_janela(titulo, tarefas, cor, marcacao)
+        else:
+            self.aviso_bandeja(titulo, "\n".join(tarefas))
+    
+    def aviso_bandeja(self, titulo, mensagem):
+        if not self._notificar_bandeja(titulo, mensagem):
+            print(f"🔔 {titulo}: {mensagem}")
+    
+    def iniciar(self):
+        self.motor_audio.iniciar()
+    
+    def parar(self):
+        self.motor_audio.parar()
+
+
+class BackendLinux(BackendNotificacao):
+    """pygame (ALSA/Pulse) para o som e notify-send para avisos do desktop, sem bloquear"""
+    
+    nome = "linux"
+    
+    def __init__(self, abrir_janela=None, obter_bandeja=None, motor_audio=None):
+        super().__init__(abrir_janela, obter_bandeja)
+        self.motor_audio = motor_audio or MotorAudio(fallback=self._beep)
+        self.notify_send = shutil.which("notify-send")
+        self.tocador_sistema = shutil.which("canberra-gtk-play")
+    
+    def _beep(self):
+        if self.tocador_sistema:
+            self._executar([self.tocador_sistema, "-i", "bell"])
+        else:
+            sys.stdout.write("\a")
+            sys.stdout.flush()
+    
+    @staticmethod
+    def _executar(comando):
+        """Dispara o processo sem esperar por ele"""
+        try:
+            subprocess.Popen(comando, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception as e:
+            print(f"Erro ao executar {comando[0]}: {e}")
+    
+    def _notify_send(self, titulo, mensagem, urgencia):
+        if not self.notify_send:
+            print(f"🔔 {titulo}: {mensagem}")
+            return
+        self._executar([self.notify_send, "-u", urgencia, "-a", "Agenda Pessoal", titulo, mensagem])
+    
+    def tocar_som(self, ao_tocar=None):
+        self.motor_audio.tocar(ao_tocar)
+    
+    def alerta_visual(self, titulo, tarefas, cor, marcacao=None):
+        if self.abrir_janela:
+            self.abrir_janela(titulo, tarefas, cor, marcacao)
+        else:
+            self._notify_send(titulo, "\n".join(tarefas), "critical")
+    
+    def aviso_bandeja(self, titulo, mensagem):
+        if not self._notificar_bandeja(titulo, mensagem):
+            self._notify_send(titulo, mensagem, "normal")
+    
+    def iniciar(self):
+        self.motor_audio.iniciar()
+    
+    def parar(self):
+        self.motor_audio.parar()
+
+
+class BackendMemoria(BackendNotificacao):
+    """Só registra as notificações em memória; para testes e benchmarks sem tela nem som"""
+    
+    nome = "memoria"
+    
+    def __init__(self, abrir_janela=None, obter_bandeja=None, limite=None):
+        super().__init__(abrir_janela, obter_bandeja)
+        # deque.append é atômico: várias threads podem notificar ao mesmo tempo
+        self.eventos = collections.deque(maxlen=limite)
+        self.contagens = collections.Counter()
+        self._trava = threading.Lock()
+    
+    def _registrar(self, tipo, **dados):
+        self.eventos.append((time.perf_counter(), tipo, dados))
+        with self._trava:
+            self.contagens[tipo] += 1
+    
+    def tocar_som(self, ao_tocar=None):
+        self._registrar("som")
+        if ao_tocar:
+            ao_tocar()
+    
+    def alerta_visual(self, titulo, tarefas, cor, marcacao=None):
+        self._registrar("alerta", titulo=titulo, tarefas=list(tarefas), cor=cor, marcacao=marcacao)
+    
+    def aviso_bandeja(self, titulo, mensagem):
+        self._registrar("bandeja", titulo=titulo, mensagem=mensagem)
+    
+    def limpar(self):
+        self.eventos.clear()
+        with self._trava:
+            self.contagens.clear()
+
+
+BACKENDS_NOTIFICACAO = {
+    "windows": BackendWindows,
+    "linux": BackendLinux,
+    "memoria": BackendMemoria
+}
+
+
+def criar_backend(nome=None, **kwargs):
+    """Cria o backend pelo nome, ou o da plataforma atual"""
+    if nome is None:
+        nome = "windows" if sys.platform.startswith("win") else "linux"
+    return BACKENDS_NOTIFICACAO[nome](**kwargs)
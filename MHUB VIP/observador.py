@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Observador de arquivos
+Percebe quando a rotina ou a lista de compras são editadas fora do programa
+(à mão, por script, por sincronização). No Linux usa inotify (via ctypes, sem
+dependências); nos outros sistemas, ou se o inotify falhar, consulta o
+carimbo (mtime + tamanho) dos arquivos a cada intervalo
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+INTERVALO_VERIFICACAO = 1.0  # segundos entre consultas quando não há inotify
+ATRASO_ESTABILIZACAO = 0.2  # segundos; editores gravam em etapas, espera o arquivo parar de mudar
+
+# Constantes do inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+MASCARA_INOTIFY = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENTO_INOTIFY = struct.Struct("iIII")  # wd, mask, cookie, len (seguido do nome)
+
+_AUSENTE = object()
+
+
+def carimbo(arquivo):
+    """(mtime em ns, tamanho) do arquivo, ou None se ele não existir"""
+    try:
+        info = os.stat(arquivo)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def mesclar(base, nossa, deles):
+    """Mescla em três vias dois dicionários que partiram de base
+    
+    Retorna (alteradas, conflitos): as chaves que só mudaram em deles (tomar a
+    versão deles; ausente = removida) e as que mudaram dos dois lados com
+    valores diferentes.
+    """
+    alteradas, conflitos = set(), set()
+    for chave in set(base) | set(nossa) | set(deles):
+        original = base.get(chave, _AUSENTE)
+        nosso = nossa.get(chave, _AUSENTE)
+        delas = deles.get(chave, _AUSENTE)
+        if delas == original or delas == nosso:
+            continue
+        if nosso == original:
+            alteradas.add(chave)
+        else:
+            conflitos.add(chave)
+    return alteradas, conflitos
+
+
+def _carregar_inotify():
+    """libc com inotify_init1/inotify_add_watch, ou None fora do Linux"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class ObservadorArquivos:
+    """Chama ao_mudar(arquivo), numa thread própria, quando um dos arquivos muda no disco
+    
+    Guarda o último carimbo conhecido de cada arquivo; gravações do próprio
+    programa devem chamar conhecer() para não voltarem como mudança externa.
+    O carimbo só é atualizado depois que ao_mudar retorna, então ao_mudar
+    deve ler o arquivo antes de retornar.
+    """
+    
+    def __init__(self, arquivos, ao_mudar, intervalo=INTERVALO_VERIFICACAO):
+        self.arquivos = [os.path.abspath(arquivo) for arquivo in arquivos]
+        self.ao_mudar = ao_mudar
+        self.intervalo = intervalo
+        self._trava = threading.Lock()
+        self._carimbos = {arquivo: carimbo(arquivo) for arquivo in self.arquivos}
+        self._parado = threading.Event()
+        self._thread = None
+        self.modo = None  # "inotify" ou "consulta", definido ao iniciar
+        self.mudancas = 0
+    
+    def conhecer(self, arquivo):
+        """O programa acabou de gravar o arquivo: o carimbo atual não é mudança externa"""
+        arquivo = os.path.abspath(arquivo)
+        with self._trava:
+            if arquivo in self._carimbos:
+                self._carimbos[arquivo] = carimbo(arquivo)
+    
+    def alterado(self, arquivo):
+        """True se o arquivo mudou no disco e a mudança ainda não foi entregue a ao_mudar"""
+        arquivo = os.path.abspath(arquivo)
+        with self._trava:
+            if arquivo not in self._carimbos:
+                return False
+            return carimbo(arquivo) != self._carimbos[arquivo]
+    
+    def verificar(self, arquivos=None):
+        """Entrega a ao_mudar os arquivos (todos, se None) cujo carimbo mudou"""
+        for arquivo in self.arquivos if arquivos is None else arquivos:
+            atual = carimbo(arquivo)
+            with self._trava:
+                if atual == self._carimbos[arquivo]:
+                    continue
+            while not self._parado.is_set():
+                time.sleep(ATRASO_ESTABILIZACAO)
+                estavel = carimbo(arquivo)
+                if estavel == atual:
+                    break
+                atual = estavel
+            with self._trava:
+                if atual == self._carimbos[arquivo]:
+                    continue  # gravação do próprio programa: conhecer() chegou durante a espera
+            try:
+                self.ao_mudar(arquivo)
+            except Exception as e:
+                print(f"Erro ao recarregar {arquivo}: {e}")
+            with self._trava:
+                self._carimbos[arquivo] = atual
+            self.mudancas += 1
+    
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        libc = _carregar_inotify()
+        self.modo = "inotify" if libc is not None else "consulta"
+        self._thread = threading.Thread(target=self._loop, args=(libc,), daemon=True)
+        self._thread.start()
+    
+    def parar(self):
+        self._parado.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def _loop(self, libc):
+        if libc is not None:
+            try:
+                self._loop_inotify(libc)
+                return
+            except OSError as e:
+                print(f"inotify indisponível ({e}), consultando a cada {self.intervalo:g} s")
+                self.modo = "consulta"
+        while not self._parado.wait(self.intervalo):
+            self.verificar()
+    
+    def _loop_inotify(self, libc):
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        try:
+            # Observa as pastas, não os arquivos: a troca atômica (rename) cria outro inode
+            pastas = {}
+            for pasta in {os.path.dirname(arquivo) for arquivo in self.arquivos}:
+                wd = libc.inotify_add_watch(fd, os.fsencode(pasta), MASCARA_INOTIFY)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+                pastas[wd] = pasta
+            
+            while not self._parado.is_set():
+                prontos, _, _ = select.select([fd], [], [], self.intervalo)
+                if not prontos:
+                    continue
+                try:
+                    dados = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                self.verificar(self._arquivos_dos_eventos(dados, pastas))
+        finally:
+            os.close(fd)
+    
+    def _arquivos_dos_eventos(self, dados, pastas):
+        alterados = []
+        posicao = 0
+        while posicao + EVENTO_INOTIFY.size <= len(dados):
+            wd, mascara, _, tamanho = EVENTO_INOTIFY.unpack_from(dados, posicao)
+            inicio = posicao + EVENTO_INOTIFY.size
+            nome = dados[inicio:inicio + tamanho].rstrip(b"\0")
+            posicao = inicio + tamanho
+            if mascara & IN_Q_OVERFLOW:
+                # Fila do kernel estourou: eventos perdidos, confere todos
+                return self.arquivos
+            arquivo = os.path.join(pastas.get(wd, ""), os.fsdecode(nome))
+            if arquivo in self._carimbos and arquivo not in alterados:
+                alterados.append(arquivo)
+        return alterados
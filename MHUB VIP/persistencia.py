@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Persistência adiada
+As alterações marcam o arquivo como sujo; uma thread grava só a versão mais
+recente de cada arquivo depois de um curto intervalo, sempre de forma atômica
+(arquivo temporário + fsync + rename), fora da thread da interface
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+ATRASO_GRAVACAO = 0.5  # segundos sem novas alterações antes de gravar
+ATRASO_MAXIMO_GRAVACAO = 3.0  # segundos; uma rajada contínua não adia a gravação além disso
+
+
+def arquivo_conflito(arquivo):
+    """Onde guardar a versão que perdeu um conflito (rotina.json -> rotina.conflito.json)"""
+    raiz, extensao = os.path.splitext(arquivo)
+    return f"{raiz}.conflito{extensao}"
+
+
+def gravar_json_atomico(arquivo, dados, indent=None):
+    """Grava num temporário da mesma pasta, força para o disco e troca pelo original
+    
+    Se o processo morrer no meio, o arquivo antigo continua inteiro.
+    """
+    pasta = os.path.dirname(os.path.abspath(arquivo))
+    fd, temporario = tempfile.mkstemp(prefix=os.path.basename(arquivo) + ".", suffix=".tmp", dir=pasta)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, arquivo)
+    except BaseException:
+        try:
+            os.remove(temporario)
+        except OSError:
+            pass
+        raise
+
+
+class GravadorAdiado:
+    """Agrupa as gravações por arquivo e as faz numa thread própria após um atraso
+    
+    marcar() recebe uma cópia dos dados (quem chama não pode mais alterá-la);
+    várias marcações do mesmo arquivo dentro do atraso viram uma só gravação.
+    Os dados também podem ser uma função que os monta: ela só é chamada na
+    hora de gravar, na thread do gravador (ex.: exportar o banco para JSON).
+    
+    conferir(arquivo), se definido, é chamado antes de cada gravação: se
+    retornar False (o arquivo foi editado fora do programa e a edição ainda
+    não foi mesclada) a gravação fica pendente em vez de sobrescrevê-lo.
+    ao_gravar(arquivo, dados) é chamado depois de cada gravação.
+    """
+    
+    def __init__(self, atraso=ATRASO_GRAVACAO, atraso_maximo=ATRASO_MAXIMO_GRAVACAO, gravar=gravar_json_atomico):
+        self.atraso = atraso
+        self.atraso_maximo = atraso_maximo
+        self.gravar = gravar
+        self._pendentes = {}
+        self._condicao = threading.Condition()
+        self._trava_gravacao = threading.Lock()  # uma gravação por vez (thread ou descarregar)
+        self._prazo = None
+        self._limite = None
+        self._thread = None
+        self._parado = False
+        self.conferir = None
+        self.ao_gravar = None
+        self.gravacoes = 0
+        self.marcacoes = 0
+        self.adiamentos = 0
+    
+    def marcar(self, arquivo, dados, indent=None):
+        """Marca o arquivo como sujo com o novo conteúdo"""
+        agora = time.monotonic()
+        with self._condicao:
+            self._pendentes[arquivo] = (dados, indent)
+            self.marcacoes += 1
+            if self._limite is None:
+                self._limite = agora + self.atraso_maximo
+            self._prazo = min(agora + self.atraso, self._limite)
+            parado = self._parado
+            if not parado:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, daemon=True)
+                    self._thread.start()
+                else:
+                    self._condicao.notify()
+        if parado:
+            # Depois de parar() não há mais thread: grava na hora
+            self.descarregar()
+    
+    @property
+    def sujo(self):
+        with self._condicao:
+            return bool(self._pendentes)
+    
+    def descarregar(self):
+        """Grava agora tudo o que estiver pendente (bloqueia até terminar)"""
+        with self._trava_gravacao:
+            with self._condicao:
+                pendentes = self._pendentes
+                self._pendentes = {}
+                self._prazo = self._limite = None
+            adiados = {}
+            for arquivo, (dados, indent) in pendentes.items():
+                if self.conferir is not None and not self.conferir(arquivo):
+                    adiados[arquivo] = (dados, indent)
+                    continue
+                try:
+                    if callable(dados):
+                        dados = dados()
+                    self.gravar(arquivo, dados, indent)
+                    self.gravacoes += 1
+                except Exception as e:
+                    print(f"Erro ao salvar {arquivo}: {e}")
+                    continue
+                if self.ao_gravar is not None:
+                    self.ao_gravar(arquivo, dados)
+            if adiados:
+                self._adiar(adiados)
+    
+    def _adiar(self, adiados):
+        """Devolve à fila o que não pôde ser gravado (a menos que já haja versão mais nova)"""
+        agora = time.monotonic()
+        with self._condicao:
+            self.adiamentos += len(adiados)
+            for arquivo, pendente in adiados.items():
+                self._pendentes.setdefault(arquivo, pendente)
+            if self._prazo is None:
+                self._limite = agora + self.atraso_maximo
+                self._prazo = agora + self.atraso
+    
+    def parar(self):
+        """Encerra a thread e grava o que faltar"""
+        with self._condicao:
+            self._parado = True
+            self._condicao.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self.descarregar()
+        
+        with self._condicao:
+            pendentes = self._pendentes
+            self._pendentes = {}
+        for arquivo, (dados, indent) in pendentes.items():
+            # Ainda em conflito ao sair: a versão do programa fica ao lado, sem sobrescrever
+            print(f"{arquivo} foi alterado fora do programa; versão do programa salva em {arquivo_conflito(arquivo)}")
+            self.gravar(arquivo_conflito(arquivo), dados() if callable(dados) else dados, indent)
+    
+    def _loop(self):
+        while True:
+            with self._condicao:
+                while not self._parado:
+                    if self._prazo is None:
+                        self._condicao.wait()
+                        continue
+                    restante = self._prazo - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._condicao.wait(restante)
+                if self._parado:
+                    return
+            self.descarregar()
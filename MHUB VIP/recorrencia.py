@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Variantes da rotina
+Além da rotina padrão, variantes com regra de recorrência (dias da semana,
+faixa de datas, datas avulsas) mudam os horários de certos dias: fim de
+semana, dia de descanso, férias. A rotina efetiva de cada dia é compilada uma
+vez e fica em cache até uma regra (ou a rotina padrão) mudar.
+
+Formato do arquivo (lista, na ordem em que as variantes foram criadas):
+    [{"nome": "Fim de semana", "dias_semana": [5, 6],
+      "inicio": "2026-01-01", "fim": null, "datas": [],
+      "prioridade": 0, "substituir": false,
+      "horarios": {"08:00": null, "10:00": {"titulo": ..., "tarefas": [...]}}}]
+dias_semana segue datetime.weekday() (0 = segunda ... 6 = domingo), como o
+recurrence_days da API de eventos do MHUB. Com substituir, a variante troca
+a rotina inteira do dia; sem ele, seus horários são sobrepostos à padrão e
+null remove um horário.
+"""
+
+import threading
+from datetime import date
+
+from rotina import Rotina, Horario
+
+LIMITE_CACHE_DIAS = 14  # dias compilados mantidos (hoje, amanhã, os abertos nas estatísticas...)
+
+
+def _data(texto):
+    return date.fromisoformat(texto) if texto else None
+
+
+def _prioridade(valor):
+    """Prioridade como inteiro ("2" e 2.0 valem); ValueError para o resto (a ordenação das variantes compara inteiros)"""
+    try:
+        if isinstance(valor, bool) or isinstance(valor, float) and not valor.is_integer():
+            raise ValueError
+        return int(valor)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"prioridade inválida: {valor!r}") from None
+
+
+class Variante:
+    """Uma variante da rotina e a regra dos dias em que ela vale"""
+    
+    __slots__ = ("nome", "dias_semana", "inicio", "fim", "datas", "prioridade", "substituir", "horarios")
+    
+    def __init__(self, nome, dias_semana=(), inicio=None, fim=None, datas=(), prioridade=0,
+                 substituir=False, horarios=None):
+        self.nome = nome
+        self.dias_semana = frozenset(dias_semana)
+        self.inicio = inicio
+        self.fim = fim
+        self.datas = frozenset(datas)
+        self.prioridade = _prioridade(prioridade)
+        self.substituir = substituir
+        self.horarios = horarios or {}  # {"HH:MM": Horario, ou None para remover}
+    
+    @classmethod
+    def de_dict(cls, dados):
+        horarios = {}
+        for horario, campos in (dados.get("horarios") or {}).items():
+            horarios[horario] = None if campos is None else Horario.de_dict(horario, campos)
+        return cls(
+            dados["nome"],
+            dados.get("dias_semana") or (),
+            _data(dados.get("inicio")),
+            _data(dados.get("fim")),
+            [_data(texto) for texto in dados.get("datas") or ()],
+            dados.get("prioridade", 0),
+            bool(dados.get("substituir", False)),
+            horarios
+        )
+    
+    def para_dict(self):
+        return {
+            "nome": self.nome,
+            "dias_semana": sorted(self.dias_semana),
+            "inicio": self.inicio.isoformat() if self.inicio else None,
+            "fim": self.fim.isoformat() if self.fim else None,
+            "datas": sorted(data.isoformat() for data in self.datas),
+            "prioridade": self.prioridade,
+            "substituir": self.substituir,
+            "horarios": {
+                horario: None if dados is None else dados.para_dict()
+                for horario, dados in sorted(self.horarios.items())
+            }
+        }
+    
+    def especificidade(self, data):
+        """Quão específica é a regra para a data (data avulsa > faixa de datas > só dias da semana), ou None se não vale"""
+        if data in self.datas:
+            return 2
+        if self.datas and not (self.dias_semana or self.inicio or self.fim):
+            return None  # só datas avulsas
+        if self.inicio and data < self.inicio or self.fim and data > self.fim:
+            return None
+        if self.dias_semana and data.weekday() not in self.dias_semana:
+            return None
+        return 1 if self.inicio or self.fim else 0
+
+
+class CalendarioRotina:
+    """Compila a rotina efetiva de cada dia a partir da padrão e das variantes
+    
+    rotina_do_dia() é uma consulta ao cache depois da primeira vez; invalidar()
+    deve ser chamado quando a rotina padrão ou as variantes mudarem.
+    """
+    
+    def __init__(self, base, variantes=()):
+        self.base = base
+        self.variantes = list(variantes)
+        self._trava = threading.Lock()  # a thread do agendador também compila (na virada do dia)
+        self._cache = {}
+        self.compilacoes = 0
+    
+    def invalidar(self):
+        with self._trava:
+            self._cache.clear()
+    
+    def definir_variantes(self, variantes):
+        with self._trava:
+            self.variantes = list(variantes)
+            self._cache.clear()
+    
+    def variante(self, nome):
+        return next((variante for variante in self.variantes if variante.nome == nome), None)
+    
+    def rotina_do_dia(self, data):
+        return self._compilado(data)[0]
+    
+    def origem(self, data, horario):
+        """Nome da variante de onde veio o horário no dia, ou None se veio da rotina padrão"""
+        return self._compilado(data)[1].get(horario)
+    
+    def variantes_do_dia(self, data):
+        """Nomes das variantes que valem no dia, da menos para a mais prioritária"""
+        return self._compilado(data)[2]
+    
+    def _compilado(self, data):
+        with self._trava:
+            compilado = self._cache.get(data)
+            if compilado is None:
+                if len(self._cache) >= LIMITE_CACHE_DIAS:
+                    del self._cache[next(iter(self._cache))]
+                compilado = self._cache[data] = self._compilar(data)
+            return compilado
+    
+    def _compilar(self, data):
+        """(rotina, {horario: variante}, nomes das variantes) do dia"""
+        self.compilacoes += 1
+        validas = []
+        for ordem, variante in enumerate(self.variantes):
+            especificidade = variante.especificidade(data)
+            if especificidade is not None:
+                validas.append((variante.prioridade, especificidade, ordem, variante))
+        if not validas:
+            return self.base, {}, ()
+        
+        # Da menos para a mais prioritária: a última a definir um horário vence
+        validas.sort(key=lambda valida: valida[:3])
+        rotina = self.base.copiar()
+        origem = {}
+        for _, _, _, variante in validas:
+            if variante.substituir:
+                rotina, origem = Rotina(), {}
+            for horario, dados in variante.horarios.items():
+                if dados is None:
+                    rotina.remover(horario)
+                    origem.pop(horario, None)
+                else:
+                    rotina.definir(dados.copiar())
+                    origem[dados.horario] = variante.nome
+        return rotina, origem, tuple(variante.nome for _, _, _, variante in validas)
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Modelo da rotina
+Cada horário é um objeto compacto (__slots__) com a hora em minutos desde a
+meia-noite; a rotina mantém os minutos num array ordenado, atualizado a cada
+edição, e responde "próximo alerta" por busca binária ("já passou" vira uma
+comparação de inteiros).
+Horários podem ter duração (em minutos); os intervalos ficam numa árvore de
+intervalos, reconstruída só quando a rotina muda, que responde "o que está
+em andamento agora" e "com o que este horário se sobrepõe" em O(log n + k).
+No JSON o formato continua o de sempre: {"HH:MM": {"titulo", "periodo", "cor", "tarefas", ...}},
+com "duracao" só quando o horário tem duração
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+MINUTOS_DIA = 24 * 60
+CAMPOS_HORARIO = ("titulo", "periodo", "cor", "tarefas", "duracao")
+
+
+def para_minutos(horario):
+    """"HH:MM" -> minutos desde a meia-noite (ValueError se inválido)"""
+    hora, _, minuto = horario.partition(":")
+    minutos = int(hora) * 60 + int(minuto)
+    if not 0 <= int(minuto) < 60 or not 0 <= minutos < MINUTOS_DIA:
+        raise ValueError(f"Horário inválido: {horario!r}")
+    return minutos
+
+
+def formatar_minutos(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def minutos_do_dia(momento):
+    """Minutos desde a meia-noite de um datetime"""
+    return momento.hour * 60 + momento.minute
+
+
+def validar_duracao(duracao):
+    """Duração em minutos (0 = sem duração); ValueError se não couber num dia"""
+    duracao = int(duracao)
+    if not 0 <= duracao < MINUTOS_DIA:
+        raise ValueError(f"Duração inválida: {duracao!r}")
+    return duracao
+
+
+def duracao_ate(inicio, fim):
+    """Minutos de inicio até fim ("HH:MM" ou minutos); fim antes do início é no dia seguinte"""
+    inicio = inicio if isinstance(inicio, int) else para_minutos(inicio)
+    fim = fim if isinstance(fim, int) else para_minutos(fim)
+    return (fim - inicio) % MINUTOS_DIA
+
+
+def intervalo_texto(minutos, duracao):
+    """"HH:MM" ou "HH:MM–HH:MM" (o fim pode passar da meia-noite)"""
+    if not duracao:
+        return formatar_minutos(minutos)
+    return f"{formatar_minutos(minutos)}–{formatar_minutos((minutos + duracao) % MINUTOS_DIA)}"
+
+
+class Horario:
+    """Um horário da rotina; extras guarda campos desconhecidos do JSON para não perdê-los
+    
+    duracao é em minutos; 0 é um horário pontual (só o alerta), que para
+    efeito de sobreposição ocupa o seu minuto.
+    """
+    
+    __slots__ = ("minutos", "titulo", "periodo", "cor", "tarefas", "extras", "duracao")
+    
+    def __init__(self, minutos, titulo, periodo="MANHÃ", cor="#FF6B35", tarefas=(), extras=None, duracao=0):
+        self.minutos = minutos
+        self.titulo = titulo
+        self.periodo = periodo
+        self.cor = cor
+        self.tarefas = list(tarefas)
+        self.extras = extras or {}
+        self.duracao = duracao
+    
+    @property
+    def horario(self):
+        return formatar_minutos(self.minutos)
+    
+    @property
+    def fim(self):
+        """Minuto (exclusivo) em que o horário termina; passa de MINUTOS_DIA se cruzar a meia-noite"""
+        return self.minutos + max(self.duracao, 1)
+    
+    @property
+    def intervalo(self):
+        return intervalo_texto(self.minutos, self.duracao)
+    
+    @classmethod
+    def de_dict(cls, horario, dados):
+        extras = {chave: valor for chave, valor in dados.items() if chave not in CAMPOS_HORARIO}
+        return cls(
+            para_minutos(horario),
+            dados.get("titulo", ""),
+            dados.get("periodo", "MANHÃ"),
+            dados.get("cor", "#FF6B35"),
+            dados.get("tarefas", []),
+            extras,
+            validar_duracao(dados.get("duracao") or 0)
+        )
+    
+    def para_dict(self):
+        dados = {"titulo": self.titulo, "periodo": self.periodo, "cor": self.cor, "tarefas": list(self.tarefas)}
+        if self.duracao:
+            dados["duracao"] = self.duracao
+        dados.update(self.extras)
+        return dados
+    
+    def copiar(self, minutos=None):
+        """Cópia independente (as tarefas são uma lista nova), opcionalmente em outro horário"""
+        return Horario(
+            self.minutos if minutos is None else minutos,
+            self.titulo, self.periodo, self.cor, self.tarefas, dict(self.extras), self.duracao
+        )
+    
+    def __eq__(self, outro):
+        if not isinstance(outro, Horario):
+            return NotImplemented
+        return all(getattr(self, campo) == getattr(outro, campo) for campo in self.__slots__)
+    
+    def __repr__(self):
+        return f"Horario({self.horario!r}, {self.titulo!r})"
+
+
+class ArvoreIntervalos:
+    """Árvore de intervalos [inicio, fim) estática, montada de uma vez a partir de uma lista
+    
+    É a árvore binária balanceada implícita sobre os intervalos ordenados pelo
+    início (o nó de [lo, hi) é o do meio), com o maior fim de cada subárvore:
+    uma consulta desce só pelos ramos que ainda podem ter interseção.
+    """
+    
+    def __init__(self, intervalos=()):
+        intervalos = sorted(intervalos, key=lambda intervalo: intervalo[:2])
+        self._inicios = [intervalo[0] for intervalo in intervalos]
+        self._fins = [intervalo[1] for intervalo in intervalos]
+        self._valores = [intervalo[2] for intervalo in intervalos]
+        self._maior_fim = list(self._fins)
+        self._montar(0, len(intervalos))
+    
+    def _montar(self, lo, hi):
+        if lo >= hi:
+            return float("-inf")
+        meio = (lo + hi) // 2
+        self._maior_fim[meio] = max(self._fins[meio], self._montar(lo, meio), self._montar(meio + 1, hi))
+        return self._maior_fim[meio]
+    
+    def __len__(self):
+        return len(self._inicios)
+    
+    def sobrepostos(self, inicio, fim):
+        """Valores dos intervalos que se sobrepõem a [inicio, fim), em ordem de início"""
+        encontrados = []
+        pilha = [(0, len(self._inicios))]
+        while pilha:
+            lo, hi = pilha.pop()
+            if lo >= hi:
+                continue
+            meio = (lo + hi) // 2
+            if self._maior_fim[meio] <= inicio:
+                continue  # nada nesta subárvore termina depois do início
+            if self._inicios[meio] < fim:
+                pilha.append((meio + 1, hi))
+                if self._fins[meio] > inicio:
+                    encontrados.append(meio)
+            pilha.append((lo, meio))
+        return [self._valores[i] for i in sorted(encontrados)]
+    
+    def em(self, ponto):
+        """Valores dos intervalos que contêm o ponto"""
+        return self.sobrepostos(ponto, ponto + 1)
+
+
+class Rotina:
+    """Horários indexados por "HH:MM", com os minutos num array ordenado
+    
+    Funciona como um dicionário só de leitura {"HH:MM": Horario} (in, [],
+    get, keys, items, len, iteração pelas chaves), sempre em ordem de hora;
+    as alterações passam por definir/remover, que mantêm o índice sem reordenar
+    e descartam a árvore de intervalos (remontada na próxima consulta).
+    """
+    
+    def __init__(self, horarios=()):
+        self._por_minuto = {}
+        self._minutos = []
+        self._arvore = None
+        for horario in horarios:
+            self.definir(horario)
+    
+    @classmethod
+    def de_json(cls, dados):
+        """Rotina a partir do formato dos arquivos ({"HH:MM": {...}}); horários inválidos são ignorados"""
+        rotina = cls()
+        for horario, campos in dados.items():
+            try:
+                rotina.definir(Horario.de_dict(horario, campos))
+            except (ValueError, AttributeError) as e:
+                print(f"Horário ignorado na rotina ({horario}): {e}")
+        return rotina
+    
+    def para_json(self):
+        return {horario.horario: horario.para_dict() for horario in self.horarios()}
+    
+    def copiar(self):
+        return Rotina(horario.copiar() for horario in self.horarios())
+    
+    # ----- Alterações (índice incremental) -----
+    
+    def definir(self, horario):
+        """Inclui ou substitui o horário (pelo seu minuto)"""
+        if horario.minutos not in self._por_minuto:
+            insort(self._minutos, horario.minutos)
+        self._por_minuto[horario.minutos] = horario
+        self._arvore = None
+    
+    def remover(self, chave):
+        """Remove pelo "HH:MM" ou pelos minutos; retorna o Horario removido ou None"""
+        minutos = chave if isinstance(chave, int) else self._minutos_da_chave(chave)
+        horario = self._por_minuto.pop(minutos, None)
+        if horario is not None:
+            del self._minutos[bisect_left(self._minutos, minutos)]
+            self._arvore = None
+        return horario
+    
+    # ----- Consultas -----
+    
+    @staticmethod
+    def _minutos_da_chave(chave):
+        try:
+            return para_minutos(chave)
+        except (ValueError, AttributeError):
+            return None
+    
+    def __contains__(self, chave):
+        return self._minutos_da_chave(chave) in self._por_minuto
+    
+    def __getitem__(self, chave):
+        horario = self._por_minuto.get(self._minutos_da_chave(chave))
+        if horario is None:
+            raise KeyError(chave)
+        return horario
+    
+    def get(self, chave, padrao=None):
+        return self._por_minuto.get(self._minutos_da_chave(chave), padrao)
+    
+    def __len__(self):
+        return len(self._minutos)
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def keys(self):
+        return [formatar_minutos(minutos) for minutos in self._minutos]
+    
+    def horarios(self):
+        """Os objetos Horario em ordem de hora"""
+        return [self._por_minuto[minutos] for minutos in self._minutos]
+    
+    def items(self):
+        return [(horario.horario, horario) for horario in self.horarios()]
+    
+    def proximo(self, depois_de, ignorar=()):
+        """Primeiro horário com minutos > depois_de cujo "HH:MM" não esteja em ignorar, ou None"""
+        for i in range(bisect_right(self._minutos, depois_de), len(self._minutos)):
+            horario = self._por_minuto[self._minutos[i]]
+            if horario.horario not in ignorar:
+                return horario
+        return None
+    
+    # ----- Intervalos -----
+    
+    def arvore(self):
+        """Árvore de intervalos dos horários (montada em O(n log n) só depois de uma alteração)"""
+        arvore = self._arvore
+        if arvore is None:
+            arvore = self._arvore = ArvoreIntervalos(
+                (horario.minutos, horario.fim, horario) for horario in self.horarios()
+            )
+        return arvore
+    
+    def em_andamento(self, minutos):
+        """Horários com duração que estão acontecendo no minuto (inclusive os que vieram de antes da meia-noite)"""
+        arvore = self.arvore()
+        andamento = arvore.em(minutos) + arvore.em(minutos + MINUTOS_DIA)
+        return [horario for horario in andamento if horario.duracao]
+    
+    def sobrepostos(self, minutos, duracao=0, ignorar=None):
+        """Horários que se sobrepõem a [minutos, minutos + duracao), exceto o de chave ignorar"""
+        fim = minutos + max(duracao, 1)
+        arvore = self.arvore()
+        encontrados = {}
+        for deslocamento in (0, MINUTOS_DIA, -MINUTOS_DIA):  # intervalos que cruzam a meia-noite
+            for horario in arvore.sobrepostos(minutos + deslocamento, fim + deslocamento):
+                if horario.horario != ignorar:
+                    encontrados[horario.minutos] = horario
+        return [encontrados[chave] for chave in sorted(encontrados)]
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Modo --headless
+Só o agendador, o armazenamento e o backend de notificação, sem janela:
+este módulo (e tudo o que ele importa) não usa customtkinter, Tk,
+pygame nem PIL (só a bandeja, com --bandeja, carrega PIL e pystray).
+Quando um alerta dispara, a janela com senha abre num
+processo à parte (agenda_pessoal.py --alerta), que carrega a interface e o
+som só enquanto o alerta está na tela e conta de volta, pela saída padrão,
+quando a janela apareceu, quando o som tocou e quando a senha foi digitada.
+É também o serviço das janelas abertas com --servico (servico.py): com uma
+delas conectada, os alertas abrem nela; com --bandeja o ícone da bandeja
+fica aqui e abre a janela quando clicado.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+from datetime import datetime
+
+from agenda_core import AgendaCore, PORTA_API
+from armazenamento import ARMAZENAMENTOS
+from notificacoes import criar_backend, BACKENDS_NOTIFICACAO
+from servico import ServidorServico, comando_app, abrir_processo, argumentos_repassados
+from bandeja import iniciar_bandeja, ALERTA_TESTE
+from instancia import adicionar_opcoes_repasse
+
+
+def comando_alerta(backend_notificacao=None):
+    """Linha de comando do processo da janela de alerta"""
+    comando = comando_app("--alerta")
+    if backend_notificacao:
+        comando += ["--notificacao", backend_notificacao]
+    return comando
+
+
+def tem_tela():
+    """Há onde abrir uma janela? (no Linux, sem DISPLAY/WAYLAND_DISPLAY não há)"""
+    if not sys.platform.startswith("linux"):
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+class AlertasEmProcesso:
+    """abrir_janela dos backends de notificação: cada alerta vira um processo com a janela com senha
+    
+    Uma thread por processo lê as linhas JSON que ele escreve e as publica no
+    barramento do núcleo ("alerta_etapa"), que as trata na thread dona.
+    """
+    
+    def __init__(self, core, backend_notificacao=None):
+        self.core = core
+        self.backend_notificacao = backend_notificacao
+        self.processos = set()
+        self.core.eventos.assinar("alerta_etapa", self._etapa)
+    
+    def abrir(self, titulo, tarefas, cor, marcacao=None):
+        pedido = json.dumps({"titulo": titulo, "tarefas": list(tarefas), "cor": cor}, ensure_ascii=False)
+        processo = subprocess.Popen(
+            comando_alerta(self.backend_notificacao),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding="utf-8"
+        )
+        processo.stdin.write(pedido)
+        processo.stdin.close()
+        self.processos.add(processo)
+        threading.Thread(target=self._acompanhar, args=(processo, marcacao), daemon=True).start()
+    
+    def _acompanhar(self, processo, marcacao):
+        for linha in processo.stdout:
+            try:
+                etapa = json.loads(linha)["etapa"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            self.core.eventos.publicar("alerta_etapa", processo, marcacao, etapa)
+        processo.wait()
+        self.core.eventos.publicar("alerta_etapa", processo, marcacao, None)
+    
+    def _etapa(self, processo, marcacao, etapa):
+        if etapa is None:
+            self.processos.discard(processo)
+        elif etapa == "confirmado":
+            self.core.confirmar_alerta(marcacao)
+        else:
+            self.core.medidor_latencia.marcar(marcacao, etapa)
+    
+    def parar(self):
+        for processo in list(self.processos):
+            processo.terminate()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agenda Pessoal - só os alertas, sem janela (--headless)")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--notificacao", choices=list(BACKENDS_NOTIFICACAO),
+                        help="backend de som/avisos (padrão: o da plataforma)")
+    parser.add_argument("--armazenamento", choices=list(ARMAZENAMENTOS), default="sqlite",
+                        help="onde guardar os dados (padrão: sqlite)")
+    parser.add_argument("--pasta-dados",
+                        help="pasta dos arquivos de dados (padrão: a pasta do aplicativo)")
+    parser.add_argument("--api", type=int, nargs="?", const=PORTA_API, metavar="PORTA",
+                        help=f"serve a API HTTP local em 127.0.0.1 (porta padrão: {PORTA_API})")
+    parser.add_argument("--bandeja", action="store_true",
+                        help="mostra o ícone da bandeja, que abre a janela (--servico) quando clicado")
+    adicionar_opcoes_repasse(parser)
+    args = parser.parse_args(argv)
+    
+    core = AgendaCore(args.armazenamento, args.pasta_dados)
+    servico = ServidorServico(core)
+    if not servico.iniciar():
+        print("A agenda já está rodando para esta pasta de dados.", flush=True)
+        core.parar()
+        return 1
+    janelas = AlertasEmProcesso(core, args.notificacao) if tem_tela() else None
+    bandeja = None
+    notificador = criar_backend(args.notificacao, abrir_janela=janelas.abrir if janelas else None,
+                                obter_bandeja=lambda: bandeja)
+    processo_janela = None
+    
+    def alertar(horario, marcacao):
+        dados = core.rotina_do_dia().get(horario)
+        if dados is None:
+            return
+        print(f"[{datetime.now():%H:%M:%S}] ⏰ {horario} - {dados.titulo}", flush=True)
+        if servico.clientes:
+            # Com a janela aberta o alerta abre nela, que marca as etapas a partir da fila do Tk
+            servico.enviar_todos("evento", "alerta", (horario, marcacao))
+            return
+        core.medidor_latencia.marcar(marcacao, "tk")  # a etapa da fila do Tk aqui é a do barramento
+        notificador.alerta_visual(dados.titulo, dados.tarefas, dados.cor, marcacao)
+        if janelas is None:
+            # Sem tela, o aviso do sistema vem sem som; o som sai daqui mesmo (carrega o pygame só agora)
+            notificador.tocar_som(lambda: core.medidor_latencia.marcar(marcacao, "som"))
+    
+    # Pedidos da bandeja, com os mesmos nomes dos eventos da janela
+    def mostrar():
+        nonlocal processo_janela
+        if servico.clientes:
+            servico.enviar_todos("evento", "mostrar", ())
+        elif tem_tela() and (processo_janela is None or processo_janela.poll() is not None):
+            comando = comando_app("--servico", "--janela-do-servico", *argumentos_repassados(args))
+            processo_janela = abrir_processo(comando)
+    
+    def testar_alerta():
+        if servico.clientes:
+            servico.enviar_todos("evento", "testar_alerta", ())
+        else:
+            notificador.alerta_visual(*ALERTA_TESTE)
+    
+    def resetar_alertas():
+        core.resetar_alertas()
+        notificador.aviso_bandeja("Agenda Pessoal", "✅ Alertas resetados!")
+    
+    core.ao_alerta = alertar
+    core.ao_mudanca_externa = servico.mudanca_externa
+    core.eventos.assinar("mostrar", mostrar)
+    core.eventos.assinar("testar_alerta", testar_alerta)
+    core.eventos.assinar("resetar_alertas", resetar_alertas)
+    signal.signal(signal.SIGTERM, lambda *_: core.eventos.publicar("sair"))
+    core.iniciar_agendador()
+    core.iniciar_observador()
+    if args.api is not None and core.iniciar_api(args.api):
+        print(f"API local em http://{core.api.host}:{core.api.porta}/api/v1/tasks", flush=True)
+    if args.bandeja and tem_tela():
+        bandeja = iniciar_bandeja(core.eventos.publicar)
+    proximo = core.proximo_alerta()
+    print(f"Agenda rodando em modo headless. Próximo alerta: {proximo or '-'}", flush=True)
+    if args.evento != "mostrar":
+        core.eventos.publicar(args.evento)
+    try:
+        core.rodar_sem_interface()
+    finally:
+        servico.parar()
+        if bandeja is not None:
+            bandeja.stop()
+        if janelas is not None:
+            janelas.parar()
+        notificador.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+Agenda Pessoal - Serviço e janela em processos separados
+O serviço (agenda_pessoal.py --headless --bandeja) é o dono do estado:
+agendador, armazenamento, observador, API e o ícone da bandeja, sem
+customtkinter. A janela (agenda_pessoal.py --servico) é um cliente: conecta
+por um socket Unix (named pipe no Windows) com multiprocessing.connection,
+recebe uma cópia do estado do dia e manda as alterações como chamadas ao
+núcleo do serviço. Fechar a janela encerra o processo dela; o serviço segue
+com os alertas e a abre de novo pela bandeja.
+
+Mensagens (tuplas em pickle, por isso só o usuário pode conectar: o socket
+fica numa pasta só dele; no Windows, o named pipe pede a chave do
+servico.chave da pasta de dados):
+    janela -> serviço          ("chamar", id, nome, args, kwargs)   nome em CHAMADAS
+    serviço -> janela          ("resposta", id, ok, valor ou exceção)
+                               ("estado", estado, resumo)            cópia nova; resumo se a mudança veio de outro
+                               ("evento", nome, args)                "alerta", "mostrar", "testar_alerta", "sair"
+    outra execução -> serviço  ("evento", nome, ())                  nome em EVENTOS_REPASSADOS (instancia.py)
+Como as da API, as chamadas viram eventos "servico" no barramento do núcleo
+e rodam na thread dona.
+"""
+
+import concurrent.futures
+import functools
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from agenda_core import ETAPAS_LATENCIA, ARQUIVO_VARIANTES, PERIODOS_DISPONIVEIS, CORES_DISPONIVEIS
+from armazenamento import ARQUIVO_ROTINA, ARQUIVO_LISTA_COMPRAS
+from eventos import BarramentoEventos
+from importacao import ler_importacao
+from instancia import (
+    endereco_servico, conferir_pasta_socket, chave_servico, conectar_servico, travar_instancia, liberar_instancia,
+    EVENTOS_REPASSADOS
+)
+from rotina import Rotina, minutos_do_dia
+
+SCRIPT_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agenda_pessoal.py")
+TEMPO_RESPOSTA_SERVICO = 10.0  # segundos esperando a resposta de uma chamada
+
+# Métodos do núcleo que a janela pode chamar; os de CHAMADAS_SEM_MUDANCA não mudam a cópia do estado
+CHAMADAS_SEM_MUDANCA = frozenset({
+    "estado", "rotina_do_dia", "variantes_do_dia", "proximo_alerta", "conflitos_importacao",
+    "confirmar_alerta", "historico.copiar",
+    "medidor_latencia.resumo", "medidor_latencia.registrar",
+})
+CHAMADAS = CHAMADAS_SEM_MUDANCA | {
+    "definir_conclusao", "resetar_conclusoes", "salvar_edicao", "adicionar_tarefa", "aplicar_importacao",
+    "resetar_alertas", "ativar_alertas", "definir_variante", "remover_variante",
+    "compras.alternar_item", "compras.definir_marcado", "compras.adicionar_item", "compras.remover_item",
+    "compras.adicionar_categoria", "compras.remover_categoria", "compras.resetar",
+}
+
+
+def comando_app(*argumentos):
+    """Linha de comando de outro processo do app (o próprio executável, se empacotado)"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable, *argumentos]
+    return [sys.executable, SCRIPT_APP, *argumentos]
+
+
+def abrir_processo(comando):
+    """Abre um processo que não depende deste (o serviço continua quando a janela fecha, e vice-versa)"""
+    opcoes = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if sys.platform == "win32":
+        opcoes["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        opcoes["start_new_session"] = True
+    return subprocess.Popen(comando, **opcoes)
+
+
+def argumentos_repassados(args):
+    """Opções da linha de comando que a janela e o serviço precisam ter iguais"""
+    argumentos = ["--armazenamento", args.armazenamento]
+    if args.pasta_dados:
+        argumentos += ["--pasta-dados", os.path.abspath(args.pasta_dados)]
+    if args.notificacao:
+        argumentos += ["--notificacao", args.notificacao]
+    return argumentos
+
+
+def estado_do_core(core):
+    """Cópia do que a janela mostra do dia"""
+    return {
+        "data": datetime.now().date(),
+        "rotina": core.rotina_do_dia().para_json(),
+        "variantes": core.variantes_do_dia(),
+        "concluidas": core.tarefas_concluidas,
+        "alertas_ativos": core.alertas_ativos,
+        "compras": core.compras.lista,
+        "marcados": core.compras.marcados_por_categoria,
+    }
+
+
+def resumo_da_chamada(nome):
+    """Resumo no formato de aplicar_mudanca_externa para as outras janelas reconciliarem a lista certa"""
+    if nome.startswith("compras."):
+        arquivo = ARQUIVO_LISTA_COMPRAS
+    elif nome.endswith("_variante"):
+        arquivo = ARQUIVO_VARIANTES
+    else:
+        arquivo = ARQUIVO_ROTINA
+    return {"arquivo": arquivo, "alterados": [], "conflitos": [], "origem": "servico"}
+
+
+class ServidorServico:
+    """Aceita as janelas e atende as chamadas delas na thread dona do núcleo
+    
+    As threads de conexão só publicam no barramento; clientes e envios são
+    tocados apenas pela thread dona.
+    """
+    
+    def __init__(self, core):
+        self.core = core
+        self.endereco, self.familia = endereco_servico(core.pasta)
+        self.clientes = set()
+        self.chamadas = 0
+        self._listener = None
+        self._thread = None
+        self._parando = False
+        core.eventos.assinar("servico", self._chamada)
+        core.eventos.assinar("servico_cliente", self._cliente)
+    
+    # ----- Ciclo de vida -----
+    
+    def iniciar(self):
+        """Passa a aceitar janelas; False se já houver uma instância para esta pasta de dados"""
+        if not travar_instancia(self.core.pasta):
+            return False
+        if self.familia == "AF_UNIX":
+            conferir_pasta_socket(os.path.dirname(self.endereco), criar=True)
+            if os.path.exists(self.endereco):
+                os.unlink(self.endereco)  # sobra de um serviço que não fechou
+        self._listener = Listener(self.endereco, self.familia, authkey=chave_servico(self.core.pasta))
+        self._thread = threading.Thread(target=self._aceitar, name="servico", daemon=True)
+        self._thread.start()
+        return True
+    
+    def parar(self):
+        """Manda as janelas saírem, fecha o socket e solta a trava da pasta (nessa ordem: quem pegar a trava sobe o socket)"""
+        self.enviar_todos("evento", "sair", ())
+        for conexao in self.clientes:
+            conexao.close()
+        self.clientes.clear()
+        if self._listener is None:
+            return
+        self._parando = True
+        try:
+            # accept() não acorda com o close() de outra thread: uma conexão a mais o tira da espera
+            conectar_servico(self.core.pasta).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+        self._thread.join(timeout=2)
+        self._listener.close()
+        self._listener = None
+        liberar_instancia()
+    
+    def _aceitar(self):
+        while not self._parando:
+            try:
+                conexao = self._listener.accept()
+            except (EOFError, AuthenticationError):
+                continue  # conexão sem a chave, ou que desistiu no meio
+            except OSError:
+                if self._parando:
+                    return
+                time.sleep(0.1)
+                continue
+            if self._parando:
+                conexao.close()
+                return
+            threading.Thread(target=self._ler, args=(conexao,), name="servico_conexao", daemon=True).start()
+    
+    def _ler(self, conexao):
+        try:
+            while True:
+                tipo, *dados = conexao.recv()
+                if tipo == "chamar":
+                    self.core.eventos.publicar("servico", conexao, *dados)
+                elif tipo == "evento" and dados[0] in EVENTOS_REPASSADOS:
+                    self.core.eventos.publicar(dados[0])  # pedido de outra execução do app
+        except (EOFError, OSError, ValueError, TypeError):
+            pass  # TypeError: a conexão foi fechada por outra thread no meio do recv()
+        self.core.eventos.publicar("servico_cliente", conexao, False)
+    
+    # ----- Thread dona -----
+    
+    def _cliente(self, conexao, conectado):
+        if conectado:
+            self.clientes.add(conexao)
+        else:
+            self.clientes.discard(conexao)
+            conexao.close()
+    
+    def _enviar(self, conexao, *mensagem):
+        try:
+            conexao.send(mensagem)
+        except (OSError, ValueError):
+            self._cliente(conexao, False)
+    
+    def enviar_todos(self, *mensagem):
+        for conexao in list(self.clientes):
+            self._enviar(conexao, *mensagem)
+    
+    def _chamada(self, conexao, id_chamada, nome, args, kwargs):
+        if conexao.closed:
+            return  # chamada que chegou depois de a janela sair
+        # Só quem chama é janela: a outra execução que repassa um pedido não recebe estado nem alertas
+        self._cliente(conexao, True)
+        self.chamadas += 1
+        try:
+            if nome not in CHAMADAS:
+                raise AttributeError(f"Chamada não permitida: {nome}")
+            if nome == "estado":
+                resultado = estado_do_core(self.core)
+            else:
+                metodo = functools.reduce(getattr, nome.split("."), self.core)
+                resultado = metodo(*args, **kwargs)
+        except Exception as e:
+            # Só exceções embutidas com certeza existem (e voltam do pickle) do outro lado
+            erro = e if type(e).__module__ == "builtins" else RuntimeError(f"{type(e).__name__}: {e}")
+            self._enviar(conexao, "resposta", id_chamada, False, erro)
+            return
+        if nome not in CHAMADAS_SEM_MUDANCA:
+            # A cópia nova chega antes da resposta: quem chamou já redesenha com ela
+            estado, resumo = estado_do_core(self.core), resumo_da_chamada(nome)
+            for cliente in list(self.clientes):
+                self._enviar(cliente, "estado", estado, None if cliente is conexao else resumo)
+        self._enviar(conexao, "resposta", id_chamada, True, resultado)
+    
+    def mudanca_externa(self, resumo):
+        """ao_mudanca_externa do núcleo do serviço (arquivo editado por fora, API): as janelas recebem a cópia nova"""
+        if self.clientes:
+            self.enviar_todos("estado", estado_do_core(self.core), resumo)
+
+
+class _Remoto:
+    """Um objeto do núcleo do serviço (core.compras, core.historico...): os métodos permitidos viram chamadas"""
+    
+    def __init__(self, cliente, prefixo):
+        self._cliente = cliente
+        self._prefixo = prefixo
+    
+    def __getattr__(self, nome):
+        caminho = f"{self._prefixo}.{nome}"
+        if caminho not in CHAMADAS:
+            raise AttributeError(nome)
+        return functools.partial(self._cliente.chamar, caminho)
+
+
+class ComprasRemotas(_Remoto):
+    """core.compras da janela: lista e marcados vêm da cópia local, as alterações vão para o serviço"""
+    
+    def __init__(self, cliente):
+        super().__init__(cliente, "compras")
+    
+    @property
+    def lista(self):
+        return self._cliente.estado()["compras"]
+    
+    @property
+    def marcados_por_categoria(self):
+        return self._cliente.estado()["marcados"]
+    
+    def esta_marcado(self, categoria, item):
+        return item in self.marcados_por_categoria.get(categoria, ())
+
+
+class MedidorRemoto(_Remoto):
+    """core.medidor_latencia da janela: marca as etapas aqui (time.time() vale entre processos) e manda a marcação completa"""
+    
+    def __init__(self, cliente):
+        super().__init__(cliente, "medidor_latencia")
+        self._trava = threading.Lock()
+    
+    def marcar(self, marcacao, etapa):
+        if marcacao is None:
+            return
+        with self._trava:
+            if etapa in marcacao:
+                return
+            marcacao[etapa] = time.time()
+            completa = all(e in marcacao for e in ETAPAS_LATENCIA)
+        if completa:
+            self._cliente.chamar("medidor_latencia.registrar", marcacao)
+
+
+class CoreRemoto:
+    """O que a janela usa do AgendaCore, atendido pelo serviço
+    
+    As leituras do dia (rotina_do_dia(), tarefas_concluidas, compras.lista...)
+    vêm da cópia local do estado, trocada inteira pela thread que lê o socket;
+    o resto vira uma chamada ao núcleo do serviço, que bloqueia até a resposta
+    (de qualquer thread). Alertas e mudanças feitas por outros chegam como
+    eventos no barramento local e chamam ao_alerta/ao_mudanca_externa na
+    thread que o drena, como no núcleo.
+    """
+    
+    def __init__(self, conexao):
+        self.conexao = conexao
+        self.eventos = BarramentoEventos()
+        self.ao_alerta = None
+        self.ao_mudanca_externa = None
+        self.compras = ComprasRemotas(self)
+        self.medidor_latencia = MedidorRemoto(self)
+        self.historico = _Remoto(self, "historico")
+        self._ids = itertools.count(1)
+        self._pendentes = {}
+        self._trava_envio = threading.Lock()
+        self._fechando = False
+        self._estado = None
+        self.eventos.assinar("alerta", self._alerta)
+        self.eventos.assinar("mudanca_externa", self._mudanca_externa)
+        threading.Thread(target=self._ler, name="servico_cliente", daemon=True).start()
+        self._aplicar_estado(self.chamar("estado"))
+    
+    @classmethod
+    def conectar(cls, pasta, espera=0):
+        """Conecta ao serviço da pasta, tentando por até espera segundos (ele pode estar subindo); None se não houver"""
+        prazo = time.monotonic() + espera
+        while True:
+            try:
+                return cls(conectar_servico(pasta))
+            except (OSError, EOFError, AuthenticationError):
+                pass
+            if time.monotonic() >= prazo:
+                return None
+            time.sleep(0.05)
+    
+    def parar(self):
+        self._fechando = True
+        self.conexao.close()
+    
+    # ----- Conexão -----
+    
+    def chamar(self, nome, *args, **kwargs):
+        """Chama o método nome do núcleo do serviço e retorna o resultado (ou levanta a exceção dele)"""
+        futuro = concurrent.futures.Future()
+        id_chamada = next(self._ids)
+        self._pendentes[id_chamada] = futuro
+        try:
+            with self._trava_envio:
+                self.conexao.send(("chamar", id_chamada, nome, args, kwargs))
+        except (OSError, ValueError) as e:
+            self._pendentes.pop(id_chamada, None)
+            raise ConnectionError(f"Serviço indisponível: {e}") from e
+        return futuro.result(TEMPO_RESPOSTA_SERVICO)
+    
+    def _ler(self):
+        try:
+            while True:
+                tipo, *dados = self.conexao.recv()
+                if tipo == "resposta":
+                    id_chamada, ok, valor = dados
+                    futuro = self._pendentes.pop(id_chamada, None)
+                    if futuro is None:
+                        continue
+                    if ok:
+                        futuro.set_result(valor)
+                    else:
+                        futuro.set_exception(valor)
+                elif tipo == "estado":
+                    estado, resumo = dados
+                    self._aplicar_estado(estado)
+                    if resumo:
+                        self.eventos.publicar("mudanca_externa", resumo)
+                elif tipo == "evento":
+                    nome, args = dados
+                    self._fechando = self._fechando or nome == "sair"
+                    self.eventos.publicar(nome, *args)
+        except (EOFError, OSError, ValueError, TypeError):
+            pass  # TypeError: parar() fechou a conexão no meio do recv()
+        for id_chamada in list(self._pendentes):
+            futuro = self._pendentes.pop(id_chamada, None)
+            if futuro is not None:
+                futuro.set_exception(ConnectionError("O serviço foi encerrado"))
+        if not self._fechando:
+            self.eventos.publicar("sair")  # sem o serviço a janela não tem o que mostrar
+    
+    def _aplicar_estado(self, estado):
+        estado["rotina"] = Rotina.de_json(estado["rotina"])
+        self._estado = estado  # troca a referência: quem estiver lendo a cópia antiga termina com ela
+    
+    def estado(self):
+        """A cópia do estado de hoje (pede uma nova ao serviço se o dia virou)"""
+        if self._estado["data"] != datetime.now().date():
+            self._aplicar_estado(self.chamar("estado"))
+        return self._estado
+    
+    def _alerta(self, horario, marcacao):
+        if self.ao_alerta:
+            self.ao_alerta(horario, marcacao)
+    
+    def _mudanca_externa(self, resumo):
+        if self.ao_mudanca_externa:
+            self.ao_mudanca_externa(resumo)
+    
+    # ----- Interface do AgendaCore -----
+    
+    def __getattr__(self, nome):
+        if nome not in CHAMADAS:
+            raise AttributeError(nome)
+        return functools.partial(self.chamar, nome)
+    
+    @property
+    def tarefas_concluidas(self):
+        return self.estado()["concluidas"]
+    
+    @property
+    def alertas_ativos(self):
+        return self.estado()["alertas_ativos"]
+    
+    @alertas_ativos.setter
+    def alertas_ativos(self, ativos):
+        self.chamar("ativar_alertas", ativos)
+    
+    def rotina_do_dia(self, data=None):
+        estado = self.estado()
+        if data is not None and data != estado["data"]:
+            return self.chamar("rotina_do_dia", data)
+        return estado["rotina"]
+    
+    def variantes_do_dia(self, data=None):
+        estado = self.estado()
+        if data is not None and data != estado["data"]:
+            return self.chamar("variantes_do_dia", data)
+        return estado["variantes"]
+    
+    def em_andamento(self, agora=None):
+        agora = agora or datetime.now()
+        return self.rotina_do_dia(agora.date()).em_andamento(minutos_do_dia(agora))
+    
+    def sobreposicoes(self, minutos, duracao=0, ignorar=None, data=None):
+        return self.rotina_do_dia(data).sobrepostos(minutos, duracao, ignorar)
+    
+    def ler_importacao(self, arquivo):
+        """Lê o arquivo neste processo; só o resultado vai para o serviço (aplicar_importacao)"""
+        return ler_importacao(arquivo, PERIODOS_DISPONIVEIS, CORES_DISPONIVEIS)
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Os módulos do app ficam na pasta acima, sem pacote: os testes os importam direto"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""API local: rotas, códigos de status, ETag/304 e proteção contra páginas do navegador"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+from agenda_core import AgendaCore
+
+
+@pytest.fixture
+def api(tmp_path):
+    core = AgendaCore("sqlite", str(tmp_path))
+    acordar = threading.Event()
+    encerrar = threading.Event()
+    core.eventos.despertar = acordar.set
+    
+    def dona():  # como rodar_sem_interface, numa thread para o teste fazer de cliente
+        while not encerrar.is_set():
+            acordar.wait(0.1)
+            acordar.clear()
+            core.eventos.drenar_tudo()
+    
+    thread = threading.Thread(target=dona)
+    thread.start()
+    servidor = core.iniciar_api(0)
+    yield servidor
+    encerrar.set()
+    thread.join()
+    core.parar()
+
+
+def requisitar(servidor, metodo, caminho, corpo=None, cabecalhos=None):
+    """(status, cabeçalhos, corpo JSON ou None)"""
+    cabecalhos = dict(cabecalhos or {})
+    if corpo is not None and not isinstance(corpo, (str, bytes)):
+        corpo = json.dumps(corpo)
+        cabecalhos.setdefault("Content-Type", "application/json")
+    conexao = http.client.HTTPConnection(servidor.host, servidor.porta, timeout=10)
+    try:
+        conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        dados = resposta.read()
+        return resposta.status, resposta, json.loads(dados) if dados else None
+    finally:
+        conexao.close()
+
+
+def test_rotas_e_codigos(api):
+    status, _, tarefas = requisitar(api, "GET", "/api/v1/tasks")
+    assert status == 200 and tarefas["tasks"]
+    assert requisitar(api, "GET", "/api/v1/nada")[0] == 404
+    status, resposta, _ = requisitar(api, "PUT", "/api/v1/tasks", {})
+    assert status == 405 and resposta.getheader("Allow") == "GET, POST"
+    assert requisitar(api, "GET", "/api/v1/tasks?date=ontem")[0] == 400
+    assert requisitar(api, "POST", "/api/v1/tasks", {"time": "23:10"})[0] == 400
+    assert requisitar(api, "POST", "/api/v1/tasks", "{", {"Content-Type": "application/json"})[0] == 400
+    
+    status, _, criada = requisitar(api, "POST", "/api/v1/tasks", {"time": "23:10", "title": "Ler", "end_time": "23:40"})
+    assert status == 201 and (criada["id"], criada["duration_minutes"]) == ("23:10", 30)
+    status, _, alterada = requisitar(api, "PATCH", "/api/v1/tasks/23:10", {"is_completed": True})
+    assert status == 200 and alterada["is_completed"]
+    assert requisitar(api, "PATCH", "/api/v1/tasks/23:11", {"title": "X"})[0] == 404
+    status, _, removida = requisitar(api, "DELETE", "/api/v1/tasks/23:10", {})
+    assert (status, removida) == (200, {"deleted": True, "id": "23:10"})
+    assert "23:10" not in [tarefa["id"] for tarefa in requisitar(api, "GET", "/api/v1/tasks")[2]["tasks"]]
+
+
+def test_compras(api):
+    categoria = requisitar(api, "GET", "/api/v1/shopping")[2]["categories"][0]["name"]
+    assert requisitar(api, "POST", "/api/v1/shopping/items", {"category": categoria, "item": "Café"})[0] == 201
+    assert requisitar(api, "POST", "/api/v1/shopping/items", {"category": categoria, "item": "Café"})[0] == 400
+    assert requisitar(api, "POST", "/api/v1/shopping/items", {"category": "Nenhuma", "item": "Café"})[0] == 404
+    status, _, item = requisitar(api, "PATCH", "/api/v1/shopping/items", {"category": categoria, "item": "Café", "checked": True})
+    assert status == 200 and item["checked"]
+
+
+@pytest.mark.parametrize("caminho, alteracao", [
+    ("/api/v1/tasks", ("PATCH", "/api/v1/tasks/05:00", {"title": "Outro"})),
+    ("/api/v1/tasks", ("PATCH", "/api/v1/tasks/05:00", {"is_completed": True})),
+    ("/api/v1/shopping", ("POST", "/api/v1/shopping/items", {"category": "🥬 MERCADO / FEIRA", "item": "Café"})),
+])
+def test_etag_304_sem_ir_a_thread_dona_ate_o_recurso_mudar(api, caminho, alteracao, monkeypatch):
+    status, resposta, _ = requisitar(api, "GET", caminho)
+    assert status == 200
+    versao = resposta.getheader("ETag")
+    # Conta o que é publicado (tratados só sobe no fim do lote, depois de a resposta anterior sair)
+    publicados = []
+    publicar = api.core.eventos.publicar
+    monkeypatch.setattr(api.core.eventos, "publicar", lambda tipo, *args: (publicados.append(tipo), publicar(tipo, *args)))
+    
+    status, resposta, corpo = requisitar(api, "GET", caminho, cabecalhos={"If-None-Match": versao})
+    assert (status, corpo, resposta.getheader("ETag")) == (304, None, versao)
+    assert publicados == []  # respondida sem passar pela thread dona
+    
+    assert requisitar(api, "GET", "/api/v1/tasks?date=2026-01-01", cabecalhos={"If-None-Match": versao})[0] == 200
+    assert requisitar(api, *alteracao)[0] in (200, 201)
+    status, resposta, _ = requisitar(api, "GET", caminho, cabecalhos={"If-None-Match": versao})
+    assert status == 200 and resposta.getheader("ETag") != versao
+
+
+def test_post_de_outra_origem_e_recusado(api):
+    antes = requisitar(api, "GET", "/api/v1/tasks")[2]
+    corpo = json.dumps({"time": "23:10", "title": "Intrusa"})
+    # O que um formulário ou um fetch "simples" de uma página consegue mandar sem preflight
+    status, _, _ = requisitar(api, "POST", "/api/v1/tasks", corpo,
+                              {"Content-Type": "text/plain", "Origin": "http://exemplo.invalid"})
+    assert 400 <= status < 500
+    assert requisitar(api, "POST", "/api/v1/tasks", corpo, {"Content-Type": "text/plain"})[0] == 415
+    assert requisitar(api, "POST", "/api/v1/tasks", corpo,
+                      {"Content-Type": "application/x-www-form-urlencoded"})[0] == 415
+    assert requisitar(api, "DELETE", "/api/v1/tasks/05:00", "x", {"Content-Type": "text/plain"})[0] == 415
+    assert requisitar(api, "POST", "/api/v1/tasks", json.loads(corpo), {"Origin": "null"})[0] == 403
+    assert requisitar(api, "GET", "/api/v1/tasks", cabecalhos={"Host": "exemplo.invalid"})[0] == 403
+    assert requisitar(api, "GET", "/api/v1/tasks")[2] == antes
+
+
+def test_delete_sem_corpo_nem_content_type(api):
+    """Como o MHUB manda: DELETE puro, sem corpo e sem Content-Type"""
+    status, _, removida = requisitar(api, "DELETE", "/api/v1/tasks/05:00")
+    assert (status, removida) == (200, {"deleted": True, "id": "05:00"})
+    assert "05:00" not in [tarefa["id"] for tarefa in requisitar(api, "GET", "/api/v1/tasks")[2]["tasks"]]
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Armazenamento SQLite: migração dos arquivos JSON (tudo chega, uma única vez) e exportação de volta"""
+
+import json
+import os
+
+from armazenamento import (ARQUIVO_CONCLUSOES, ARQUIVO_LISTA_COMPRAS, ARQUIVO_ROTINA, ArmazenamentoJSON,
+                           ArmazenamentoSQLite, criar_armazenamento)
+from persistencia import GravadorAdiado
+
+ROTINA = {
+    "06:00": {"titulo": "Acordar", "periodo": "MANHÃ", "cor": "#FF6B35", "tarefas": ["Água", "Alongar"]},
+    "21:30": {"titulo": "Ler", "periodo": "NOITE", "cor": "#7B2CBF", "tarefas": [], "duracao": 45, "local": "sala"},
+}
+LISTA = {"Mercado": ["Ovos", "Café"], "Farmácia": ["Vitamina C"], "Vazia": []}
+
+
+def preencher_json(pasta):
+    """Dados de uma instalação antiga, gravados pelo armazenamento JSON"""
+    json_ = ArmazenamentoJSON(pasta)
+    json_.substituir_rotina(ROTINA)
+    json_.substituir_compras(LISTA, {("Mercado", "Café")})
+    json_.definir_conclusao("2026-03-01", "06:00", True)
+    json_.definir_conclusao("2026-03-01", "21:30", False)
+    json_.definir_conclusao("2026-03-02", "06:00", True)
+    json_.adicionar_alerta("2026-03-02", "06:00")
+    json_.confirmar_alerta("2026-03-02", "06:00", "06:03:10")
+    json_.parar()
+
+
+def test_migra_rotina_compras_e_historico(tmp_path):
+    pasta = str(tmp_path)
+    preencher_json(pasta)
+    banco = criar_armazenamento("sqlite", pasta)
+    try:
+        assert banco.carregar_rotina() == ROTINA
+        assert banco.carregar_compras() == (LISTA, {("Mercado", "Café")})
+        assert banco.carregar_conclusoes("2026-03-01") == {"06:00": True, "21:30": False}
+        assert banco.carregar_alertas("2026-03-02") == {"06:00"}
+        assert banco.carregar_historico()["2026-03-02"]["confirmados"] == {"06:00": "06:03:10"}
+    finally:
+        banco.parar()
+
+
+def test_migra_uma_vez_so(tmp_path):
+    pasta = str(tmp_path)
+    preencher_json(pasta)
+    criar_armazenamento("sqlite", pasta).parar()
+    # Edições nos JSON depois da migração não reimportam por cima do banco
+    with open(os.path.join(pasta, ARQUIVO_ROTINA), "w", encoding="utf-8") as f:
+        json.dump({"07:00": {"titulo": "Outra"}}, f)
+    banco = ArmazenamentoSQLite(os.path.join(pasta, "agenda.db"))
+    try:
+        assert banco.migrar_de_json(pasta) is False
+        assert banco.carregar_rotina() == ROTINA
+    finally:
+        banco.parar()
+
+
+def test_pasta_vazia_nao_migra_nada(tmp_path):
+    banco = ArmazenamentoSQLite(str(tmp_path / "agenda.db"))
+    try:
+        assert banco.migrar_de_json(str(tmp_path)) is False
+        assert banco.carregar_rotina() is None
+        assert banco.carregar_compras()[0] is None
+    finally:
+        banco.parar()
+
+
+def test_arquivo_do_dia_antigo_chega_ao_banco(tmp_path):
+    """Instalação de antes do diário: só o tarefas_concluidas.json do dia"""
+    pasta = str(tmp_path)
+    with open(os.path.join(pasta, ARQUIVO_CONCLUSOES), "w", encoding="utf-8") as f:
+        json.dump({"data": "2026-02-27", "conclusoes": {"06:00": True}}, f)
+    banco = criar_armazenamento("sqlite", pasta)
+    try:
+        assert banco.carregar_conclusoes("2026-02-27") == {"06:00": True}
+    finally:
+        banco.parar()
+
+
+def test_banco_exporta_os_json_ao_abrir(tmp_path):
+    pasta = str(tmp_path)
+    preencher_json(pasta)
+    criar_armazenamento("sqlite", pasta).parar()
+    os.remove(os.path.join(pasta, ARQUIVO_LISTA_COMPRAS))
+    gravador = GravadorAdiado()
+    banco = criar_armazenamento("sqlite", pasta, gravador)
+    banco.parar()
+    gravador.parar()
+    with open(os.path.join(pasta, ARQUIVO_LISTA_COMPRAS), encoding="utf-8") as f:
+        assert json.load(f) == LISTA
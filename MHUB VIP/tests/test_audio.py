@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from audio import MotorAudio
+
+
+def test_tocar_depois_de_parar_sobe_outra_thread(tmp_path):
+    # Sem o arquivo, cada pedido cai no fallback, sem precisar de placa de som
+    tocados = []
+    motor = MotorAudio(str(tmp_path / "nao_existe.mp3"), janela_duplicatas=0, fallback=lambda: tocados.append(1))
+    
+    for _ in range(2):
+        tocou = threading.Event()
+        motor.tocar(tocou.set)
+        assert tocou.wait(10)
+        motor.parar()
+    assert len(tocados) == 2
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+import estatisticas
+from historico import HistoricoConclusoes
+from rotina import Rotina
+
+HOJE = date(2026, 3, 10)
+PERIODOS = ["MANHÃ", "NOITE"]
+
+
+@pytest.fixture
+def rotina():
+    return Rotina.de_json({
+        "08:00": {"titulo": "Café", "periodo": "MANHÃ", "tarefas": []},
+        "21:00": {"titulo": "Leitura", "periodo": "NOITE", "tarefas": []},
+    })
+
+
+def test_estatisticas_so_do_arquivo_do_historico(tmp_path, rotina):
+    historico = HistoricoConclusoes(str(tmp_path / "historico.bin"))
+    for d in range(3):
+        dia = HOJE - timedelta(days=d)
+        historico.definir_agenda(dia, ["08:00", "21:00"])
+        historico.definir(dia, "08:00", True)
+    historico.definir(HOJE, "21:00", True)
+    historico.confirmar(HOJE, "08:00", 30)
+    historico.confirmar(HOJE - timedelta(days=1), "08:00", 10)
+    
+    dados = estatisticas.calcular(historico.copiar(), rotina, PERIODOS, hoje=HOJE)
+    historico.parar()
+    
+    assert dados["horarios"] == ["08:00", "21:00"]
+    assert dados["dias"] == 3 and dados["dias_completos"] == 1
+    assert dados["sequencia_atual"] == 1
+    assert list(dados["aderencia"]) == [1.0, pytest.approx(1 / 3)]
+    assert dados["perdidos"] == [("21:00", 2, 3)]
+    # Um atraso acima de MINUTOS_ATRASO, média de 20 minutos entre as duas confirmações
+    assert dados["atrasados"] == [("08:00", 1, 20.0)]
+
+
+def test_periodo_sem_historico(tmp_path, rotina):
+    historico = HistoricoConclusoes(str(tmp_path / "historico.bin"))
+    dados = estatisticas.calcular(historico.copiar(), rotina, PERIODOS, dias=30, hoje=HOJE)
+    assert dados["dias"] == 0 and dados["atrasados"] == [] and dados["perdidos"] == []
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import estilos
+
+
+def test_fonte_criada_uma_vez_por_estilo(monkeypatch):
+    # CTkFont de verdade precisa de um Tk com tela: aqui só conta quantas seriam registradas
+    criadas = []
+    monkeypatch.setattr(estilos.ctk, "CTkFont", lambda **opcoes: criadas.append(opcoes) or object())
+    monkeypatch.setattr(estilos, "_fontes", {})
+    
+    fontes = [estilos.fonte(14, "bold") for _ in range(500)] + [estilos.fonte(12)]
+    
+    assert len(criadas) == 2
+    assert all(fonte is fontes[0] for fonte in fontes[:500])
+    assert estilos.fontes_criadas() == 2
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Barramento de eventos: nada se perde, a ordem de cada thread se mantém e o aviso é um por lote"""
+
+import threading
+
+from eventos import BarramentoEventos
+
+
+def test_avisa_uma_vez_por_lote():
+    barramento = BarramentoEventos()
+    avisos = []
+    barramento.despertar = lambda: avisos.append(barramento.pendentes)
+    for numero in range(3):
+        barramento.publicar("teste", numero)
+    assert avisos == [1]
+    
+    assert barramento.drenar() == 3
+    barramento.publicar("teste", 3)
+    assert avisos == [1, 1]
+
+
+def test_aviso_atendido_com_a_fila_ja_vazia():
+    """Evento publicado (e avisado) durante uma drenagem que já o tratou: a próxima drenagem acha a fila vazia"""
+    barramento = BarramentoEventos()
+    avisos = []
+    barramento.despertar = lambda: avisos.append(None)
+    barramento.assinar("a", lambda: barramento.publicar("b"))
+    barramento.publicar("a")
+    assert barramento.drenar() == 2 and len(avisos) == 2
+    
+    assert barramento.drenar_tudo() == 0
+    barramento.publicar("a")
+    assert len(avisos) == 3
+
+
+def test_40_mil_eventos_de_8_threads_sem_perda():
+    threads, por_thread = 8, 5000
+    barramento = BarramentoEventos()
+    dona = threading.current_thread()
+    recebidos = {produtor: [] for produtor in range(threads)}
+    intrusos = []
+    
+    def tratar(produtor, numero):
+        if threading.current_thread() is not dona:
+            intrusos.append(threading.current_thread().name)
+        recebidos[produtor].append(numero)
+    
+    barramento.assinar("teste", tratar)
+    acordar = threading.Event()
+    avisos = []
+    
+    def despertar():
+        avisos.append(None)
+        acordar.set()
+    
+    barramento.despertar = despertar
+    
+    def produzir(produtor):
+        for numero in range(por_thread):
+            barramento.publicar("teste", produtor, numero)
+    
+    produtores = [threading.Thread(target=produzir, args=(i,)) for i in range(threads)]
+    for produtor in produtores:
+        produtor.start()
+    # Como a thread do Tk ou rodar_sem_interface: dorme até o aviso e drena
+    drenagens = 0
+    while barramento.tratados < threads * por_thread:
+        assert acordar.wait(10), "aviso perdido: eventos pendentes sem despertar"
+        acordar.clear()
+        barramento.drenar_tudo()
+        drenagens += 1
+    for produtor in produtores:
+        produtor.join()
+    
+    assert all(numeros == list(range(por_thread)) for numeros in recebidos.values())
+    assert not intrusos
+    assert barramento.pendentes == 0
+    assert len(avisos) <= drenagens + 1  # o último aviso pode ser de um evento que a última drenagem já tratou
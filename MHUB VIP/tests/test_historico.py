@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from historico import (
+    HistoricoConclusoes, CABECALHO, ASSINATURA, CAPACIDADE_INICIAL, TAMANHO_NOME, minutos_atraso
+)
+
+HOJE = date(2026, 3, 10)
+
+
+def test_alteracao_so_grava_na_thread_do_gravador(tmp_path):
+    arquivo = tmp_path / "historico.bin"
+    historico = HistoricoConclusoes(str(arquivo))
+    historico.gravador.atraso = historico.gravador.atraso_maximo = 60  # a thread não grava durante o teste
+    
+    historico.definir(HOJE, "08:00", True)
+    assert not arquivo.exists()
+    historico.descarregar()
+    antes = arquivo.read_bytes()
+    
+    historico.definir(HOJE, "08:00", False)
+    assert arquivo.read_bytes() == antes
+    historico.parar()
+    assert arquivo.read_bytes() != antes
+
+
+def test_reabre_com_linhas_no_lugar_e_dias_novos(tmp_path):
+    arquivo = str(tmp_path / "historico.bin")
+    historico = HistoricoConclusoes(arquivo)
+    historico.definir_agenda(HOJE, ["08:00", "09:00"])
+    historico.definir(HOJE, "08:00", True)
+    historico.descarregar()
+    historico.definir(HOJE, "09:00", True)  # linha já gravada, alterada no lugar
+    historico.definir(HOJE + timedelta(days=3), "08:00", True)  # dias novos no fim
+    historico.definir(HOJE - timedelta(days=1), "10:00", True)  # antes do primeiro: regrava tudo
+    historico.parar()
+    
+    reaberto = HistoricoConclusoes(arquivo)
+    assert reaberto.dia(HOJE) == {"08:00": (True, True), "09:00": (True, True)}
+    assert reaberto.dia(HOJE + timedelta(days=3)) == {"08:00": (True, True)}
+    assert reaberto.dia(HOJE - timedelta(days=1)) == {"10:00": (True, True)}
+    assert reaberto.dias_completos() == [HOJE - timedelta(days=1), HOJE, HOJE + timedelta(days=3)]
+    reaberto.parar()
+
+
+def test_depois_de_parar_grava_na_hora(tmp_path):
+    arquivo = str(tmp_path / "historico.bin")
+    historico = HistoricoConclusoes(arquivo)
+    historico.parar()
+    historico.definir(HOJE, "08:00", True)
+    assert HistoricoConclusoes(arquivo).taxa("08:00") == (1, 1)
+
+
+def test_arquivo_da_versao_1_ganha_os_atrasos(tmp_path):
+    arquivo = tmp_path / "historico.bin"
+    nomes = b"08:00".ljust(CAPACIDADE_INICIAL * TAMANHO_NOME, b"\0")
+    linha = (1).to_bytes(4, "little") * 2  # 08:00 concluído e agendado, sem bytes de atraso
+    arquivo.write_bytes(CABECALHO.pack(ASSINATURA, 1, CAPACIDADE_INICIAL, HOJE.toordinal(), 1) + nomes + linha)
+    
+    historico = HistoricoConclusoes(str(arquivo))
+    assert historico.sem_confirmacoes
+    assert historico.dia(HOJE) == {"08:00": (True, True)}
+    historico.importar_confirmacoes({HOJE.isoformat(): {"confirmados": {"08:00": "08:20:30"}}})
+    historico.parar()
+    
+    reaberto = HistoricoConclusoes(str(arquivo))
+    assert not reaberto.sem_confirmacoes
+    inicio, dias, capacidade, horarios, linhas = reaberto.copiar()
+    assert linhas[2 * capacidade // 8] == 21  # 20,5 minutos arredondados, + 1
+    reaberto.parar()
+
+
+def test_minutos_atraso():
+    assert minutos_atraso("08:00", "08:20:30") == 20.5
+    assert minutos_atraso("08:00", "07:59:00") == 0
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Importação de .ics e .csv: casos de borda de cada formato e a deduplicação por minuto"""
+
+import time
+
+import pytest
+
+from agenda_core import CORES_DISPONIVEIS, PERIODOS_DISPONIVEIS
+from importacao import ler_importacao
+
+
+def ler(tmp_path, nome, conteudo, encoding="utf-8"):
+    arquivo = tmp_path / nome
+    arquivo.write_bytes(conteudo.encode(encoding))
+    return ler_importacao(str(arquivo), PERIODOS_DISPONIVEIS, CORES_DISPONIVEIS)
+
+
+def calendario(*eventos):
+    return "\r\n".join(["BEGIN:VCALENDAR", "VERSION:2.0", *eventos, "END:VCALENDAR", ""])
+
+
+def evento(*linhas):
+    return "\r\n".join(["BEGIN:VEVENT", *linhas, "END:VEVENT"])
+
+
+@pytest.fixture
+def fuso_brasilia(monkeypatch):
+    monkeypatch.setenv("TZ", "BRT3")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_ics_linhas_dobradas_escapes_e_alarme_ignorado(tmp_path):
+    lido = ler(tmp_path, "agenda.ics", calendario(evento(
+        "DTSTART;TZID=America/Sao_Paulo:20260302T073000",
+        "DTEND;TZID=America/Sao_Paulo:20260302T081500",
+        "SUMMARY:Caf\\, p\\;ão e",
+        "  leitura",
+        "DESCRIPTION:Ovos\\nFruta\\n\\n",
+        "CATEGORIES:TREINO,OUTRA",
+        "COLOR:#4ECDC4",
+        "BEGIN:VALARM", "DESCRIPTION:lembrete", "TRIGGER:-PT5M", "END:VALARM",
+    )))
+    horario = lido["horarios"][7 * 60 + 30]
+    assert horario.titulo == "Caf, p;ão e leitura"
+    assert horario.tarefas == ["Ovos", "Fruta"]
+    assert (horario.duracao, horario.periodo, horario.cor) == (45, "TREINO", "#4ECDC4")
+
+
+def test_ics_duracao_meia_noite_e_utc(tmp_path, fuso_brasilia):
+    lido = ler(tmp_path, "agenda.ics", calendario(
+        evento("DTSTART:20260302T230000", "DTEND:20260303T003000", "SUMMARY:Virada"),
+        evento("DTSTART:20260302T110000Z", "DURATION:PT1H30M", "SUMMARY:UTC"),
+        evento("DTSTART:20260302T0600", "SUMMARY:Sem segundos"),
+    ))
+    horarios = lido["horarios"]
+    assert horarios[23 * 60].duracao == 90
+    assert (horarios[8 * 60].titulo, horarios[8 * 60].duracao) == ("UTC", 90)  # 11:00Z = 08:00 em UTC-3
+    assert horarios[6 * 60].titulo == "Sem segundos"
+
+
+def test_ics_dia_inteiro_invalidos_e_repetidos(tmp_path):
+    lido = ler(tmp_path, "agenda.ical", calendario(
+        evento("DTSTART;VALUE=DATE:20260302", "SUMMARY:Feriado"),
+        evento("SUMMARY:Sem início"),
+        evento("DTSTART:20260302T090000", "DURATION:uma hora", "SUMMARY:Duração ruim"),
+        evento("DTSTART:20260302T100000", "SUMMARY:Reunião"),
+        evento("DTSTART:20260309T100000", "SUMMARY:Reunião"),
+        evento("DTSTART:20260310T100000", "SUMMARY:Outra no mesmo minuto"),
+    ))
+    assert (lido["eventos"], lido["dia_inteiro"], lido["invalidos"], lido["repetidos"]) == (6, 1, 2, 2)
+    assert list(lido["horarios"]) == [10 * 60]
+    assert lido["horarios"][10 * 60].titulo == "Reunião"  # fica o primeiro
+    assert any("Sem início" in erro for erro in lido["erros"])
+
+
+def test_csv_ponto_e_virgula_bom_e_colunas_acentuadas(tmp_path):
+    lido = ler(tmp_path, "rotina.csv", (
+        "Horário;Fim;Título;Período;Cor;Itens\n"
+        "06:00;06:30;Acordar;;Verde;Água | Alongar\n"
+        '21:00;;"Ler; dormir";NOITE;#123456;"Livro\nChá"\n'
+    ), encoding="utf-8-sig")
+    acordar, ler_ = lido["horarios"][6 * 60], lido["horarios"][21 * 60]
+    assert (acordar.titulo, acordar.duracao, acordar.periodo, acordar.cor) == ("Acordar", 30, "MANHÃ", "#4ECDC4")
+    assert acordar.tarefas == ["Água", "Alongar"]
+    assert (ler_.titulo, ler_.cor, ler_.tarefas) == ("Ler; dormir", "#123456", ["Livro", "Chá"])
+
+
+def test_csv_linhas_invalidas_com_numero_da_linha(tmp_path):
+    lido = ler(tmp_path, "rotina.csv", (
+        "horario,duracao,titulo\n"
+        "25:00,,Hora inválida\n"
+        "07:00,abc,Duração inválida\n"
+        "07:00,2000,Duração maior que o dia\n"
+        "23:30,90,Passa da meia-noite\n"
+        ",,\n"
+    ))
+    assert lido["invalidos"] == 4
+    assert lido["erros"][0].startswith("linha 2:")
+    assert lido["horarios"][23 * 60 + 30].duracao == 90
+
+
+def test_formato_nao_suportado(tmp_path):
+    with pytest.raises(ValueError):
+        ler(tmp_path, "rotina.txt", "06:00,Acordar")
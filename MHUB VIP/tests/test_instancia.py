@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Instância única: uma segunda execução do app repassa o pedido à que está rodando e sai"""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import instancia
+from agenda_core import AgendaCore
+from servico import ServidorServico, comando_app
+
+
+@pytest.fixture
+def rodando(tmp_path):
+    """Esta execução do teste é a instância da pasta (núcleo + serviço, como a janela)"""
+    pasta = str(tmp_path)
+    core = AgendaCore("sqlite", pasta)
+    servidor = ServidorServico(core)
+    assert servidor.iniciar()
+    recebidos = []
+    for evento in instancia.EVENTOS_REPASSADOS:
+        core.eventos.assinar(evento, lambda evento=evento: recebidos.append(evento))
+    yield pasta, core, recebidos
+    servidor.parar()
+    core.parar()
+
+
+def esperar_eventos(core, recebidos, limite=5):
+    prazo = time.monotonic() + limite
+    while not recebidos and time.monotonic() < prazo:
+        core.eventos.drenar_tudo()
+        time.sleep(0.01)
+    return list(recebidos)
+
+
+@pytest.mark.parametrize("argumentos, evento", [
+    ((), "mostrar"),
+    (("--testar-alerta",), "testar_alerta"),
+    (("--resetar-alertas",), "resetar_alertas"),
+    (("--headless",), "mostrar"),
+    (("--servico",), "mostrar"),
+])
+def test_segunda_execucao_repassa_e_sai(rodando, argumentos, evento):
+    pasta, core, recebidos = rodando
+    saida = subprocess.run(comando_app("--pasta-dados", pasta, *argumentos), capture_output=True, text=True, timeout=30)
+    assert saida.returncode == 0, saida.stderr
+    assert esperar_eventos(core, recebidos) == [evento]
+
+
+def test_sem_janela_direto_nao_sobe_outro_agendador(rodando):
+    pasta, core, recebidos = rodando
+    script = os.path.join(os.path.dirname(instancia.__file__), "sem_janela.py")
+    saida = subprocess.run([sys.executable, script, "--pasta-dados", pasta], capture_output=True, text=True, timeout=30)
+    assert saida.returncode == 1
+    assert "já está rodando" in saida.stdout
+
+
+def test_trava_e_liberada_ao_parar(tmp_path):
+    pasta = str(tmp_path)
+    core = AgendaCore("sqlite", pasta)
+    servidor = ServidorServico(core)
+    assert servidor.iniciar()
+    servidor.parar()
+    core.parar()
+    assert not instancia.instancia_rodando(pasta)
+    assert instancia.repassar_evento(pasta, "mostrar") is False  # ninguém atende: não espera
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Mescla de três vias das edições externas, com o armazenamento SQLite exportando os JSON"""
+
+import json
+import os
+import time
+
+import pytest
+
+from agenda_core import AgendaCore
+from armazenamento import ARQUIVO_COMPRAS, ARQUIVO_LISTA_COMPRAS, ARQUIVO_ROTINA, ArmazenamentoSQLite
+from persistencia import arquivo_conflito
+from rotina import Horario
+
+
+def ler(pasta, nome):
+    with open(os.path.join(pasta, nome), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def editar(pasta, nome, dados):
+    caminho = os.path.join(pasta, nome)
+    antes = os.stat(caminho).st_mtime_ns
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False)
+    if os.stat(caminho).st_mtime_ns == antes:  # mesmo carimbo: o observador não veria a edição
+        os.utime(caminho, ns=(antes + 1_000_000, antes + 1_000_000))
+
+
+def esperar_mescla(core, resumos, quantas=1, limite=10):
+    prazo = time.monotonic() + limite
+    while len(resumos) < quantas and time.monotonic() < prazo:
+        core.eventos.drenar_tudo()
+        time.sleep(0.01)
+    assert len(resumos) >= quantas, "edição externa não mesclada"
+
+
+@pytest.fixture
+def core(tmp_path):
+    core = AgendaCore("sqlite", str(tmp_path))
+    core.gravador.descarregar()  # exportação da abertura
+    resumos = []
+    core.ao_mudanca_externa = resumos.append
+    core.resumos = resumos
+    yield core
+    core.parar()
+
+
+def test_sqlite_exporta_os_json(core, tmp_path):
+    pasta = str(tmp_path)
+    assert ler(pasta, ARQUIVO_ROTINA) == core.rotina.para_json()
+    categoria = next(iter(core.compras.lista))
+    core.compras.adicionar_item(categoria, "Café")
+    core.compras.alternar_item(categoria, "Café")
+    core.gravador.descarregar()
+    assert ler(pasta, ARQUIVO_LISTA_COMPRAS)[categoria][-1] == "Café"
+    assert ler(pasta, ARQUIVO_COMPRAS) == [f"{categoria}|Café"]
+
+
+def test_edicoes_dos_dois_lados_sao_mescladas(core, tmp_path):
+    pasta = str(tmp_path)
+    core.iniciar_observador()
+    nosso, deles = sorted(core.rotina.keys())[:2]
+    
+    # Do programa (ainda não gravada) e do arquivo, em horários diferentes
+    core.adicionar_tarefa(nosso, Horario.de_dict(nosso, dict(core.rotina[nosso].para_dict(), titulo="Nosso")))
+    rotina = ler(pasta, ARQUIVO_ROTINA)
+    rotina[deles]["titulo"] = "Deles"
+    editar(pasta, ARQUIVO_ROTINA, rotina)
+    esperar_mescla(core, core.resumos)
+    core.gravador.descarregar()
+    
+    assert core.resumos[0] == {"arquivo": ARQUIVO_ROTINA, "alterados": [deles], "conflitos": []}
+    gravado = ler(pasta, ARQUIVO_ROTINA)
+    assert (gravado[nosso]["titulo"], gravado[deles]["titulo"]) == ("Nosso", "Deles")
+    banco = ArmazenamentoSQLite(os.path.join(pasta, os.path.basename(core.armazenamento.caminho))).carregar_rotina()
+    assert banco == gravado
+
+
+def test_conflito_fica_com_o_programa(core, tmp_path):
+    pasta = str(tmp_path)
+    core.iniciar_observador()
+    horario = min(core.rotina.keys())
+    core.adicionar_tarefa(horario, Horario.de_dict(horario, dict(core.rotina[horario].para_dict(), titulo="Nosso")))
+    rotina = ler(pasta, ARQUIVO_ROTINA)
+    rotina[horario]["titulo"] = "Deles"
+    editar(pasta, ARQUIVO_ROTINA, rotina)
+    esperar_mescla(core, core.resumos)
+    core.gravador.descarregar()
+    
+    assert core.resumos[0]["conflitos"] == [horario]
+    assert ler(pasta, ARQUIVO_ROTINA)[horario]["titulo"] == "Nosso"
+    assert ler(pasta, os.path.basename(arquivo_conflito(ARQUIVO_ROTINA)))[horario]["titulo"] == "Deles"
+
+
+def test_marcacao_externa_vai_para_o_banco(core, tmp_path):
+    pasta = str(tmp_path)
+    core.iniciar_observador()
+    categoria, itens = next(iter(core.compras.lista.items()))
+    editar(pasta, ARQUIVO_COMPRAS, [f"{categoria}|{itens[0]}"])
+    esperar_mescla(core, core.resumos)
+    
+    assert core.compras.esta_marcado(categoria, itens[0])
+    assert core.armazenamento.carregar_compras()[1] == {(categoria, itens[0])}
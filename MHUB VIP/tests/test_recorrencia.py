@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Rotina efetiva de cada dia a partir da padrão e das variantes"""
+
+from datetime import date
+
+import pytest
+
+from recorrencia import CalendarioRotina, Variante
+from rotina import Rotina
+
+SEGUNDA = date(2026, 3, 2)
+SABADO = date(2026, 3, 7)
+
+
+def variante(nome, horarios, **regra):
+    return Variante.de_dict(dict(regra, nome=nome, horarios=horarios))
+
+
+@pytest.fixture
+def calendario():
+    base = Rotina.de_json({"06:00": {"titulo": "Acordar"}, "08:00": {"titulo": "Trabalho"}})
+    return CalendarioRotina(base, [
+        variante("Fim de semana", {"08:00": None, "09:00": {"titulo": "Feira"}}, dias_semana=[5, 6]),
+        variante("Março", {"06:00": {"titulo": "Acordar cedo"}}, inicio="2026-03-01", fim="2026-03-31"),
+    ])
+
+
+def titulos(rotina):
+    return {horario: rotina[horario].titulo for horario in rotina.keys()}
+
+
+def test_dia_sem_variante_usa_a_padrao(calendario):
+    assert titulos(calendario.rotina_do_dia(date(2026, 4, 6))) == {"06:00": "Acordar", "08:00": "Trabalho"}
+    assert calendario.variantes_do_dia(date(2026, 4, 6)) == ()
+
+
+def test_variantes_se_sobrepoem_da_menos_para_a_mais_especifica(calendario):
+    assert titulos(calendario.rotina_do_dia(SEGUNDA)) == {"06:00": "Acordar cedo", "08:00": "Trabalho"}
+    sabado = calendario.rotina_do_dia(SABADO)
+    assert titulos(sabado) == {"06:00": "Acordar cedo", "09:00": "Feira"}
+    assert calendario.variantes_do_dia(SABADO) == ("Fim de semana", "Março")
+    assert calendario.origem(SABADO, "09:00") == "Fim de semana"
+    assert calendario.origem(SABADO, "06:00") == "Março"
+
+
+def test_prioridade_vence_a_especificidade_e_data_avulsa_vence_a_faixa(calendario):
+    feriado = variante("Feriado", {"06:00": {"titulo": "Dormir"}}, datas=["2026-03-02"], substituir=True)
+    calendario.definir_variantes(calendario.variantes + [feriado])
+    assert titulos(calendario.rotina_do_dia(SEGUNDA)) == {"06:00": "Dormir"}
+    
+    # Com prioridade maior, a de março é aplicada depois do feriado (que troca o dia inteiro)
+    marco = calendario.variante("Março")
+    marco.prioridade = 1
+    calendario.invalidar()
+    assert calendario.variantes_do_dia(SEGUNDA) == ("Feriado", "Março")
+    assert titulos(calendario.rotina_do_dia(SEGUNDA)) == {"06:00": "Acordar cedo"}
+
+
+def test_cache_por_dia_ate_invalidar(calendario):
+    calendario.rotina_do_dia(SEGUNDA)
+    calendario.rotina_do_dia(SEGUNDA)
+    assert calendario.compilacoes == 1
+    calendario.invalidar()
+    calendario.rotina_do_dia(SEGUNDA)
+    assert calendario.compilacoes == 2
+
+
+@pytest.mark.parametrize("valor, esperado", [("2", 2), (3.0, 3), (-1, -1)])
+def test_prioridade_do_arquivo_vira_inteiro(valor, esperado):
+    assert variante("X", {}, prioridade=valor).prioridade == esperado
+
+
+@pytest.mark.parametrize("valor", ["alta", None, [1], 1.5, True, float("inf")])
+def test_prioridade_invalida_e_rejeitada(valor):
+    with pytest.raises(ValueError):
+        variante("X", {}, prioridade=valor)
+
+
+def test_prioridade_em_texto_ordena_com_as_outras(calendario):
+    calendario.definir_variantes(calendario.variantes + [variante("Texto", {"06:00": {"titulo": "T"}}, prioridade="1")])
+    assert calendario.variantes_do_dia(SEGUNDA)[-1] == "Texto"